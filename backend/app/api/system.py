@@ -2,9 +2,13 @@
 系统管理 API
 """
 
+from typing import Optional
+
 from fastapi import APIRouter
 from ..schemas.response import BaseResponse, success_response, error_response, ErrorCodes
 from ..services.network_time_service import network_time_service
+from ..services.connection_manager import connection_manager
+from ..services.proxy_pool import proxy_pool_service
 
 # 创建路由器
 router = APIRouter()
@@ -21,7 +25,9 @@ async def get_network_time():
             "network_time": network_time_service.format_time_with_ms(current_time),
             "timestamp": int(current_time.timestamp() * 1000),  # 毫秒时间戳
             "time_diff": round(time_diff, 3),  # 时间差（秒）
-            "formatted_time": current_time.strftime('%H:%M:%S.%f')[:-3]  # 只显示时间部分
+            "formatted_time": current_time.strftime('%H:%M:%S.%f')[:-3],  # 只显示时间部分
+            "uncertainty_ms": _round_or_none(network_time_service.get_uncertainty_ms()),  # 误差上限（毫秒）
+            "clock": network_time_service.get_clock_status()
         }
         
         return success_response(data=data, message="获取网络时间成功")
@@ -44,7 +50,9 @@ async def sync_network_time():
             data = {
                 "time_diff": round(time_diff, 3),
                 "network_time": network_time_service.format_time_with_ms(current_time),
-                "sync_success": True
+                "sync_success": True,
+                "uncertainty_ms": _round_or_none(network_time_service.get_uncertainty_ms()),
+                "clock": network_time_service.get_clock_status()
             }
             return success_response(data=data, message="网络时间同步成功")
         else:
@@ -57,4 +65,89 @@ async def sync_network_time():
         return error_response(
             code=ErrorCodes.INTERNAL_ERROR,
             message=f"网络时间同步失败: {str(e)}"
-        ) 
\ No newline at end of file
+        ) 
+
+
+@router.get("/time-sources", response_model=BaseResponse[list])
+async def get_time_source_stats():
+    """获取各时间源的统计（成功率、往返时间、误差），按表现排序"""
+    try:
+        return success_response(data=network_time_service.get_source_stats(), message="获取时间源统计成功")
+
+    except Exception as e:
+        return error_response(
+            code=ErrorCodes.INTERNAL_ERROR,
+            message=f"获取时间源统计失败: {str(e)}"
+        )
+
+
+def _round_or_none(value: Optional[float], digits: int = 3) -> Optional[float]:
+    """保留小数位，None 原样返回"""
+    return None if value is None else round(value, digits)
+
+
+@router.get("/connection-pools", response_model=BaseResponse[dict])
+async def get_connection_pool_stats():
+    """获取HTTP连接池统计（连接复用命中/未命中）"""
+    try:
+        return success_response(data=connection_manager.get_stats(), message="获取连接池统计成功")
+        
+    except Exception as e:
+        return error_response(
+            code=ErrorCodes.INTERNAL_ERROR,
+            message=f"获取连接池统计失败: {str(e)}"
+        )
+
+
+@router.post("/connection-pools/reset-stats", response_model=BaseResponse[dict])
+async def reset_connection_pool_stats():
+    """清空HTTP连接池统计计数"""
+    try:
+        connection_manager.reset_stats()
+        return success_response(data=connection_manager.get_stats(), message="连接池统计已清空")
+        
+    except Exception as e:
+        return error_response(
+            code=ErrorCodes.INTERNAL_ERROR,
+            message=f"清空连接池统计失败: {str(e)}"
+        )
+
+
+@router.get("/proxy-pools", response_model=BaseResponse[list])
+async def get_proxy_pool_stats():
+    """获取共享代理池统计（代理数量、列表年龄、获取耗时）"""
+    try:
+        return success_response(data=proxy_pool_service.get_stats(), message="获取代理池统计成功")
+        
+    except Exception as e:
+        return error_response(
+            code=ErrorCodes.INTERNAL_ERROR,
+            message=f"获取代理池统计失败: {str(e)}"
+        )
+
+
+@router.get("/proxy-pools/ranking", response_model=BaseResponse[dict])
+async def get_proxy_ranking(proxy_url: Optional[str] = None):
+    """获取代理健康排名（成功率、延迟EWMA、连续失败次数、隔离状态），按代理API分组"""
+    try:
+        return success_response(data=proxy_pool_service.get_ranking(proxy_url), message="获取代理排名成功")
+        
+    except Exception as e:
+        return error_response(
+            code=ErrorCodes.INTERNAL_ERROR,
+            message=f"获取代理排名失败: {str(e)}"
+        )
+
+
+@router.post("/proxy-pools/refresh", response_model=BaseResponse[dict])
+async def refresh_proxy_pools(proxy_url: Optional[str] = None):
+    """立即刷新指定（或全部）代理池"""
+    try:
+        count = proxy_pool_service.refresh(proxy_url)
+        return success_response(data={"refreshed": count}, message=f"已触发 {count} 个代理池刷新")
+        
+    except Exception as e:
+        return error_response(
+            code=ErrorCodes.INTERNAL_ERROR,
+            message=f"刷新代理池失败: {str(e)}"
+        )
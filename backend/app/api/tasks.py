@@ -4,6 +4,7 @@
 
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from ..database import get_db
@@ -41,6 +42,9 @@ async def create_task(
         
         result = service.create_task(task_data)
         
+        # 加入调度器的定时队列
+        scheduler_service.schedule_task(result)
+        
         # 将SQLAlchemy对象转换为Pydantic模型
         task_response = TaskResponse.from_orm(result)
         
@@ -152,6 +156,10 @@ async def update_task(
                 )
         
         result = service.update_task(task_id, task_data)
+        
+        # 执行时间可能已变更，同步定时队列
+        scheduler_service.schedule_task(result)
+        
         task_response = TaskResponse.from_orm(result)
         return success_response(data=task_response, message="任务更新成功")
         
@@ -181,10 +189,11 @@ async def delete_task(
         
         # 如果任务正在运行，先停止任务
         if existing.status == TaskStatusEnum.RUNNING:
-            scheduler_service.stop_task(task_id)
+            await run_in_threadpool(scheduler_service.stop_task, task_id)
         
         success = service.delete_task(task_id)
         if success:
+            scheduler_service.unschedule_task(task_id)
             return success_response(
                 data={"deleted_id": task_id},
                 message="任务删除成功"
@@ -226,13 +235,14 @@ async def update_task_status(
             result = service.update_task_status(task_id, status_data.status)
         elif status_data.status == TaskStatusEnum.STOPPED:
             # 停止任务
-            scheduler_service.stop_task(task_id)
+            await run_in_threadpool(scheduler_service.stop_task, task_id)
             result = service.update_task_status(task_id, status_data.status)
         else:
             # 其他状态变更
             result = service.update_task_status(task_id, status_data.status)
         
         if result:
+            scheduler_service.schedule_task(result)
             task_response = TaskResponse.from_orm(result)
             return success_response(data=task_response, message="任务状态更新成功")
         else:
@@ -275,6 +285,9 @@ async def start_task(
         # 更新任务状态为待执行
         result = service.update_task_status(task_id, TaskStatusEnum.PENDING)
         
+        # 加入调度器的定时队列
+        scheduler_service.schedule_task(result)
+        
         task_response = TaskResponse.from_orm(result)
         return success_response(data=task_response, message="任务已加入执行队列")
         
@@ -304,7 +317,7 @@ async def stop_task(
         
         # 停止运行中的任务
         if task.status == TaskStatusEnum.RUNNING:
-            success = scheduler_service.stop_task(task_id)
+            success = await run_in_threadpool(scheduler_service.stop_task, task_id)
             if not success:
                 return error_response(
                     code=ErrorCodes.INTERNAL_ERROR,
@@ -313,6 +326,7 @@ async def stop_task(
         
         # 更新任务状态
         result = service.update_task_status(task_id, TaskStatusEnum.STOPPED)
+        scheduler_service.schedule_task(result)
         
         task_response = TaskResponse.from_orm(result)
         return success_response(data=task_response, message="任务已停止")
@@ -351,6 +365,7 @@ async def duplicate_task(
             )
         
         result = service.duplicate_task(task_id, new_name)
+        scheduler_service.schedule_task(result)
         task_response = TaskResponse.from_orm(result)
         return success_response(data=task_response, message="任务复制成功")
         
@@ -361,6 +376,30 @@ async def duplicate_task(
         )
 
 
+@router.get("/{task_id}/timing", response_model=BaseResponse[dict])
+async def get_task_timing(
+    task_id: int,
+    runs: int = Query(1, ge=1, le=100, description="统计最近几次开始时间"),
+    db: Session = Depends(get_db)
+):
+    """获取任务的发出时刻报告（各线程首次请求的发出误差、到达误差分布）"""
+    try:
+        service = TaskService(db)
+        if not service.get_task(task_id):
+            return error_response(
+                code=ErrorCodes.NOT_FOUND,
+                message=f"任务 ID {task_id} 不存在"
+            )
+        
+        return success_response(data=service.get_timing_report(task_id, runs), message="获取发出时刻报告成功")
+        
+    except Exception as e:
+        return error_response(
+            code=ErrorCodes.INTERNAL_ERROR,
+            message=f"获取发出时刻报告失败: {str(e)}"
+        )
+
+
 @router.get("/stats/summary", response_model=BaseResponse[dict])
 async def get_task_stats(
     db: Session = Depends(get_db)
@@ -376,7 +415,8 @@ async def get_task_stats(
             "completed": service.count_tasks(TaskStatusEnum.COMPLETED),
             "failed": service.count_tasks(TaskStatusEnum.FAILED),
             "stopped": service.count_tasks(TaskStatusEnum.STOPPED),
-            "scheduler_running_count": scheduler_service.get_running_task_count()
+            "scheduler_running_count": scheduler_service.get_running_task_count(),
+            "scheduler_running_stats": scheduler_service.get_running_stats()
         }
         
         return success_response(data=stats, message="获取任务统计成功")
@@ -40,9 +40,49 @@ class Settings:
             self.default_timeout = config_manager.scheduler.default_timeout
             self.max_retry_attempts = config_manager.scheduler.max_retry_attempts
             self.default_thread_count = config_manager.scheduler.default_thread_count
+            self.execution_engine = config_manager.scheduler.execution_engine
+            self.timer_spin_threshold_ms = config_manager.scheduler.timer_spin_threshold_ms
+            self.record_batch_size = config_manager.scheduler.record_batch_size
+            self.record_flush_ms = config_manager.scheduler.record_flush_ms
+            self.record_queue_size = config_manager.scheduler.record_queue_size
             
             self.proxy_timeout = config_manager.proxy.timeout
             self.proxy_rotation_enabled = config_manager.proxy.rotation_enabled
+            self.proxy_fetch_interval = config_manager.proxy.fetch_interval
+            self.proxy_fetch_timeout = config_manager.proxy.fetch_timeout
+            self.proxy_retry_interval = config_manager.proxy.retry_interval
+            self.proxy_retry_max_interval = config_manager.proxy.retry_max_interval
+            self.proxy_circuit_failure_threshold = config_manager.proxy.circuit_failure_threshold
+            self.proxy_circuit_open_seconds = config_manager.proxy.circuit_open_seconds
+            self.proxy_idle_timeout = config_manager.proxy.idle_timeout
+            self.proxy_quarantine_base_seconds = config_manager.proxy.quarantine_base_seconds
+            self.proxy_quarantine_max_seconds = config_manager.proxy.quarantine_max_seconds
+            self.proxy_probe_enabled = config_manager.proxy.probe_enabled
+            self.proxy_probe_lead_seconds = config_manager.proxy.probe_lead_seconds
+            self.proxy_probe_concurrency = config_manager.proxy.probe_concurrency
+            self.proxy_probe_timeout = config_manager.proxy.probe_timeout
+            self.proxy_probe_latency_budget_ms = config_manager.proxy.probe_latency_budget_ms
+            self.proxy_probe_ttl_seconds = config_manager.proxy.probe_ttl_seconds
+            
+            self.http_pool_connections = config_manager.http_pool.pool_connections
+            self.http_pool_maxsize = config_manager.http_pool.pool_maxsize
+            self.http_pool_block = config_manager.http_pool.pool_block
+            self.http_keepalive_timeout = config_manager.http_pool.keepalive_timeout
+            self.http_keepalive_max_requests = config_manager.http_pool.keepalive_max_requests
+            self.http_host_pool_sizes = config_manager.http_pool.host_pool_sizes
+            
+            self.time_sync_interval = config_manager.time_sync.interval
+            self.time_sync_retry_interval = config_manager.time_sync.retry_interval
+            self.time_sync_timeout = config_manager.time_sync.timeout
+            self.time_sync_samples = config_manager.time_sync.samples
+            self.time_sync_best_samples = config_manager.time_sync.best_samples
+            self.time_sync_sample_interval_ms = config_manager.time_sync.sample_interval_ms
+            self.time_sync_history_size = config_manager.time_sync.history_size
+            self.time_sync_assumed_drift_ppm = config_manager.time_sync.assumed_drift_ppm
+            self.time_sync_resync_attempts = config_manager.time_sync.resync_attempts
+            self.time_sync_target_samples = config_manager.time_sync.target_samples
+            self.time_sync_target_lead_seconds = config_manager.time_sync.target_lead_seconds
+            self.time_sync_sources = config_manager.time_sync.sources
             
             self.log_level = config_manager.logging.level
             self.log_file = config_manager.logging.file
@@ -71,9 +111,49 @@ class Settings:
             self.default_timeout = 30
             self.max_retry_attempts = 10
             self.default_thread_count = 5
+            self.execution_engine = "thread"
+            self.timer_spin_threshold_ms = 2.0
+            self.record_batch_size = 200
+            self.record_flush_ms = 200
+            self.record_queue_size = 100000
             
             self.proxy_timeout = 30
             self.proxy_rotation_enabled = True
+            self.proxy_fetch_interval = 30
+            self.proxy_fetch_timeout = 10
+            self.proxy_retry_interval = 5
+            self.proxy_retry_max_interval = 120
+            self.proxy_circuit_failure_threshold = 3
+            self.proxy_circuit_open_seconds = 60
+            self.proxy_idle_timeout = 300
+            self.proxy_quarantine_base_seconds = 5.0
+            self.proxy_quarantine_max_seconds = 300.0
+            self.proxy_probe_enabled = True
+            self.proxy_probe_lead_seconds = 10.0
+            self.proxy_probe_concurrency = 50
+            self.proxy_probe_timeout = 3.0
+            self.proxy_probe_latency_budget_ms = 1500.0
+            self.proxy_probe_ttl_seconds = 60.0
+            
+            self.http_pool_connections = 100
+            self.http_pool_maxsize = 50
+            self.http_pool_block = False
+            self.http_keepalive_timeout = 60
+            self.http_keepalive_max_requests = 0
+            self.http_host_pool_sizes = {}
+            
+            self.time_sync_interval = 300
+            self.time_sync_retry_interval = 10
+            self.time_sync_timeout = 5.0
+            self.time_sync_samples = 8
+            self.time_sync_best_samples = 3
+            self.time_sync_sample_interval_ms = 20.0
+            self.time_sync_history_size = 8
+            self.time_sync_assumed_drift_ppm = 50.0
+            self.time_sync_resync_attempts = 2
+            self.time_sync_target_samples = 12
+            self.time_sync_target_lead_seconds = 20.0
+            self.time_sync_sources = []
             
             self.log_level = "INFO"
             self.log_file = None
@@ -6,7 +6,7 @@
 import json
 import os
 from typing import Dict, Any, Optional, List
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 
 
@@ -84,7 +84,12 @@ class SchedulerConfig:
     default_timeout: int
     max_retry_attempts: int
     default_thread_count: int
-    check_interval: int
+    execution_engine: str = "thread"  # 默认执行引擎: thread（线程池）/ async（协程）
+    timer_spin_threshold_ms: float = 2.0  # 等待开始时间时最后多少毫秒改为自旋（Windows 休眠精度较低，建议 16）
+    record_batch_size: int = 200  # 执行记录后台批量写入：累计多少条写入一次
+    record_flush_ms: int = 200  # 执行记录后台批量写入：最长间隔多少毫秒写入一次
+    record_queue_size: int = 100000  # 执行记录后台批量写入：队列最多缓存多少条，写满后丢弃新记录
+    check_interval: Optional[int] = None  # 已废弃：调度改为定时队列后不再轮询，仅为兼容旧配置文件保留
 
 
 @dataclass
@@ -93,6 +98,48 @@ class ProxyConfig:
     timeout: int
     rotation_enabled: bool
     fetch_interval: int
+    fetch_timeout: int = 10            # 请求代理API的超时时间（秒）
+    retry_interval: int = 5            # 获取失败后的首次重试间隔（秒），连续失败时翻倍
+    retry_max_interval: int = 120      # 获取失败后的最长重试间隔（秒）
+    circuit_failure_threshold: int = 3 # 单个代理API连续失败多少次后熔断
+    circuit_open_seconds: int = 60     # 熔断持续时间（秒）
+    idle_timeout: int = 300            # 代理池多久未被使用后停止刷新（秒）
+    quarantine_base_seconds: float = 5.0    # 代理失败后的首次隔离时间（秒），连续失败时翻倍
+    quarantine_max_seconds: float = 300.0   # 最长隔离时间（秒）
+    probe_enabled: bool = True              # 指定时间任务在开始前探测代理到目标主机的连通性
+    probe_lead_seconds: float = 10.0        # 启用代理的指定时间任务提前出队的秒数，用于探测代理
+    probe_concurrency: int = 50             # 同时探测的代理数
+    probe_timeout: float = 3.0              # 单个代理的探测超时（秒）
+    probe_latency_budget_ms: float = 1500.0 # 探测延迟不超过该值的代理才会被使用
+    probe_ttl_seconds: float = 60.0         # 探测结果的有效期（秒）
+
+
+@dataclass
+class HttpPoolConfig:
+    """HTTP连接池配置"""
+    pool_connections: int = 100        # 缓存的连接池数量（按 scheme/host/port/代理 区分）
+    pool_maxsize: int = 50             # 每个主机保持的最大连接数
+    pool_block: bool = False           # 连接用尽时是否阻塞等待
+    keepalive_timeout: int = 60        # 空闲连接保持时间（秒），0 表示不限制
+    keepalive_max_requests: int = 0    # 单个连接最多复用次数，0 表示不限制
+    host_pool_sizes: Dict[str, int] = field(default_factory=dict)  # 按主机覆盖连接数
+
+
+@dataclass
+class TimeSyncConfig:
+    """网络时间同步配置"""
+    interval: int = 300                # 后台同步间隔（秒）
+    retry_interval: int = 10           # 同步失败后的首次重试间隔（秒），连续失败时翻倍，最长为同步间隔
+    timeout: float = 5.0               # 单次请求时间API的超时（秒）
+    samples: int = 8                   # 每个时间源每次同步的采样次数（含建立连接的首次请求）
+    best_samples: int = 3              # 样本区间不相交时只用往返时间最小的几个样本估计时间差
+    sample_interval_ms: float = 20.0   # 相邻两次采样的间隔（毫秒）
+    history_size: int = 8              # 用于拟合本地时钟漂移的历史同步次数
+    assumed_drift_ppm: float = 50.0    # 漂移未知时假设的漂移误差上限（百万分之一）
+    resync_attempts: int = 2           # 任务要求的误差上限未满足时最多重新同步的次数
+    target_samples: int = 12           # 校准目标主机时钟时最多探测的次数
+    target_lead_seconds: float = 20.0  # 校准目标主机时钟的指定时间任务提前出队的秒数
+    sources: List[Dict[str, Any]] = field(default_factory=list)  # 时间源，为空时使用美团、淘宝时间API
 
 
 @dataclass
@@ -117,6 +164,8 @@ class ConfigManager:
         self._cors: Optional[CorsConfig] = None
         self._scheduler: Optional[SchedulerConfig] = None
         self._proxy: Optional[ProxyConfig] = None
+        self._http_pool: Optional[HttpPoolConfig] = None
+        self._time_sync: Optional[TimeSyncConfig] = None
         self._logging: Optional[LoggingConfig] = None
         
     def init(self) -> None:
@@ -183,6 +232,14 @@ class ConfigManager:
             proxy_data = self._config_data.get("proxy", {})
             self._proxy = ProxyConfig(**proxy_data)
             
+            # 解析HTTP连接池配置（可选）
+            http_pool_data = self._config_data.get("http_pool", {})
+            self._http_pool = HttpPoolConfig(**http_pool_data)
+            
+            # 解析网络时间同步配置（可选）
+            time_sync_data = self._config_data.get("time_sync", {})
+            self._time_sync = TimeSyncConfig(**time_sync_data)
+            
             # 解析日志配置
             logging_data = self._config_data.get("logging", {})
             self._logging = LoggingConfig(**logging_data)
@@ -239,6 +296,20 @@ class ConfigManager:
             raise RuntimeError("配置未初始化，请先调用 init() 方法")
         return self._proxy
     
+    @property
+    def http_pool(self) -> HttpPoolConfig:
+        """获取HTTP连接池配置"""
+        if self._http_pool is None:
+            raise RuntimeError("配置未初始化，请先调用 init() 方法")
+        return self._http_pool
+    
+    @property
+    def time_sync(self) -> TimeSyncConfig:
+        """获取网络时间同步配置"""
+        if self._time_sync is None:
+            raise RuntimeError("配置未初始化，请先调用 init() 方法")
+        return self._time_sync
+    
     @property
     def logging(self) -> LoggingConfig:
         """获取日志配置"""
@@ -4,7 +4,7 @@
 """
 
 from contextlib import contextmanager
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker, Session
 
 from .config import settings
@@ -59,6 +59,27 @@ def create_tables():
     # 确保所有模型都被导入，这样它们的表才会被注册到Base.metadata中
     from .models import request, task, execution
     Base.metadata.create_all(bind=engine)
+    add_missing_columns()
+
+
+def add_missing_columns():
+    """为已存在的数据表补充模型中新增的可空列（create_all 不会修改已有表）"""
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+        existing_tables = set(inspector.get_table_names())
+        
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            
+            existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns or not column.nullable:
+                    continue
+                
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+                print(f"✅ 数据表 {table.name} 新增列 {column.name}")
 
 
 def drop_tables():
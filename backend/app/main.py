@@ -17,6 +17,7 @@ from .config import settings, setup_logging
 from .database import create_database, create_tables
 from .schemas.response import error_response, ErrorCodes, BaseResponse
 from .services.scheduler_service import scheduler_service
+from .services.connection_manager import connection_manager
 
 
 @asynccontextmanager
@@ -58,6 +59,9 @@ async def lifespan(app: FastAPI):
         logger.info("✅ 调度服务已停止")
     except Exception as e:
         logger.error(f"❌ 停止调度服务失败: {e}")
+    
+    # 关闭共享HTTP连接池
+    connection_manager.shutdown()
 
 
 # 创建FastAPI应用
@@ -198,12 +202,15 @@ async def serve_ui():
 @app.get("/health", response_model=BaseResponse[dict])
 async def health_check():
     """健康检查"""
+    running_stats = scheduler_service.get_running_stats()
     return BaseResponse(
         code=0,
         data={
             "status": "healthy",
             "scheduler_running": scheduler_service.running,
-            "running_tasks": scheduler_service.get_running_task_count(),
+            "running_tasks": running_stats["running_tasks"],
+            "running_runners": running_stats["running_runners"],
+            "attempts_in_flight": running_stats["attempts_in_flight"],
             "database_type": settings.database_url.split('://')[0]
         },
         message="Service is healthy"
@@ -231,8 +238,7 @@ async def get_config_info():
             },
             "scheduler": {
                 "default_timeout": config.scheduler.default_timeout,
-                "default_thread_count": config.scheduler.default_thread_count,
-                "check_interval": config.scheduler.check_interval
+                "default_thread_count": config.scheduler.default_thread_count
             }
         }
         
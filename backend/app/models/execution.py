@@ -2,7 +2,7 @@
 执行记录数据模型
 """
 
-from sqlalchemy import Column, String, Text, Enum, Integer, ForeignKey, DateTime, Float
+from sqlalchemy import Column, String, Text, Enum, Integer, BigInteger, ForeignKey, DateTime, Float, Boolean
 from sqlalchemy.dialects.postgresql import JSON
 from sqlalchemy.orm import relationship
 import enum
@@ -57,7 +57,18 @@ class ExecutionRecord(BaseModel):
     response_code = Column(Integer, comment="HTTP状态码")
     response_headers = Column(JSON, comment="响应头")
     response_body = Column(Text, comment="响应体")
+    body_truncated = Column(Boolean, comment="响应体是否只保存了前缀（流式读取提前结束或超过字节上限）")
     response_time = Column(Float, comment="响应时间（毫秒）")
+    warmup_time = Column(Float, comment="连接预热耗时（毫秒），仅预热后的首次尝试记录")
+    release_error = Column(Float, comment="开始时间释放误差（微秒），仅等待开始时间后的首次尝试记录")
+    
+    # 发出时刻（指定时间任务的计划发出时刻、时钟偏移和到达误差仅等待开始时间后的首次尝试记录）
+    sent_at = Column(BigInteger, comment="实际发出时刻（由单调时钟换算的本地时钟 Unix 微秒）")
+    first_byte_time = Column(Float, comment="首字节时间（毫秒），从发出到收到响应头")
+    planned_send_at = Column(BigInteger, comment="计划发出时刻（本地时钟 Unix 微秒，含错开偏移）")
+    clock_offset = Column(Float, comment="对时使用的时钟偏移（毫秒），参考时钟 - 本地时钟")
+    clock_source = Column(String(20), comment="对时方式：network 网络时间 / target 目标主机时钟")
+    arrival_error = Column(Float, comment="估计的到达误差（微秒），正数表示晚于开始时间到达")
     
     # 错误信息
     error_message = Column(Text, comment="错误消息")
@@ -33,6 +33,41 @@ class ScheduleTypeEnum(str, enum.Enum):
     CRON = "cron"           # Cron表达式
 
 
+class ExecutionEngineEnum(str, enum.Enum):
+    """执行引擎枚举"""
+    THREAD = "thread"        # 线程池 + requests
+    ASYNC = "async"          # 事件循环 + 异步HTTP客户端
+
+
+class ProxyRotationEnum(str, enum.Enum):
+    """代理轮换策略枚举"""
+    PER_ATTEMPT = "per_attempt"  # 每次尝试重新选择代理
+    STICKY = "sticky"            # 每个执行器固定使用一个代理，代理不可用时才更换
+    EVERY_N = "every_n"          # 每个执行器每 N 次请求更换一次代理
+    ON_FAILURE = "on_failure"    # 请求失败时更换代理
+
+
+class ProxyUnavailablePolicyEnum(str, enum.Enum):
+    """没有可用代理时的处理策略枚举"""
+    DIRECT = "direct"  # 使用本地IP直连
+    FAIL = "fail"      # 本次尝试直接失败
+    WAIT = "wait"      # 等待代理池获取到代理，超时后本次尝试失败
+
+
+class ClockSourceEnum(str, enum.Enum):
+    """指定时间任务的对时方式枚举"""
+    NETWORK = "network"  # 公共时间API（网络时间）加手动时间差
+    TARGET = "target"    # 开始前校准目标主机的时钟，并按单程延迟提前发出
+
+
+class CalibrationProbeEnum(str, enum.Enum):
+    """目标主机时钟校准的探测方式枚举"""
+    HEAD = "head"        # 向请求地址发送 HEAD
+    OPTIONS = "options"  # 向请求地址发送 OPTIONS（不支持 HEAD 的接口）
+    URL = "url"          # GET 配置的空跑地址 calibration_url（同一主机上没有副作用的接口，如服务器时间接口）
+    REQUEST = "request"  # 已废弃，按 head 处理：开始前重放任务请求可能产生下单等副作用
+
+
 class Task(BaseModel):
     """任务模型"""
     
@@ -71,7 +106,17 @@ class Task(BaseModel):
     #   "type": "immediate|datetime|cron",
     #   "start_time": "2024-01-20 15:00:00",  # datetime类型时使用
     #   "cron_expression": "0 */5 * * *",    # cron类型时使用
-    #   "timezone": "Asia/Shanghai"
+    #   "timezone": "Asia/Shanghai",
+    #   "engine": "thread|async",            # 执行引擎，为空时使用全局配置
+    #   "prewarm_seconds": 0,                # datetime类型时提前预热连接的秒数
+    #   "stagger_start_ms": -10,             # 多线程错开释放：首个线程的偏移（毫秒）
+    #   "stagger_end_ms": 40,                # 多线程错开释放：最后一个线程的偏移（毫秒）
+    #   "max_clock_uncertainty_ms": 5,       # 开始前网络时间误差上限（毫秒），0表示不检查
+    #   "clock_source": "network|target",    # 对时方式，target 时校准目标主机时钟并忽略 time_diff
+    #   "calibration_probe": "head|options|url", # target 对时的探测方式
+    #   "calibration_url": "https://...",  # url 探测时请求的空跑地址
+    #   "calibration_timestamp_field": "data.serverTime",  # url 探测时从JSON响应取时间戳的字段路径，为空时使用 Date 头
+    #   "compensate_latency": true           # target 对时按单程延迟提前发出
     # }
     
     # 重试配置
@@ -89,6 +134,9 @@ class Task(BaseModel):
     #   "enabled": true,
     #   "proxy_url": "http://proxy.example.com/api/get",
     #   "rotation": true,
+    #   "rotation_policy": "sticky",
+    #   "fallback_urls": ["http://backup.example.com/api/get"],
+    #   "unavailable_policy": "wait",
     #   "timeout": 30
     # }
     
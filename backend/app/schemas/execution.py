@@ -25,7 +25,16 @@ class ExecutionRecordBase(BaseModel):
     response_code: Optional[int] = Field(None, description="HTTP状态码")
     response_headers: Optional[Dict[str, Any]] = Field(None, description="响应头")
     response_body: Optional[str] = Field(None, description="响应体")
+    body_truncated: Optional[bool] = Field(None, description="响应体是否只保存了前缀")
     response_time: Optional[float] = Field(None, description="响应时间（毫秒）")
+    warmup_time: Optional[float] = Field(None, description="连接预热耗时（毫秒）")
+    release_error: Optional[float] = Field(None, description="开始时间释放误差（微秒）")
+    sent_at: Optional[int] = Field(None, description="实际发出时刻（本地时钟 Unix 微秒）")
+    first_byte_time: Optional[float] = Field(None, description="首字节时间（毫秒）")
+    planned_send_at: Optional[int] = Field(None, description="计划发出时刻（本地时钟 Unix 微秒）")
+    clock_offset: Optional[float] = Field(None, description="对时使用的时钟偏移（毫秒）")
+    clock_source: Optional[str] = Field(None, description="对时方式")
+    arrival_error: Optional[float] = Field(None, description="估计的到达误差（微秒）")
     
     # 错误信息
     error_message: Optional[str] = Field(None, description="错误消息")
@@ -3,10 +3,13 @@
 """
 
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from pydantic import BaseModel, Field
 
-from ..models.task import TaskTypeEnum, TaskStatusEnum, ScheduleTypeEnum
+from ..models.task import (
+    TaskTypeEnum, TaskStatusEnum, ScheduleTypeEnum, ExecutionEngineEnum, ProxyRotationEnum, ProxyUnavailablePolicyEnum,
+    ClockSourceEnum, CalibrationProbeEnum
+)
 
 
 class ScheduleConfigSchema(BaseModel):
@@ -15,6 +18,16 @@ class ScheduleConfigSchema(BaseModel):
     start_time: Optional[str] = Field(None, description="开始时间")
     cron_expression: Optional[str] = Field(None, description="Cron表达式")
     timezone: str = Field(default="Asia/Shanghai", description="时区")
+    engine: Optional[ExecutionEngineEnum] = Field(None, description="执行引擎，为空时使用全局配置")
+    prewarm_seconds: float = Field(default=0, ge=0, le=300, description="指定时间任务提前预热连接的秒数，0表示不预热")
+    stagger_start_ms: float = Field(default=0, ge=-60000, le=60000, description="第一个线程相对开始时间的释放偏移（毫秒）")
+    stagger_end_ms: float = Field(default=0, ge=-60000, le=60000, description="最后一个线程相对开始时间的释放偏移（毫秒），其余线程线性分布")
+    max_clock_uncertainty_ms: float = Field(default=0, ge=0, le=60000, description="开始前网络时间误差上限（毫秒），超过时重新同步，仍超过则任务失败；0表示不检查")
+    clock_source: ClockSourceEnum = Field(default=ClockSourceEnum.NETWORK, description="对时方式：network 网络时间加手动时间差，target 开始前校准目标主机时钟（忽略时间差）")
+    calibration_probe: CalibrationProbeEnum = Field(default=CalibrationProbeEnum.HEAD, description="target 对时的探测方式：head / options 向请求地址发送 HEAD / OPTIONS，url 请求 calibration_url（request 已废弃，按 head 处理）")
+    calibration_url: Optional[str] = Field(None, max_length=2000, description="url 探测时请求的空跑地址，应与任务请求同一主机且没有副作用（如服务器时间接口）")
+    calibration_timestamp_field: Optional[str] = Field(None, max_length=200, description="url 探测时从JSON响应中读取服务器时间戳的字段路径（如 data.serverTime，秒或毫秒），为空时使用 Date 响应头")
+    compensate_latency: bool = Field(default=True, description="target 对时时按估计的单程延迟提前发出，使请求在开始时间到达目标主机")
 
 
 class RetryConfigSchema(BaseModel):
@@ -24,13 +37,21 @@ class RetryConfigSchema(BaseModel):
     success_condition: Optional[str] = Field(None, description="成功条件表达式")
     stop_condition: Optional[str] = Field(None, description="停止条件表达式")
     key_message: Optional[str] = Field(None, description="关键消息")
+    success_keywords: List[str] = Field(default_factory=list, description="成功关键字，响应包含任一关键字即成功（优先级低于关键消息）")
+    stop_keywords: List[str] = Field(default_factory=list, description="停止关键字，响应包含任一关键字即停止（优先级最高），如 售罄、限流、验证码")
+    max_body_bytes: int = Field(default=0, ge=0, le=100 * 1024 * 1024, description="流式读取响应体的最大字节数，已能判定结果时提前停止读取，只保存已读取的前缀；0表示完整读取")
 
 
 class ProxyConfigSchema(BaseModel):
     """代理配置模式"""
     enabled: bool = Field(default=False, description="是否启用代理")
     proxy_url: Optional[str] = Field(None, description="代理获取URL")
+    fallback_urls: List[str] = Field(default_factory=list, description="备用代理获取URL，主地址失败或熔断时依次使用")
     rotation: bool = Field(default=True, description="是否轮换代理")
+    rotation_policy: Optional[ProxyRotationEnum] = Field(None, description="代理轮换策略，为空时由 rotation 决定（轮换时每次尝试更换，否则固定使用评分最高的代理）")
+    rotate_every: int = Field(default=10, ge=1, le=100000, description="every_n 策略下每个执行器更换代理前的请求数")
+    unavailable_policy: ProxyUnavailablePolicyEnum = Field(default=ProxyUnavailablePolicyEnum.DIRECT, description="没有可用代理时的处理策略：direct 直连、fail 本次尝试失败、wait 等待代理")
+    unavailable_wait_seconds: int = Field(default=30, ge=1, le=3600, description="wait 策略下最长等待时间（秒）")
     timeout: int = Field(default=30, ge=1, le=300, description="超时时间（秒）")
 
 
@@ -0,0 +1,344 @@
+"""
+异步 HTTP 请求执行服务
+在单个事件循环上以协程方式运行任务的并发 worker，避免每个并发请求占用一个系统线程
+"""
+
+import asyncio
+import inspect
+import ssl
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Coroutine, Dict, List, Optional, Set, Tuple
+
+try:
+    import certifi
+    import httpx
+except ImportError:  # 可选依赖: pip install request-manager[async]
+    httpx = None
+
+from loguru import logger
+
+from ..models.request import HttpRequest
+from ..config import settings
+from .executor_service import BodyDecider, BodyPrefixReader, ExecutorService
+
+
+def is_async_engine_available() -> bool:
+    """异步执行引擎依赖 httpx"""
+    return httpx is not None
+
+
+class _ClientEntry:
+    """缓存的客户端及其使用情况"""
+
+    __slots__ = ("client", "last_used", "in_flight")
+
+    def __init__(self, client: "httpx.AsyncClient"):
+        self.client = client
+        self.last_used = time.monotonic()
+        self.in_flight = 0
+
+
+class AsyncExecutorService:
+    """异步HTTP请求执行服务，返回结果与 ExecutorService.execute_request 一致"""
+
+    def __init__(self):
+        if httpx is None:
+            raise RuntimeError("异步执行引擎需要安装 httpx: pip install httpx")
+
+        # 代理地址 -> 客户端（每个客户端维护自己的连接池），只能在所属事件循环中使用
+        # 按最近使用排序，超过上限或空闲超过保活时间的客户端会被关闭（轮换代理时不会无限增长）
+        self._clients: "OrderedDict[Optional[str], _ClientEntry]" = OrderedDict()
+        self._max_clients = max(1, settings.http_pool_connections)
+        self._idle_timeout = settings.http_keepalive_timeout
+        self._closing: Set[asyncio.Task] = set()
+        self._limits = httpx.Limits(
+            max_connections=None,
+            max_keepalive_connections=settings.http_pool_maxsize,
+            keepalive_expiry=settings.http_keepalive_timeout or None,
+        )
+        # 所有客户端共享一个 SSL 上下文，避免每个代理的客户端各自加载一次证书（约 100ms，会阻塞事件循环）
+        self._ssl_context = ssl.create_default_context(cafile=certifi.where())
+
+    async def execute_request(
+        self,
+        request: HttpRequest,
+        override_params: Optional[Dict[str, Any]] = None,
+        proxy: Optional[str] = None,
+        max_body_bytes: int = 0,
+        body_decider: Optional[BodyDecider] = None
+    ) -> Dict[str, Any]:
+        """
+        执行HTTP请求（用于任务调度）
+
+        Args:
+            request: HTTP请求对象
+            override_params: 覆盖参数
+            proxy: 代理设置
+            max_body_bytes: 大于0时流式读取响应体，最多读取该字节数
+            body_decider: 流式读取时的判定函数，返回 True 时停止读取剩余内容
+
+        Returns:
+            Dict: 执行结果（字段与 ExecutorService.execute_request 一致）
+        """
+        start_time = time.time()
+        result = {
+            "success": False,
+            "status_code": None,
+            "response_body": None,
+            "response_headers": None,
+            "response_time": None,
+            "error_message": None,
+            "proxy_used": proxy
+        }
+        entry: Optional[_ClientEntry] = None
+
+        try:
+            # 确保request对象不为None
+            if not request:
+                result["error_message"] = "请求对象为空"
+                return result
+
+            # 准备请求参数（与同步执行服务保持一致）
+            url, headers, params, body = ExecutorService._merge_override_params(request, override_params)
+            url, request_data, json_data = ExecutorService._build_request_args(
+                request.method.value, url, headers, params, body
+            )
+
+            entry = self._get_client(ExecutorService._normalize_proxy(proxy))
+            entry.in_flight += 1
+            client = entry.client
+            http_request = client.build_request(
+                method=request.method.value.upper(),
+                url=url,
+                headers=headers,
+                content=request_data,
+                json=json_data,
+                timeout=settings.default_timeout
+            )
+            # 始终先只读取响应头，以便测量首字节时间
+            result["sent_ns"] = time.monotonic_ns()
+            response = await client.send(http_request, stream=True)
+            result["first_byte_ms"] = (time.monotonic_ns() - result["sent_ns"]) / 1e6
+
+            if max_body_bytes > 0:
+                response_body, truncated = await self._read_body_prefix(response, max_body_bytes, body_decider)
+                result["body_truncated"] = truncated
+            else:
+                try:
+                    await response.aread()
+                finally:
+                    await response.aclose()
+                response_body = response.text
+
+            # 计算响应时间
+            response_time = (time.time() - start_time) * 1000
+
+            result.update({
+                "success": True,
+                "status_code": response.status_code,
+                "response_body": response_body,
+                "response_headers": dict(response.headers),
+                "response_time": response_time
+            })
+
+        except httpx.TimeoutException:
+            result.update({
+                "error_message": "请求超时",
+                "response_time": (time.time() - start_time) * 1000
+            })
+        except httpx.ProxyError as e:
+            result.update({
+                "error_message": f"代理错误: {str(e)}",
+                "response_time": (time.time() - start_time) * 1000
+            })
+        except (httpx.ConnectError, httpx.RemoteProtocolError) as e:
+            result.update({
+                "error_message": f"连接失败: {str(e)}",
+                "response_time": (time.time() - start_time) * 1000
+            })
+        except Exception as e:
+            result.update({
+                "error_message": f"请求失败: {str(e)}",
+                "response_time": (time.time() - start_time) * 1000
+            })
+            # 记录详细的异常信息
+            traceback.print_exc()
+        finally:
+            if entry is not None:
+                entry.in_flight -= 1
+                entry.last_used = time.monotonic()
+
+        return result
+
+    @staticmethod
+    async def _read_body_prefix(
+        response: "httpx.Response",
+        max_body_bytes: int,
+        body_decider: Optional[BodyDecider] = None
+    ) -> Tuple[str, bool]:
+        """流式读取响应体前缀，返回 (响应体文本, 是否被截断)"""
+        reader = BodyPrefixReader(
+            response.status_code,
+            response.charset_encoding,
+            max_body_bytes,
+            body_decider,
+            response.headers.get("Content-Length"),
+            response.headers.get("Content-Encoding")
+        )
+        stopped = reader.decided()
+        chunks = response.aiter_bytes(BodyPrefixReader.CHUNK_SIZE)
+        try:
+            if not stopped:
+                async for chunk in chunks:
+                    if reader.feed(chunk):
+                        stopped = True
+                        break
+
+            truncated = stopped and not reader.complete
+            if truncated and reader.should_drain(response.num_bytes_downloaded):
+                # 剩余内容很少，读完以便连接放回连接池（字节上限以内的部分仍然保留）
+                async for chunk in chunks:
+                    reader.append(chunk)
+                truncated = reader.discarded
+        finally:
+            await response.aclose()
+
+        return reader.text(complete=not truncated), truncated
+
+    def prepare_client(self, proxy: Optional[str] = None) -> None:
+        """提前创建客户端，避免在开始时间到达后阻塞事件循环"""
+        self._get_client(ExecutorService._normalize_proxy(proxy))
+
+    def _get_client(self, proxy: Optional[str]) -> _ClientEntry:
+        """获取（或创建）指定代理的客户端，并关闭过期的客户端"""
+        entry = self._clients.get(proxy)
+        if entry is None:
+            kwargs: Dict[str, Any] = {"limits": self._limits, "follow_redirects": True, "verify": self._ssl_context}
+            if proxy:
+                # httpx 0.26 起使用 proxy 参数，旧版本使用 proxies
+                if "proxy" in inspect.signature(httpx.AsyncClient.__init__).parameters:
+                    kwargs["proxy"] = proxy
+                else:
+                    kwargs["proxies"] = proxy
+            entry = self._clients[proxy] = _ClientEntry(httpx.AsyncClient(**kwargs))
+        else:
+            entry.last_used = time.monotonic()
+            self._clients.move_to_end(proxy)
+
+        self._evict_clients(keep=proxy)
+        return entry
+
+    def _evict_clients(self, keep: Optional[str]) -> None:
+        """关闭空闲超过保活时间的客户端，数量超过上限时按最近最少使用关闭（正在发送请求的客户端不关闭）"""
+        now = time.monotonic()
+        excess = len(self._clients) - self._max_clients
+        evicted: List["httpx.AsyncClient"] = []
+        for proxy, entry in list(self._clients.items()):
+            if proxy == keep or entry.in_flight > 0:
+                continue
+            idle = self._idle_timeout > 0 and now - entry.last_used > self._idle_timeout
+            if not idle and excess <= 0:
+                break
+            del self._clients[proxy]
+            evicted.append(entry.client)
+            excess -= 1
+
+        if evicted:
+            logger.debug(f"关闭 {len(evicted)} 个过期的异步HTTP客户端，剩余 {len(self._clients)} 个")
+            task = asyncio.get_running_loop().create_task(self._close_clients(evicted))
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+
+    @staticmethod
+    async def _close_clients(clients: List["httpx.AsyncClient"]) -> None:
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"关闭异步HTTP客户端失败: {e}")
+
+    async def aclose(self) -> None:
+        """关闭所有客户端"""
+        clients = [entry.client for entry in self._clients.values()]
+        self._clients.clear()
+        await self._close_clients(clients)
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
+
+
+class AsyncExecutionEngine:
+    """
+    异步执行引擎
+    在后台线程中运行一个事件循环，调度器通过 submit 提交协程并得到 concurrent.futures.Future
+    """
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._executor_service: Optional[AsyncExecutorService] = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> AsyncExecutorService:
+        """事件循环内共享的异步执行服务（只能在事件循环线程中使用）"""
+        if self._executor_service is None:
+            self._executor_service = AsyncExecutorService()
+        return self._executor_service
+
+    def submit(self, coro: Coroutine[Any, Any, Any]) -> Future:
+        """提交协程到事件循环"""
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(coro, loop)
+
+    def shutdown(self, timeout: float = 5) -> None:
+        """关闭事件循环"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = None
+            self._thread = None
+
+        if loop is None:
+            return
+
+        if self._executor_service is not None:
+            try:
+                asyncio.run_coroutine_threadsafe(self._executor_service.aclose(), loop).result(timeout)
+            except Exception as e:
+                logger.warning(f"关闭异步HTTP客户端失败: {e}")
+            self._executor_service = None
+
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join(timeout)
+        logger.info("异步执行引擎已停止")
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """按需启动事件循环线程"""
+        with self._lock:
+            if self._loop is None:
+                if httpx is None:
+                    raise RuntimeError("异步执行引擎需要安装 httpx: pip install httpx")
+
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def run_loop() -> None:
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+                    loop.close()
+
+                self._thread = threading.Thread(target=run_loop, name="async-engine", daemon=True)
+                self._thread.start()
+                ready.wait()
+                self._loop = loop
+                logger.info("异步执行引擎已启动")
+            return self._loop
+
+
+# 全局异步执行引擎实例
+async_engine = AsyncExecutionEngine()
@@ -0,0 +1,432 @@
+"""
+HTTP 连接管理服务
+进程内所有 ExecutorService 共享同一组连接池，按 (scheme, host, port, 代理) 区分，
+避免每个执行线程各自建立连接并重复进行 DNS、TCP 和 TLS 握手
+"""
+
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.poolmanager import PoolManager, ProxyManager
+from urllib3.util.proxy import connection_requires_http_tunnel
+from loguru import logger
+
+from ..config import settings
+
+
+class PoolStats:
+    """单个连接池的统计信息"""
+
+    def __init__(self, key: str):
+        self.key = key
+        self.hits = 0       # 复用已有连接的次数
+        self.misses = 0     # 需要新建连接的次数
+        self.expired = 0    # 因空闲超时或复用次数达到上限而关闭的连接数
+
+    def to_dict(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "key": self.key,
+            "requests": total,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "hit_rate": round(self.hits / total * 100, 2) if total else 0.0,
+        }
+
+
+class _TrackedPoolMixin:
+    """为 urllib3 连接池增加命中统计和 keep-alive 限制"""
+
+    connection_manager: "ConnectionManager"
+    stats: PoolStats
+
+    def _get_conn(self, timeout: Optional[float] = None):
+        conn = super()._get_conn(timeout)
+        manager = self.connection_manager
+
+        reused = getattr(conn, "sock", None) is not None
+        if reused and manager.should_expire(conn):
+            conn.close()
+            manager.record(self.stats, expired=True)
+            reused = False
+
+        if not reused:
+            conn._rm_request_count = 0
+        conn._rm_request_count = getattr(conn, "_rm_request_count", 0) + 1
+
+        manager.record(self.stats, hit=reused)
+        return conn
+
+    def _put_conn(self, conn) -> None:
+        if conn is not None:
+            conn._rm_last_used = time.monotonic()
+        super()._put_conn(conn)
+
+
+class TrackedHTTPConnectionPool(_TrackedPoolMixin, HTTPConnectionPool):
+    """带统计的 HTTP 连接池"""
+
+
+class TrackedHTTPSConnectionPool(_TrackedPoolMixin, HTTPSConnectionPool):
+    """带统计的 HTTPS 连接池"""
+
+
+_TRACKED_POOL_CLASSES = {
+    "http": TrackedHTTPConnectionPool,
+    "https": TrackedHTTPSConnectionPool,
+}
+
+
+class _TrackedPoolManagerMixin:
+    """创建连接池时应用按主机配置的连接数，并登记统计对象"""
+
+    connection_manager: "ConnectionManager"
+
+    def _new_pool(self, scheme: str, host: str, port: int, request_context: Optional[dict] = None):
+        if request_context is None:
+            request_context = self.connection_pool_kw.copy()
+        else:
+            request_context = dict(request_context)
+
+        maxsize = self.connection_manager.pool_size_for(host)
+        if maxsize:
+            request_context["maxsize"] = maxsize
+
+        pool = super()._new_pool(scheme, host, port, request_context)
+        pool.connection_manager = self.connection_manager
+        pool.stats = self.connection_manager.stats_for(scheme, host, port, getattr(pool, "proxy", None))
+        return pool
+
+
+class TrackedPoolManager(_TrackedPoolManagerMixin, PoolManager):
+    """直连的连接池管理器"""
+
+    def __init__(self, connection_manager: "ConnectionManager", **kwargs):
+        super().__init__(**kwargs)
+        self.connection_manager = connection_manager
+        self.pool_classes_by_scheme = _TRACKED_POOL_CLASSES
+
+
+class TrackedProxyManager(_TrackedPoolManagerMixin, ProxyManager):
+    """经代理的连接池管理器"""
+
+    def __init__(self, connection_manager: "ConnectionManager", **kwargs):
+        super().__init__(**kwargs)
+        self.connection_manager = connection_manager
+        self.pool_classes_by_scheme = _TRACKED_POOL_CLASSES
+
+
+class SharedHTTPAdapter(HTTPAdapter):
+    """进程级共享的 requests 适配器，挂载到各个 Session 上复用连接池"""
+
+    def __init__(self, connection_manager: "ConnectionManager"):
+        self.connection_manager = connection_manager
+        self._proxy_lock = threading.Lock()
+        # 代理地址 -> 最近使用时间，用于回收轮换后不再使用的代理连接池
+        self._proxy_last_used: Dict[str, float] = {}
+        super().__init__(
+            pool_connections=connection_manager.pool_connections,
+            pool_maxsize=connection_manager.pool_maxsize,
+            pool_block=connection_manager.pool_block,
+        )
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+
+        self.poolmanager = TrackedPoolManager(
+            self.connection_manager,
+            num_pools=connections,
+            maxsize=maxsize,
+            block=block,
+            **pool_kwargs,
+        )
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        self._proxy_last_used[proxy] = time.monotonic()
+        manager = self.proxy_manager.get(proxy)
+        if manager is not None:
+            return manager
+
+        with self._proxy_lock:
+            self._evict_proxy_managers(keep=proxy)
+
+            # SOCKS 代理沿用 requests 的默认实现
+            if proxy.lower().startswith("socks"):
+                return super().proxy_manager_for(proxy, **proxy_kwargs)
+
+            manager = self.proxy_manager.get(proxy)
+            if manager is None:
+                manager = self.proxy_manager[proxy] = TrackedProxyManager(
+                    self.connection_manager,
+                    proxy_url=proxy,
+                    proxy_headers=self.proxy_headers(proxy),
+                    num_pools=self._pool_connections,
+                    maxsize=self._pool_maxsize,
+                    block=self._pool_block,
+                    **proxy_kwargs,
+                )
+        return manager
+
+    def _evict_proxy_managers(self, keep: str) -> None:
+        """
+        回收代理连接池：空闲超过 keep-alive 超时的代理，以及超过 pool_connections 个时最久未使用的代理。
+        代理 API 不断返回新地址时，旧代理的空闲连接和统计不会一直保留（调用方持有 _proxy_lock）
+        """
+        now = time.monotonic()
+        timeout = self.connection_manager.keepalive_timeout
+        candidates = sorted(
+            (self._proxy_last_used.get(proxy, 0.0), proxy) for proxy in self.proxy_manager if proxy != keep
+        )
+        excess = len(self.proxy_manager) + 1 - self._pool_connections
+
+        evicted = []
+        for last_used, proxy in candidates:
+            if not (timeout and now - last_used > timeout) and excess <= 0:
+                break
+            manager = self.proxy_manager.pop(proxy)
+            self._proxy_last_used.pop(proxy, None)
+            manager.clear()
+            self.connection_manager.drop_stats(getattr(manager, "proxy", None))
+            evicted.append(proxy)
+            excess -= 1
+
+        if evicted:
+            logger.debug(f"回收 {len(evicted)} 个代理连接池，剩余 {len(self.proxy_manager)} 个")
+
+    def pool_for(self, url: str, proxy: Optional[str] = None):
+        """获取请求 url 时实际使用的 urllib3 连接池（与 Session 发送请求时的选择一致）"""
+        proxies = {urlparse(url).scheme: proxy} if proxy else None
+        pool = self.get_connection(url, proxies)
+        # 与 requests 发送请求时相同的证书校验设置
+        self.cert_verify(pool, url, True, None)
+        return pool
+
+    def close(self) -> None:
+        """连接池由 ConnectionManager 统一管理，Session.close() 不关闭共享连接"""
+
+    def shutdown(self) -> None:
+        """真正关闭所有连接池"""
+        super().close()
+
+
+class ConnectionManager:
+    """进程级 HTTP 连接管理器"""
+
+    # 预热时同时建立连接的最大数量
+    PREWARM_CONCURRENCY = 32
+
+    def __init__(
+        self,
+        pool_connections: int = 100,
+        pool_maxsize: int = 50,
+        pool_block: bool = False,
+        keepalive_timeout: float = 60,
+        keepalive_max_requests: int = 0,
+        host_pool_sizes: Optional[Dict[str, int]] = None
+    ):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.keepalive_timeout = keepalive_timeout
+        self.keepalive_max_requests = keepalive_max_requests
+        self.host_pool_sizes = {host.lower(): size for host, size in (host_pool_sizes or {}).items()}
+
+        self._stats: Dict[str, PoolStats] = {}
+        self._stats_lock = threading.Lock()
+        self.adapter = SharedHTTPAdapter(self)
+
+    @classmethod
+    def from_settings(cls) -> "ConnectionManager":
+        """根据全局配置创建"""
+        return cls(
+            pool_connections=settings.http_pool_connections,
+            pool_maxsize=settings.http_pool_maxsize,
+            pool_block=settings.http_pool_block,
+            keepalive_timeout=settings.http_keepalive_timeout,
+            keepalive_max_requests=settings.http_keepalive_max_requests,
+            host_pool_sizes=settings.http_host_pool_sizes,
+        )
+
+    def mount(self, session: requests.Session) -> requests.Session:
+        """将共享适配器挂载到 Session（Cookie 等会话状态仍由各 Session 独立保存）"""
+        session.mount("http://", self.adapter)
+        session.mount("https://", self.adapter)
+        return session
+
+    def create_session(self) -> requests.Session:
+        """创建使用共享连接池的 Session"""
+        return self.mount(requests.Session())
+
+    def pool_size_for(self, host: str) -> Optional[int]:
+        """获取指定主机的连接数配置"""
+        return self.host_pool_sizes.get((host or "").lower())
+
+    def should_expire(self, conn: Any) -> bool:
+        """判断连接是否超过 keep-alive 限制"""
+        if self.keepalive_timeout:
+            last_used = getattr(conn, "_rm_last_used", None)
+            if last_used is not None and time.monotonic() - last_used > self.keepalive_timeout:
+                return True
+
+        if self.keepalive_max_requests:
+            if getattr(conn, "_rm_request_count", 0) >= self.keepalive_max_requests:
+                return True
+
+        return False
+
+    def stats_for(self, scheme: str, host: str, port: int, proxy: Any = None) -> PoolStats:
+        """获取（或创建）连接池对应的统计对象"""
+        key = f"{scheme}://{host}:{port}"
+        if proxy is not None:
+            key = f"{key}{self._proxy_suffix(proxy)}"
+
+        with self._stats_lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = PoolStats(key)
+            return stats
+
+    def drop_stats(self, proxy: Any) -> None:
+        """删除经指定代理的连接池统计（代理连接池被回收时调用）"""
+        if proxy is None:
+            return
+        suffix = self._proxy_suffix(proxy)
+        with self._stats_lock:
+            for key in [key for key in self._stats if key.endswith(suffix)]:
+                del self._stats[key]
+
+    @staticmethod
+    def _proxy_suffix(proxy: Any) -> str:
+        return f" via {proxy.scheme}://{proxy.host}:{proxy.port}"
+
+    def record(self, stats: PoolStats, hit: bool = False, expired: bool = False) -> None:
+        """记录一次连接获取"""
+        with self._stats_lock:
+            if expired:
+                stats.expired += 1
+                return
+            if hit:
+                stats.hits += 1
+            else:
+                stats.misses += 1
+
+    def prewarm(self, url: str, proxy: Optional[str] = None, connections: int = 1) -> Dict[str, Any]:
+        """
+        预热连接：提前完成 DNS 解析、TCP 连接和 TLS 握手（经代理时包括 CONNECT 隧道），
+        并把连接放回共享连接池，之后发往同一主机的请求直接复用
+
+        Args:
+            url: 请求地址
+            proxy: 代理地址
+            connections: 预热的连接数（同时取出并并发建立）
+
+        Returns:
+            Dict: 预热结果，包含 DNS 解析耗时、建立连接耗时和总耗时（毫秒）
+        """
+        start = time.perf_counter()
+        result = {
+            "success": False,
+            "connections": 0,
+            "dns_time": None,
+            "connect_time": None,
+            "total_time": None,
+            "error_message": None,
+        }
+
+        try:
+            pool = self.adapter.pool_for(url, proxy)
+
+            # 先单独解析一次，得到 DNS 耗时并让系统解析缓存生效
+            dns_start = time.perf_counter()
+            socket.getaddrinfo(pool.host, pool.port, type=socket.SOCK_STREAM)
+            result["dns_time"] = (time.perf_counter() - dns_start) * 1000
+
+            tunnel = getattr(pool, "proxy", None) is not None and connection_requires_http_tunnel(
+                pool.proxy, pool.proxy_config, pool.scheme
+            )
+
+            connect_start = time.perf_counter()
+            warmed = []
+            errors = []
+            try:
+                # 同时取出所有连接再一起放回，保证预热的是不同的连接，而不是反复预热同一个空闲连接
+                for _ in range(max(connections, 1)):
+                    warmed.append(pool._get_conn(timeout=settings.default_timeout))
+                cold = [conn for conn in warmed if getattr(conn, "sock", None) is None]  # 其余为已有可复用的连接
+
+                def open_conn(conn) -> None:
+                    try:
+                        conn.timeout = settings.default_timeout
+                        if tunnel:
+                            pool._prepare_proxy(conn)
+                        else:
+                            conn.connect()
+                        # 预热不计入 keep-alive 复用次数
+                        conn._rm_request_count = 0
+                    except Exception as e:
+                        errors.append(e)
+
+                if len(cold) > 1:
+                    # 并发建立连接，预热耗时不随连接数线性增长
+                    with ThreadPoolExecutor(max_workers=min(len(cold), self.PREWARM_CONCURRENCY)) as executor:
+                        list(executor.map(open_conn, cold))
+                elif cold:
+                    open_conn(cold[0])
+            finally:
+                for conn in warmed:
+                    pool._put_conn(conn)
+            result["connect_time"] = (time.perf_counter() - connect_start) * 1000
+
+            result["connections"] = len(warmed) - len(errors)
+            if errors:
+                raise errors[0]
+            result["success"] = True
+
+        except Exception as e:
+            result["error_message"] = str(e)
+            logger.warning(f"预热连接失败 {url} (代理: {proxy}): {e}")
+
+        result["total_time"] = (time.perf_counter() - start) * 1000
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取连接池统计（汇总和按连接池明细）"""
+        with self._stats_lock:
+            pools = [stats.to_dict() for stats in self._stats.values()]
+
+        hits = sum(pool["hits"] for pool in pools)
+        misses = sum(pool["misses"] for pool in pools)
+        total = hits + misses
+        return {
+            "requests": total,
+            "hits": hits,
+            "misses": misses,
+            "expired": sum(pool["expired"] for pool in pools),
+            "hit_rate": round(hits / total * 100, 2) if total else 0.0,
+            "pool_count": len(pools),
+            "pools": sorted(pools, key=lambda pool: pool["requests"], reverse=True),
+        }
+
+    def reset_stats(self) -> None:
+        """清空统计计数"""
+        with self._stats_lock:
+            for stats in self._stats.values():
+                stats.hits = stats.misses = stats.expired = 0
+
+    def shutdown(self) -> None:
+        """关闭所有连接"""
+        self.adapter.shutdown()
+
+
+# 全局连接管理器实例
+connection_manager = ConnectionManager.from_settings()
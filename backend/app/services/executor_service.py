@@ -2,23 +2,115 @@
 HTTP 请求执行服务
 """
 
+import codecs
 import time
 import json
 import traceback
-from typing import Dict, Optional, Any
+from typing import Callable, Dict, List, NamedTuple, Optional, Any, Tuple
 import requests
 from urllib.parse import urlencode
 
 from ..models.request import HttpRequest
 from ..schemas.request import RequestTestData, RequestTestResult
 from ..config import settings
+from .connection_manager import connection_manager
+from ..utils.condition import ConditionParseError, ResponseContext, compile_condition
+
+
+class BodyDecider(NamedTuple):
+    """
+    流式读取响应体时的判定函数
+
+    decide(状态码, 文本) 返回是否已能得出本次尝试的结论。文本是新读取的一块内容，前面带上之前内容的最后
+    overlap 个字符（跨块出现的关键字也能命中），每块内容只扫描一次，不会重复扫描整个前缀
+    """
+
+    decide: Callable[[int, str], bool]
+    overlap: int = 0
+
+
+class BodyPrefixReader:
+    """
+    流式响应体读取器（同步和异步执行服务共用）
+
+    逐块解码响应体，每块到达后调用判定函数，已能得出结论或达到字节上限时停止读取，只保留已读取的前缀。
+    """
+
+    # 每次读取的字节数
+    CHUNK_SIZE = 8192
+
+    # 提前停止时剩余内容不超过该字节数则读完，使连接可以放回连接池复用
+    DRAIN_LIMIT = 64 * 1024
+
+    def __init__(
+        self,
+        status_code: int,
+        encoding: Optional[str],
+        max_bytes: int,
+        decider: Optional[BodyDecider] = None,
+        content_length: Optional[str] = None,
+        content_encoding: Optional[str] = None
+    ):
+        self.status_code = status_code
+        self.max_bytes = max_bytes
+        self.decider = decider
+        self.bytes_read = 0          # 解码后保留的字节数
+        self.discarded = False       # 是否有超出字节上限而丢弃的内容
+        self.content_length = int(content_length) if content_length and content_length.isdigit() else None
+        # 压缩传输时 Content-Length 是压缩后的长度，不能与解码后的字节数比较
+        self.encoded = (content_encoding or "identity").strip().lower() != "identity"
+        try:
+            self._decoder = codecs.getincrementaldecoder(encoding or "utf-8")(errors="replace")
+        except LookupError:
+            self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._parts: List[str] = []
+        self._tail = ""
+
+    def decided(self, text: str = "") -> bool:
+        """根据新读取的内容判断是否可以停止读取（读取前调用一次可以只根据状态码判定）"""
+        return self.decider is not None and self.decider.decide(self.status_code, self._tail + text)
+
+    def feed(self, chunk: bytes) -> bool:
+        """追加一块数据，返回是否应停止读取"""
+        text = self.append(chunk)
+        stop = self.bytes_read >= self.max_bytes or self.decided(text)
+        if self.decider is not None and self.decider.overlap > 0:
+            self._tail = (self._tail + text)[-self.decider.overlap:]
+        return stop
+
+    def append(self, chunk: bytes) -> str:
+        """追加一块数据（超出字节上限的部分丢弃），不调用判定函数，返回解码后的文本"""
+        room = self.max_bytes - self.bytes_read
+        if len(chunk) > room:
+            chunk = chunk[:room]
+            self.discarded = True
+        self.bytes_read += len(chunk)
+        text = self._decoder.decode(chunk)
+        self._parts.append(text)
+        return text
+
+    @property
+    def complete(self) -> bool:
+        """提前停止时是否已读完整个响应体（压缩传输或未知长度时无法判断，按未读完处理）"""
+        return not self.encoded and self.content_length is not None and self.bytes_read >= self.content_length
+
+    def should_drain(self, wire_bytes: int) -> bool:
+        """提前停止后剩余内容是否足够少，读完后可以复用连接（wire_bytes 为已从连接读取的原始字节数）"""
+        return self.content_length is not None and self.content_length - wire_bytes <= self.DRAIN_LIMIT
+
+    def text(self, complete: bool) -> str:
+        """已读取的响应体文本"""
+        if complete:
+            self._parts.append(self._decoder.decode(b"", final=True))
+        return "".join(self._parts)
 
 
 class ExecutorService:
     """HTTP请求执行服务"""
     
     def __init__(self):
-        self.session = requests.Session()
+        # 使用进程级共享连接池，Cookie等会话状态仍由每个实例独立保存
+        self.session = connection_manager.create_session()
         # 设置默认超时
         self.session.timeout = settings.default_timeout
         
@@ -85,7 +177,9 @@ class ExecutorService:
         self,
         request: HttpRequest,
         override_params: Optional[Dict[str, Any]] = None,
-        proxy: Optional[str] = None
+        proxy: Optional[str] = None,
+        max_body_bytes: int = 0,
+        body_decider: Optional[BodyDecider] = None
     ) -> Dict[str, Any]:
         """
         执行HTTP请求（用于任务调度）
@@ -94,9 +188,12 @@ class ExecutorService:
             request: HTTP请求对象
             override_params: 覆盖参数
             proxy: 代理设置
+            max_body_bytes: 大于0时流式读取响应体，最多读取该字节数
+            body_decider: 流式读取时的判定函数，返回 True 时停止读取剩余内容
             
         Returns:
-            Dict: 执行结果
+            Dict: 执行结果（流式读取时 body_truncated 表示响应体只保存了前缀；
+                  sent_ns 为发出请求时的 time.monotonic_ns()，first_byte_ms 为收到响应头的耗时）
         """
         start_time = time.time()
         result = {
@@ -116,29 +213,16 @@ class ExecutorService:
                 return result
             
             # 准备请求参数
-            url = request.url
-            headers = dict(request.headers) if request.headers else {}
-            params = dict(request.params) if request.params else {}
-            body = request.body
-            
-            # 应用覆盖参数
-            if override_params:
-                if "headers" in override_params:
-                    headers.update(override_params["headers"])
-                if "params" in override_params:
-                    params.update(override_params["params"])
-                if "body" in override_params:
-                    body = override_params["body"]
+            url, headers, params, body = self._merge_override_params(request, override_params)
             
             # 设置代理
             proxies = None
+            proxy = self._normalize_proxy(proxy)
             if proxy:
-                # 确保代理格式正确
-                if not proxy.startswith('http://') and not proxy.startswith('https://'):
-                    proxy = f"http://{proxy}"
                 proxies = {"http": proxy, "https": proxy}
             
-            # 发送请求
+            # 发送请求（始终先只读取响应头，以便测量首字节时间）
+            result["sent_ns"] = time.monotonic_ns()
             response = self._send_request(
                 method=request.method.value,
                 url=url,
@@ -146,8 +230,16 @@ class ExecutorService:
                 params=params,
                 data=body,
                 proxies=proxies,
-                timeout=settings.default_timeout
+                timeout=settings.default_timeout,
+                stream=True
             )
+            result["first_byte_ms"] = (time.monotonic_ns() - result["sent_ns"]) / 1e6
+            
+            if max_body_bytes > 0:
+                response_body, truncated = self._read_body_prefix(response, max_body_bytes, body_decider)
+                result["body_truncated"] = truncated
+            else:
+                response_body = response.text
             
             # 计算响应时间
             response_time = (time.time() - start_time) * 1000
@@ -155,7 +247,7 @@ class ExecutorService:
             result.update({
                 "success": True,
                 "status_code": response.status_code,
-                "response_body": response.text,
+                "response_body": response_body,
                 "response_headers": dict(response.headers),
                 "response_time": response_time
             })
@@ -219,9 +311,101 @@ class ExecutorService:
         params: Optional[Dict[str, str]] = None,
         data: Optional[str] = None,
         proxies: Optional[Dict[str, str]] = None,
-        timeout: int = 30
+        timeout: int = 30,
+        stream: bool = False
     ) -> requests.Response:
-        """发送HTTP请求"""
+        """发送HTTP请求（stream 为 True 时只读取响应头，响应体由调用者读取）"""
+        
+        url, request_data, json_data = self._build_request_args(method, url, headers, params, data)
+        
+        # 发送请求
+        response = self.session.request(
+            method=method.upper(),
+            url=url,
+            headers=headers,
+            data=request_data,
+            json=json_data,
+            proxies=proxies,
+            timeout=timeout,
+            allow_redirects=True,
+            stream=stream
+        )
+        
+        return response
+    
+    @staticmethod
+    def _read_body_prefix(
+        response: requests.Response,
+        max_body_bytes: int,
+        body_decider: Optional[BodyDecider] = None
+    ) -> Tuple[str, bool]:
+        """流式读取响应体前缀，返回 (响应体文本, 是否被截断)"""
+        reader = BodyPrefixReader(
+            response.status_code,
+            response.encoding,
+            max_body_bytes,
+            body_decider,
+            response.headers.get("Content-Length"),
+            response.headers.get("Content-Encoding")
+        )
+        stopped = reader.decided()
+        chunks = response.iter_content(BodyPrefixReader.CHUNK_SIZE)
+        try:
+            if not stopped:
+                for chunk in chunks:
+                    if reader.feed(chunk):
+                        stopped = True
+                        break
+            
+            truncated = stopped and not reader.complete
+            if truncated and reader.should_drain(response.raw.tell()):
+                # 剩余内容很少，读完以便连接放回连接池（字节上限以内的部分仍然保留）
+                for chunk in chunks:
+                    reader.append(chunk)
+                truncated = reader.discarded
+        finally:
+            response.close()
+        
+        return reader.text(complete=not truncated), truncated
+    
+    @staticmethod
+    def _merge_override_params(
+        request: HttpRequest,
+        override_params: Optional[Dict[str, Any]] = None
+    ) -> Tuple[str, Dict[str, str], Dict[str, str], Optional[str]]:
+        """合并请求对象与覆盖参数，返回 (url, headers, params, body)"""
+        url = request.url
+        headers = dict(request.headers) if request.headers else {}
+        params = dict(request.params) if request.params else {}
+        body = request.body
+        
+        # 应用覆盖参数
+        if override_params:
+            if "headers" in override_params:
+                headers.update(override_params["headers"])
+            if "params" in override_params:
+                params.update(override_params["params"])
+            if "body" in override_params:
+                body = override_params["body"]
+        
+        return url, headers, params, body
+    
+    @staticmethod
+    def _normalize_proxy(proxy: Optional[str]) -> Optional[str]:
+        """确保代理格式正确"""
+        if proxy and not proxy.startswith('http://') and not proxy.startswith('https://'):
+            proxy = f"http://{proxy}"
+        return proxy
+    
+    @staticmethod
+    def _build_request_args(
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        params: Optional[Dict[str, str]] = None,
+        data: Optional[str] = None
+    ) -> Tuple[str, Optional[str], Optional[Any]]:
+        """构建完整URL并处理请求体，返回 (url, 表单/文本请求体, JSON请求体)"""
         
         # 构建完整URL
         if params:
@@ -245,25 +429,14 @@ class ExecutorService:
             else:
                 request_data = data
         
-        # 发送请求
-        response = self.session.request(
-            method=method.upper(),
-            url=url,
-            headers=headers,
-            data=request_data,
-            json=json_data,
-            proxies=proxies,
-            timeout=timeout,
-            allow_redirects=True
-        )
-        
-        return response
+        return url, request_data, json_data
     
     def validate_response(
         self, 
         response_body: str, 
         success_condition: Optional[str] = None,
-        stop_condition: Optional[str] = None
+        stop_condition: Optional[str] = None,
+        status_code: Optional[int] = None
     ) -> Dict[str, bool]:
         """
         验证响应内容
@@ -272,43 +445,25 @@ class ExecutorService:
             response_body: 响应体
             success_condition: 成功条件表达式
             stop_condition: 停止条件表达式
+            status_code: 响应状态码（条件中引用 status_code 时使用）
             
         Returns:
             Dict: {"is_success": bool, "should_stop": bool}
         """
         result = {"is_success": False, "should_stop": False}
+        context = ResponseContext(response_body, status_code)
         
-        try:
-            # 简单的条件检查
-            if success_condition:
-                if self._evaluate_condition(response_body, success_condition):
-                    result["is_success"] = True
-            
-            if stop_condition:
-                if self._evaluate_condition(response_body, stop_condition):
-                    result["should_stop"] = True
-                    
-        except Exception:
-            pass  # 忽略条件检查错误
+        if success_condition:
+            result["is_success"] = self._evaluate_condition(context, success_condition)
+        
+        if stop_condition:
+            result["should_stop"] = self._evaluate_condition(context, stop_condition)
         
         return result
     
-    def _evaluate_condition(self, response_body: str, condition: str) -> bool:
-        """评估条件表达式"""
+    def _evaluate_condition(self, context: ResponseContext, condition: str) -> bool:
+        """评估条件表达式（表达式编译结果有缓存）"""
         try:
-            # 简单的字符串包含检查
-            if "contains" in condition:
-                # 格式: response.text.contains('success')
-                match = condition.split("contains")
-                if len(match) == 2:
-                    search_text = match[1].strip().strip("()\"'")
-                    return search_text in response_body
-            
-            # 状态码检查
-            if "status_code" in condition:
-                # 这里需要在调用时传入状态码
-                return True  # 暂时简化处理
-                
-            return False
-        except Exception:
-            return False 
\ No newline at end of file
+            return compile_condition(condition).evaluate(context)
+        except ConditionParseError:
+            return False
\ No newline at end of file
@@ -0,0 +1,196 @@
+"""
+本地模拟时间服务器
+在本机回环地址上同时提供 HTTP（JSON 时间戳和 Date 响应头）和 NTP（UDP）服务，时钟相对本机偏移 offset_ms，
+并在打时间戳前后各模拟 one_way_ms 的单程延迟。用于离线运行时间同步、目标主机时钟校准的测试和基准，
+结果不依赖外网和公共时间服务器
+
+HTTP 路径：
+- /time    美团格式 {"data": 毫秒时间戳, "message": "成功", "status": 0}
+- /taobao  淘宝格式 {"data": {"t": "毫秒时间戳"}, ...}
+- 其他路径返回空的 JSON 对象，所有响应都带 Date 头
+"""
+
+import json
+import socket
+import struct
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Tuple
+
+from loguru import logger
+
+
+NTP_EPOCH_OFFSET = 2208988800  # 1900-01-01 到 1970-01-01 的秒数
+
+
+def to_ntp_timestamp(ns: int) -> bytes:
+    """Unix 纳秒时间戳转为 64 位 NTP 时间戳"""
+    seconds, remainder = divmod(ns, 1_000_000_000)
+    fraction = (remainder << 32) // 1_000_000_000
+    return struct.pack("!II", (seconds + NTP_EPOCH_OFFSET) & 0xFFFFFFFF, fraction)
+
+
+def from_ntp_timestamp(data: bytes) -> int:
+    """64 位 NTP 时间戳转为 Unix 纳秒时间戳"""
+    seconds, fraction = struct.unpack("!II", data)
+    return (seconds - NTP_EPOCH_OFFSET) * 1_000_000_000 + ((fraction * 1_000_000_000) >> 32)
+
+
+class _TimeRequestHandler(BaseHTTPRequestHandler):
+    """模拟时间服务器的 HTTP 处理器"""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server_version = "LocalTimeServer"
+
+    def do_GET(self) -> None:
+        self._reply(with_body=True)
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        self._reply(with_body=True)
+
+    def do_HEAD(self) -> None:
+        self._reply(with_body=False)
+
+    def _reply(self, with_body: bool) -> None:
+        fixture: LocalTimeServer = self.server.fixture
+        fixture.travel()
+        now_ns = fixture.now_ns()
+        timestamp_ms = now_ns // 1_000_000
+
+        path = self.path.split("?", 1)[0]
+        if path == "/time":
+            payload = {"data": timestamp_ms, "message": "成功", "status": 0}
+        elif path == "/taobao":
+            payload = {"api": "mtop.common.getTimestamp", "v": "*", "ret": ["SUCCESS::接口调用成功"], "data": {"t": str(timestamp_ms)}}
+        else:
+            payload = {}
+        body = json.dumps(payload).encode()
+
+        self.send_response_only(200)
+        self.send_header("Server", self.server_version)
+        self.send_header("Date", formatdate(now_ns / 1e9, usegmt=True))
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        fixture.travel()
+        self.end_headers()
+        if with_body:
+            self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+class LocalTimeServer:
+    """本地模拟时间服务器"""
+
+    def __init__(self, offset_ms: float = 0.0, one_way_ms: float = 0.0, host: str = "127.0.0.1"):
+        """
+        Args:
+            offset_ms: 模拟时钟相对本机时钟的偏移（毫秒）
+            one_way_ms: 模拟的单程延迟（毫秒），请求到达和响应返回各等待一次
+            host: 监听地址
+        """
+        self.offset_ms = offset_ms
+        self.one_way_ms = one_way_ms
+        self.host = host
+        self._lock = threading.Lock()
+        self._http: Optional[ThreadingHTTPServer] = None
+        self._udp: Optional[socket.socket] = None
+        self._stop_event = threading.Event()
+
+    def now_ns(self) -> int:
+        """模拟时钟的当前时间（Unix 纳秒）"""
+        return time.time_ns() + round(self.offset_ms * 1_000_000)
+
+    def travel(self) -> None:
+        """模拟一次单程延迟"""
+        if self.one_way_ms > 0:
+            time.sleep(self.one_way_ms / 1000)
+
+    @property
+    def running(self) -> bool:
+        return self._http is not None
+
+    @property
+    def base_url(self) -> str:
+        self.start()
+        return f"http://{self.host}:{self._http.server_port}"
+
+    @property
+    def json_url(self) -> str:
+        """美团格式的 JSON 时间接口地址"""
+        return f"{self.base_url}/time"
+
+    @property
+    def ntp_address(self) -> Tuple[str, int]:
+        self.start()
+        return self.host, self._udp.getsockname()[1]
+
+    def start(self) -> "LocalTimeServer":
+        """启动 HTTP 和 NTP 服务（已启动时直接返回）"""
+        with self._lock:
+            if self._http is not None:
+                return self
+
+            self._stop_event.clear()
+            http_server = ThreadingHTTPServer((self.host, 0), _TimeRequestHandler)
+            http_server.daemon_threads = True
+            http_server.fixture = self
+            threading.Thread(target=http_server.serve_forever, name="local-time-http", daemon=True).start()
+
+            udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            udp.bind((self.host, 0))
+            udp.settimeout(0.2)
+            threading.Thread(target=self._serve_ntp, args=(udp,), name="local-time-ntp", daemon=True).start()
+
+            self._http = http_server
+            self._udp = udp
+            logger.debug(f"本地模拟时间服务器已启动: http://{self.host}:{http_server.server_port}，NTP 端口 {udp.getsockname()[1]}")
+            return self
+
+    def stop(self) -> None:
+        """停止服务"""
+        with self._lock:
+            self._stop_event.set()
+            if self._http is not None:
+                self._http.shutdown()
+                self._http.server_close()
+                self._http = None
+            if self._udp is not None:
+                self._udp.close()
+                self._udp = None
+
+    def _serve_ntp(self, udp: socket.socket) -> None:
+        """NTP 服务：按 RFC 5905 服务器模式应答客户端请求"""
+        while not self._stop_event.is_set():
+            try:
+                request, address = udp.recvfrom(512)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            if len(request) < 48:
+                continue
+
+            self.travel()
+            received = to_ntp_timestamp(self.now_ns())
+            # LI=0, VN=4, Mode=4（服务器），层级 1，参考标识 LOCL
+            header = struct.pack("!BBbb", 0x24, 1, request[2], -20) + bytes(8) + b"LOCL"
+            packet = header + received + request[40:48] + received + to_ntp_timestamp(self.now_ns())
+            self.travel()
+            try:
+                udp.sendto(packet, address)
+            except OSError:
+                return
+
+    def __enter__(self) -> "LocalTimeServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
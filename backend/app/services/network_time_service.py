@@ -1,124 +1,348 @@
 """
 网络时间服务
 基于 demo.py 的 get_network_time 方法实现
+
+同步时参考 NTP 的做法：在同一个连接上连续采样 K 次，用 perf_counter_ns 测量每次往返时间。
+每个样本给出时间差的一个区间（时间源打时间戳的时刻一定落在请求发出和收到响应之间），
+多个样本区间的交集就是时间差的估计值和置信区间；再用历次同步结果拟合本地时钟漂移。
+时间源（JSON 时间接口、HTTP Date 头、NTP、本地模拟服务器）由 TimeSourceRegistry 管理，
+每次同步采样全部可用的时间源，选用误差最小的结果
+
+同步由后台线程按固定间隔进行，结果整体替换为一个不可变的 ClockEstimate，
+读取网络时间只取一次引用再做本地计算，不加锁，也不会发起网络请求
 """
 
-import requests
+import threading
+import time
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import requests
 from loguru import logger
 
+from ..config import settings
+from .time_sources import (
+    DEFAULT_TIME_SOURCES, ClockSample, TimeSource, TimeSourceRegistry, combine_samples
+)
+
+
+class ClockUncertaintyError(RuntimeError):
+    """网络时间误差超过任务允许的上限"""
+
+
+class ClockEstimate(NamedTuple):
+    """一次同步的时间差估计（网络时间 - 本地时间）"""
+    offset_s: float             # 同步时刻的时间差（秒）
+    uncertainty_ms: float       # 同步时刻的误差上限（毫秒），真实时间差在 offset ± uncertainty 之内
+    rtt_ms: float               # 最小往返时间（毫秒）
+    samples: int                # 参与估计的样本数
+    total_samples: int          # 有效样本总数
+    drift_ppm: float            # 本地时钟相对网络时间的漂移（百万分之一），未能估计时为 0
+    drift_error_ppm: float      # 漂移的误差上限（百万分之一）
+    source: str                 # 时间源名称
+    synced_at: datetime         # 同步时的本地时间
+    synced_ns: int              # 同步时的 time.monotonic_ns()
+
+    def offset_at(self, now_ns: int) -> float:
+        """按漂移外推 now_ns（time.monotonic_ns()）时刻的时间差（秒）"""
+        return self.offset_s + self.drift_ppm * 1e-6 * (now_ns - self.synced_ns) / 1e9
+
+    def uncertainty_at(self, now_ns: int) -> float:
+        """now_ns 时刻的误差上限（毫秒），随距离同步的时间按漂移误差增长"""
+        return self.uncertainty_ms + self.drift_error_ppm * 1e-3 * max(now_ns - self.synced_ns, 0) / 1e9
+
 
 class NetworkTimeService:
     """网络时间服务类"""
-    
+
+    # 漂移拟合至少需要的历史跨度（秒），间隔太短时误差区间远大于漂移本身
+    MIN_DRIFT_SPAN = 60.0
+
     def __init__(self):
-        # 美团时间API - 参考demo.py
-        self.time_apis = [
-            "https://cube.meituan.com/ipromotion/cube/toc/component/base/getServerCurrentTime",
-            "http://api.m.taobao.com/rest/api3.do?api=mtop.common.getTimestamp"  # 备用API
-        ]
-        self._cached_time_diff = None  # 缓存的时间差（网络时间 - 本地时间）
-        self._last_sync_time = None    # 上次同步时间
-        self._sync_interval = 300      # 同步间隔（秒）
-    
+        # 未配置 time_sync.sources 时使用美团、淘宝时间API - 参考demo.py
+        self.sources = TimeSourceRegistry(settings.time_sync_sources or DEFAULT_TIME_SOURCES)
+        self._sync_interval = settings.time_sync_interval  # 同步间隔（秒）
+        self._estimate: Optional[ClockEstimate] = None  # 最近一次同步结果，只整体替换
+        self._history: List[ClockEstimate] = []  # 最近几次同步结果，用于拟合漂移
+        self._sync_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._unsynced_warned = False
+
+    def start(self) -> None:
+        """启动后台同步线程（立即进行首次同步）"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._discipline_loop, name="clock-discipline", daemon=True)
+        self._thread.start()
+        logger.info(f"网络时间后台同步已启动，同步间隔 {self._sync_interval} 秒")
+
+    def stop(self) -> None:
+        """停止后台同步线程"""
+        self._stop_event.set()
+        self._wake_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=settings.time_sync_timeout * 2)
+            self._thread = None
+
+    def request_sync(self) -> None:
+        """让后台线程立即同步一次（不等待结果）"""
+        self._wake_event.set()
+
+    def _discipline_loop(self) -> None:
+        """按同步间隔持续同步，失败时从 time_sync_retry_interval 开始指数退避重试"""
+        failures = 0
+        while not self._stop_event.is_set():
+            try:
+                estimate = self.sync_clock()
+            except Exception as e:
+                logger.error(f"时间同步失败: {e}")
+                estimate = None
+
+            if estimate is None:
+                failures += 1
+                delay = min(settings.time_sync_retry_interval * 2 ** (failures - 1), self._sync_interval)
+            else:
+                failures = 0
+                delay = self._sync_interval
+
+            self._wake_event.wait(delay)
+            self._wake_event.clear()
+
     def get_network_time(self) -> datetime:
         """
         获取网络时间 - 基于demo.py的get_network_time方法
-        返回包含毫秒的精确时间
+        向当前表现最好的时间源请求一次，返回包含毫秒的精确时间
         """
-        for api_url in self.time_apis:
+        for source in self.sources.candidates():
             try:
-                logger.debug(f"正在获取网络时间: {api_url}")
-                
-                response = requests.get(
-                    api_url,
-                    timeout=5,
-                    headers={
-                        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-                    }
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    
-                    # 美团API格式: {"data":1749736490539,"message":"成功","status":0}
-                    if "data" in data and data.get("status") == 0:
-                        timestamp_ms = int(data["data"])
-                        network_time = datetime.fromtimestamp(timestamp_ms / 1000.0)
-                        logger.info(f"网络时间获取成功: {network_time.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]}")
-                        return network_time
-                    
-                    # 淘宝API格式（如果需要的话）
-                    elif "data" in data and "t" in data["data"]:
-                        timestamp_ms = int(data["data"]["t"])
-                        network_time = datetime.fromtimestamp(timestamp_ms / 1000.0)
-                        logger.info(f"网络时间获取成功: {network_time.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]}")
-                        return network_time
-                        
-                logger.warning(f"网络时间API返回格式不符合预期: {data}")
-                        
-            except requests.exceptions.RequestException as e:
-                logger.warning(f"网络时间API请求失败 {api_url}: {e}")
-            except Exception as e:
-                logger.warning(f"解析网络时间失败 {api_url}: {e}")
-        
-        # 所有API都失败，使用本地时间
-        logger.error("所有网络时间API都失败，使用本地时间")
+                logger.debug(f"正在获取网络时间: {source.name}")
+                samples = source.collect(1, settings.time_sync_timeout)
+            except (requests.exceptions.RequestException, OSError) as e:
+                logger.warning(f"网络时间请求失败 {source.name}: {e}")
+                continue
+
+            if samples:
+                offset_ns = (samples[0].lower_ns + samples[0].upper_ns) // 2
+                network_time = datetime.now() + timedelta(microseconds=offset_ns / 1000)
+                logger.info(f"网络时间获取成功: {network_time.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]}")
+                return network_time
+
+            logger.warning(f"时间源没有返回可用的时间: {source.name}")
+
+        # 所有时间源都失败，使用本地时间
+        logger.error("所有时间源都失败，使用本地时间")
         return datetime.now()
-    
+
     def sync_time_diff(self) -> Optional[float]:
         """
         同步时间差（网络时间 - 本地时间）
         返回时间差（秒，包含毫秒精度）
         """
         try:
-            local_time_before = datetime.now()
-            network_time = self.get_network_time()
-            local_time_after = datetime.now()
-            
-            # 使用请求前后的平均本地时间来减少网络延迟影响
-            avg_local_time = local_time_before + (local_time_after - local_time_before) / 2
-            
-            # 计算时间差（秒）
-            time_diff = (network_time - avg_local_time).total_seconds()
-            
-            self._cached_time_diff = time_diff
-            self._last_sync_time = datetime.now()
-            
-            logger.info(f"时间同步完成: 网络时间差为 {time_diff:.3f} 秒")
-            return time_diff
-            
+            estimate = self.sync_clock()
+            if estimate is None:
+                return None
+            return estimate.offset_s
+
         except Exception as e:
             logger.error(f"时间同步失败: {e}")
             return None
-    
+
+    def sync_clock(self) -> Optional[ClockEstimate]:
+        """依次采样全部可用的时间源，使用误差最小的结果，全部失败时返回 None"""
+        with self._sync_lock:
+            best: Optional[Tuple[TimeSource, int, int, int, List[ClockSample]]] = None
+            for source in self.sources.candidates():
+                result = self._sample_source(source)
+                if result is not None and (best is None or result[2] - result[1] < best[2] - best[1]):
+                    best = (source,) + result
+
+            if best is None:
+                logger.error("所有时间源同步失败")
+                return None
+
+            source, lower_ns, upper_ns, used, samples = best
+            estimate = self._estimate_offset(lower_ns, upper_ns, used, samples, source.name)
+            self._publish(estimate)
+            logger.info(
+                f"时间同步完成: 网络时间差为 {estimate.offset_s:.4f} 秒，误差 ±{estimate.uncertainty_ms:.2f}ms，"
+                f"最小往返 {estimate.rtt_ms:.2f}ms，样本 {estimate.samples}/{estimate.total_samples}，"
+                f"漂移 {estimate.drift_ppm:.1f}ppm，时间源 {estimate.source}"
+            )
+            return estimate
+
+    def _sample_source(self, source: TimeSource) -> Optional[Tuple[int, int, int, List[ClockSample]]]:
+        """采样一个时间源并记录统计，返回 (lower_ns, upper_ns, 参与的样本数, 样本)，失败时返回 None"""
+        try:
+            samples = source.collect(
+                settings.time_sync_samples, settings.time_sync_timeout, settings.time_sync_sample_interval_ms
+            )
+        except (requests.exceptions.RequestException, OSError) as e:
+            logger.warning(f"时间源请求失败 {source.name}: {e}")
+            source.stats.record_failure(str(e))
+            return None
+
+        if not samples:
+            logger.warning(f"时间源没有返回有效样本: {source.name}")
+            source.stats.record_failure("没有有效样本")
+            return None
+
+        lower_ns, upper_ns, used = combine_samples(samples, max(settings.time_sync_best_samples, 1))
+        source.stats.record_success(min(s.rtt_ns for s in samples) / 1e6, (upper_ns - lower_ns) / 2 / 1e6)
+        return lower_ns, upper_ns, used, samples
+
+    def _estimate_offset(
+        self,
+        lower_ns: int,
+        upper_ns: int,
+        used: int,
+        samples: List[ClockSample],
+        source: str
+    ) -> ClockEstimate:
+        """以样本区间的交集作为时间差及误差，并拟合漂移"""
+        now_ns = time.monotonic_ns()
+        offset_s = (lower_ns + upper_ns) / 2 / 1e9
+        uncertainty_ms = (upper_ns - lower_ns) / 2 / 1e6
+        drift_ppm, drift_error_ppm = self._estimate_drift(now_ns, offset_s, uncertainty_ms)
+
+        return ClockEstimate(
+            offset_s=offset_s,
+            uncertainty_ms=uncertainty_ms,
+            rtt_ms=min(s.rtt_ns for s in samples) / 1e6,
+            samples=used,
+            total_samples=len(samples),
+            drift_ppm=drift_ppm,
+            drift_error_ppm=drift_error_ppm,
+            source=source,
+            synced_at=datetime.now(),
+            synced_ns=now_ns
+        )
+
+    def _estimate_drift(self, now_ns: int, offset_s: float, uncertainty_ms: float) -> Tuple[float, float]:
+        """
+        用历次同步的时间差拟合漂移（最小二乘斜率）
+
+        新的时间差超出按历史外推的误差范围时，说明本地时钟被调整过，丢弃历史重新开始
+        """
+        assumed_ppm = settings.time_sync_assumed_drift_ppm
+        previous = self._estimate
+        if previous is not None:
+            predicted_s = previous.offset_at(now_ns)
+            tolerance_ms = previous.uncertainty_at(now_ns) + uncertainty_ms
+            if abs(offset_s - predicted_s) * 1000 > tolerance_ms:
+                logger.info(f"本地时钟偏离预测 {(offset_s - predicted_s) * 1000:.2f}ms，重新估计漂移")
+                self._history = []
+
+        points = [(e.synced_ns / 1e9, e.offset_s, e.uncertainty_ms) for e in self._history]
+        points.append((now_ns / 1e9, offset_s, uncertainty_ms))
+        span = points[-1][0] - points[0][0]
+        if len(points) < 2 or span < self.MIN_DRIFT_SPAN:
+            return 0.0, assumed_ppm
+
+        mean_t = sum(p[0] for p in points) / len(points)
+        mean_o = sum(p[1] for p in points) / len(points)
+        slope = (
+            sum((p[0] - mean_t) * (p[1] - mean_o) for p in points)
+            / sum((p[0] - mean_t) ** 2 for p in points)
+        )
+        # 首尾两次同步的误差之和除以跨度，是斜率误差的保守上限
+        error_ppm = (points[0][2] + points[-1][2]) / 1000 / span * 1e6
+        return slope * 1e6, min(error_ppm, assumed_ppm)
+
+    def _publish(self, estimate: ClockEstimate) -> None:
+        """保存同步结果"""
+        self._history.append(estimate)
+        del self._history[:-max(settings.time_sync_history_size, 1)]
+        self._estimate = estimate
+
+    def sync_until_accurate(self, max_uncertainty_ms: float) -> Optional[ClockEstimate]:
+        """
+        同步时间，误差超过 max_uncertainty_ms 时重新同步（最多 time_sync_resync_attempts 次），
+        返回误差最小的一次同步结果
+        """
+        best: Optional[ClockEstimate] = None
+        for attempt in range(1 + max(settings.time_sync_resync_attempts, 0)):
+            if attempt > 0:
+                logger.info(f"网络时间误差 ±{best.uncertainty_ms:.2f}ms 超过上限 {max_uncertainty_ms}ms，重新同步")
+            estimate = self.sync_clock()
+            if estimate is not None and (best is None or estimate.uncertainty_ms < best.uncertainty_ms):
+                best = estimate
+            if best is None or best.uncertainty_ms <= max_uncertainty_ms:
+                break
+        return best
+
+    def get_source_stats(self) -> List[Dict[str, Any]]:
+        """各时间源的统计，按表现排序"""
+        return self.sources.get_stats()
+
+    def get_clock_estimate(self) -> Optional[ClockEstimate]:
+        """获取最近一次同步的时间差估计，尚未同步成功时返回 None"""
+        return self._estimate
+
+    def get_uncertainty_ms(self) -> Optional[float]:
+        """当前网络时间的误差上限（毫秒），尚未同步成功时返回 None"""
+        estimate = self._estimate
+        if estimate is None:
+            return None
+        return estimate.uncertainty_at(time.monotonic_ns())
+
+    def get_clock_status(self) -> Dict[str, Any]:
+        """时钟同步状态，用于接口展示"""
+        estimate = self._estimate
+        if estimate is None:
+            return {"synced": False}
+
+        now_ns = time.monotonic_ns()
+        return {
+            "synced": True,
+            "offset_ms": round(estimate.offset_at(now_ns) * 1000, 3),
+            "uncertainty_ms": round(estimate.uncertainty_at(now_ns), 3),
+            "sync_uncertainty_ms": round(estimate.uncertainty_ms, 3),
+            "rtt_ms": round(estimate.rtt_ms, 3),
+            "drift_ppm": round(estimate.drift_ppm, 3),
+            "drift_error_ppm": round(estimate.drift_error_ppm, 3),
+            "samples": estimate.samples,
+            "total_samples": estimate.total_samples,
+            "source": estimate.source,
+            "synced_at": self.format_time_with_ms(estimate.synced_at),
+            "age_seconds": round((now_ns - estimate.synced_ns) / 1e9, 3)
+        }
+
+    def ensure_accuracy(self, max_uncertainty_ms: float = 0) -> Optional[ClockEstimate]:
+        """
+        开始等待前确认时间差可用：尚未同步成功，或当前误差超过 max_uncertainty_ms（大于0时）才在调用线程中同步，
+        否则直接使用后台线程的同步结果
+        """
+        estimate = self._estimate
+        if estimate is not None:
+            if max_uncertainty_ms <= 0 or estimate.uncertainty_at(time.monotonic_ns()) <= max_uncertainty_ms:
+                return estimate
+        if max_uncertainty_ms <= 0:
+            return self.sync_clock()
+        return self.sync_until_accurate(max_uncertainty_ms)
+
     def get_current_network_time(self) -> datetime:
         """
-        获取当前网络时间（使用缓存的时间差进行计算）
-        这比每次都请求API更高效
+        获取当前网络时间（使用后台同步的时间差进行计算）
+        只读取一次同步结果，不会发起网络请求；尚未同步成功时返回本地时间
         """
-        # 检查是否需要重新同步
+        estimate = self._estimate
         now = datetime.now()
-        if (self._cached_time_diff is None or 
-            self._last_sync_time is None or 
-            (now - self._last_sync_time).total_seconds() > self._sync_interval):
-            
-            logger.debug("时间差缓存过期，重新同步...")
-            self.sync_time_diff()
-        
-        # 使用缓存的时间差计算网络时间
-        if self._cached_time_diff is not None:
-            network_time = now + timedelta(seconds=self._cached_time_diff)
-            return network_time
-        else:
-            # 同步失败，直接请求网络时间
-            return self.get_network_time()
-    
+        if estimate is not None:
+            return now + timedelta(seconds=estimate.offset_at(time.monotonic_ns()))
+
+        if not self._unsynced_warned:
+            self._unsynced_warned = True
+            logger.warning("网络时间尚未同步成功，暂时使用本地时间")
+        return now
+
     def format_time_with_ms(self, dt: datetime) -> str:
         """格式化时间，包含毫秒"""
         return dt.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
-    
+
     def parse_time_with_ms(self, time_str: str) -> datetime:
         """解析包含毫秒的时间字符串"""
         try:
@@ -129,25 +353,26 @@ class NetworkTimeService:
                 '%H:%M:%S.%f',           # 只有时间含毫秒
                 '%H:%M:%S',              # 只有时间不含毫秒
             ]
-            
+
             for fmt in formats:
                 try:
                     return datetime.strptime(time_str, fmt)
                 except ValueError:
                     continue
-            
+
             raise ValueError(f"无法解析时间格式: {time_str}")
-            
+
         except Exception as e:
             logger.error(f"时间解析失败: {e}")
             raise
-    
+
     def get_time_diff(self) -> float:
-        """获取当前的时间差"""
-        if self._cached_time_diff is None:
-            self.sync_time_diff()
-        return self._cached_time_diff or 0.0
+        """获取当前的时间差（尚未同步成功时为0）"""
+        estimate = self._estimate
+        if estimate is not None:
+            return estimate.offset_at(time.monotonic_ns())
+        return 0.0
 
 
 # 全局网络时间服务实例
-network_time_service = NetworkTimeService() 
\ No newline at end of file
+network_time_service = NetworkTimeService()
@@ -0,0 +1,187 @@
+"""
+精确定时服务
+将网络时间目标一次性换算为单调时钟截止时间，先粗略休眠，最后几毫秒自旋让出，
+使等待在目标时刻后的百微秒量级内结束，并测量每个线程实际的释放误差
+"""
+
+import asyncio
+import gc
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator, Optional
+
+from loguru import logger
+
+from ..config import settings
+from .network_time_service import network_time_service
+
+
+class ReleaseResult:
+    """一次等待的释放结果"""
+
+    def __init__(self, deadline_ns: int, released_ns: int, stopped: bool = False):
+        self.deadline_ns = deadline_ns
+        self.released_ns = released_ns
+        self.stopped = stopped  # 等待期间被停止
+
+    @property
+    def error_us(self) -> float:
+        """释放误差（微秒），正数表示晚于目标时刻"""
+        return (self.released_ns - self.deadline_ns) / 1000
+
+    def __repr__(self) -> str:
+        return f"<ReleaseResult(error_us={self.error_us:.1f}, stopped={self.stopped})>"
+
+
+class PreciseTimer:
+    """
+    精确定时器
+
+    单调时钟不受系统时间调整影响，截止时间只在开始等待时根据网络时间换算一次，
+    之后的比较都是整数纳秒运算，不再构造 datetime/timedelta。
+    """
+
+    # 粗略休眠阶段每次最多休眠的秒数（便于及时响应停止和打印等待日志）
+    COARSE_SLICE = 1.0
+
+    # 粗略休眠阶段打印等待信息的间隔（秒）
+    LOG_INTERVAL = 5.0
+
+    # 自旋阶段距离截止时间超过该值（纳秒）时仍做短休眠，减少多个线程同时自旋争抢 GIL
+    YIELD_WINDOW_NS = 200_000
+
+    # 协程版本的短休眠窗口（纳秒）：事件循环定时器依赖 epoll/select，只有毫秒级精度
+    ASYNC_YIELD_WINDOW_NS = 2_000_000
+
+    _gc_lock = threading.Lock()
+    _gc_paused = 0  # 正在自旋的等待数，大于0时暂停垃圾回收
+    _gc_was_enabled = True
+
+    def __init__(self, spin_threshold_ms: Optional[float] = None):
+        """
+        Args:
+            spin_threshold_ms: 距离截止时间多少毫秒时从休眠切换为自旋，默认使用全局配置
+        """
+        if spin_threshold_ms is None:
+            spin_threshold_ms = settings.timer_spin_threshold_ms
+        self.spin_threshold_ns = int(spin_threshold_ms * 1_000_000)
+
+    @staticmethod
+    def deadline_from_network_time(target_time: datetime) -> int:
+        """将网络时间目标换算为 time.monotonic_ns() 截止时间"""
+        current_network_time = network_time_service.get_current_network_time()
+        now_ns = time.monotonic_ns()
+        remaining_ns = int((target_time - current_network_time).total_seconds() * 1_000_000_000)
+        return now_ns + remaining_ns
+
+    def wait_until(
+        self,
+        deadline_ns: int,
+        stop_flag: Optional[threading.Event] = None,
+        name: str = ""
+    ) -> ReleaseResult:
+        """
+        阻塞等待到截止时间
+
+        Args:
+            deadline_ns: time.monotonic_ns() 截止时间
+            stop_flag: 停止标志，设置后立即返回
+            name: 日志中显示的名称
+        """
+        spin_start_ns = deadline_ns - self.spin_threshold_ns
+        last_log_ns = 0
+
+        # 粗略休眠阶段：用 Event.wait 休眠，停止时可以立即唤醒
+        while True:
+            now_ns = time.monotonic_ns()
+            if now_ns >= spin_start_ns:
+                break
+
+            if now_ns - last_log_ns >= self.LOG_INTERVAL * 1_000_000_000:
+                logger.info(f"{name} 等待中... 还需 {(deadline_ns - now_ns) / 1e9:.3f} 秒")
+                last_log_ns = now_ns
+
+            timeout = min((spin_start_ns - now_ns) / 1e9, self.COARSE_SLICE)
+            if stop_flag is not None:
+                if stop_flag.wait(timeout):
+                    return ReleaseResult(deadline_ns, time.monotonic_ns(), stopped=True)
+            else:
+                time.sleep(timeout)
+
+        # 自旋阶段：先短休眠到截止前 YIELD_WINDOW_NS，再用 time.sleep(0) 让出 GIL 自旋到截止时间
+        with self._pause_gc():
+            while True:
+                remaining_ns = deadline_ns - time.monotonic_ns()
+                if remaining_ns <= 0:
+                    break
+                if remaining_ns > self.YIELD_WINDOW_NS:
+                    time.sleep((remaining_ns - self.YIELD_WINDOW_NS) / 1e9)
+                else:
+                    time.sleep(0)
+            released_ns = time.monotonic_ns()
+
+        return ReleaseResult(deadline_ns, released_ns, stopped=bool(stop_flag and stop_flag.is_set()))
+
+    async def wait_until_async(
+        self,
+        deadline_ns: int,
+        stop_flag: Optional[threading.Event] = None,
+        name: str = ""
+    ) -> ReleaseResult:
+        """
+        在事件循环中等待到截止时间
+
+        粗略阶段使用 asyncio.sleep，最后的自旋阶段每轮都 await asyncio.sleep(0) 让出事件循环，
+        错开启动的协程在自旋时不会阻塞已释放协程的连接获取、发送与读取
+        """
+        spin_start_ns = deadline_ns - self.spin_threshold_ns
+        last_log_ns = 0
+
+        while True:
+            now_ns = time.monotonic_ns()
+            if now_ns >= spin_start_ns:
+                break
+            if stop_flag is not None and stop_flag.is_set():
+                return ReleaseResult(deadline_ns, now_ns, stopped=True)
+
+            if now_ns - last_log_ns >= self.LOG_INTERVAL * 1_000_000_000:
+                logger.info(f"{name} 等待中... 还需 {(deadline_ns - now_ns) / 1e9:.3f} 秒")
+                last_log_ns = now_ns
+
+            await asyncio.sleep(min((spin_start_ns - now_ns) / 1e9, self.COARSE_SLICE))
+
+        with self._pause_gc():
+            while True:
+                remaining_ns = deadline_ns - time.monotonic_ns()
+                if remaining_ns <= 0:
+                    break
+                if remaining_ns > self.ASYNC_YIELD_WINDOW_NS:
+                    await asyncio.sleep((remaining_ns - self.ASYNC_YIELD_WINDOW_NS) / 1e9)
+                else:
+                    await asyncio.sleep(0)
+            released_ns = time.monotonic_ns()
+
+        return ReleaseResult(deadline_ns, released_ns, stopped=bool(stop_flag and stop_flag.is_set()))
+
+    @classmethod
+    @contextmanager
+    def _pause_gc(cls) -> Iterator[None]:
+        """自旋期间暂停垃圾回收，避免在释放前后触发回收停顿"""
+        with cls._gc_lock:
+            if cls._gc_paused == 0:
+                cls._gc_was_enabled = gc.isenabled()
+                gc.disable()
+            cls._gc_paused += 1
+        try:
+            yield
+        finally:
+            with cls._gc_lock:
+                cls._gc_paused -= 1
+                if cls._gc_paused == 0 and cls._gc_was_enabled:
+                    gc.enable()
+
+
+# 全局精确定时器实例
+precise_timer = PreciseTimer()
@@ -0,0 +1,761 @@
+"""
+代理池服务
+同一代理API（proxy_url）的代理列表在进程内共享，由后台线程定时刷新并整体替换，
+执行器选择代理时只读取当前列表，不在请求路径上访问代理API。
+每个代理记录请求结果（成功率、延迟EWMA、连续失败次数），按健康度加权选择，失败的代理按指数退避隔离；
+指定时间任务开始前可按目标主机探测代理，探测结果有效期内只选择通过探测的代理。
+代理API可以配置多个备用地址，每个地址独立熔断，全部失败时按指数退避重试
+"""
+
+import bisect
+import enum
+import random
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import requests
+from loguru import logger
+
+from ..config import settings
+from .proxy_probe import ProbeResult, probe_proxies, target_key
+
+
+class ProxyUnavailableError(RuntimeError):
+    """启用了代理但没有可用代理（按 fail/wait 策略不允许直连）"""
+
+
+# 说明代理本身不可用的HTTP状态码（其他状态码来自目标服务器，与代理无关）
+PROXY_FAILURE_STATUS_CODES = frozenset({407})
+
+
+class ProxyHealth:
+    """单个代理的健康统计"""
+
+    __slots__ = ("proxy", "successes", "failures", "consecutive_failures", "ewma_ms", "quarantined_until")
+
+    EWMA_ALPHA = 0.3  # 延迟EWMA的平滑系数
+    MIN_LATENCY_MS = 1.0
+
+    def __init__(self, proxy: str):
+        self.proxy = proxy
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ewma_ms: Optional[float] = None
+        self.quarantined_until = 0.0  # time.monotonic()，0 表示未隔离
+
+    @property
+    def success_rate(self) -> float:
+        """成功率（拉普拉斯平滑，未使用过的代理为 0.5）"""
+        return (self.successes + 1) / (self.successes + self.failures + 2)
+
+    def weight(self, default_ms: float) -> float:
+        """选择权重：成功率的平方除以延迟，没有延迟数据时使用代理池的平均延迟"""
+        latency = self.ewma_ms if self.ewma_ms is not None else default_ms
+        return self.success_rate ** 2 / max(latency, self.MIN_LATENCY_MS)
+
+    def record_success(self, latency_ms: Optional[float]) -> bool:
+        """记录一次成功，返回隔离状态是否发生变化"""
+        self.successes += 1
+        self.consecutive_failures = 0
+        if latency_ms is not None:
+            if self.ewma_ms is None:
+                self.ewma_ms = latency_ms
+            else:
+                self.ewma_ms += self.EWMA_ALPHA * (latency_ms - self.ewma_ms)
+        released = self.quarantined_until > 0
+        self.quarantined_until = 0.0
+        return released
+
+    def record_failure(self, now: float, base_seconds: float, max_seconds: float) -> bool:
+        """记录一次失败并隔离，返回隔离状态是否发生变化"""
+        self.failures += 1
+        if self.quarantined_until > now:
+            # 隔离前已发出的并发请求陆续失败，不再延长隔离
+            return False
+        self.consecutive_failures += 1
+        delay = min(base_seconds * 2 ** min(self.consecutive_failures - 1, 32), max_seconds)
+        self.quarantined_until = now + delay
+        return True
+
+    def to_dict(self, now: float, default_ms: float) -> Dict[str, Any]:
+        """健康统计"""
+        remaining = max(self.quarantined_until - now, 0.0)
+        return {
+            "proxy": self.proxy,
+            "weight": self.weight(default_ms),
+            "success_rate": round(self.success_rate, 4),
+            "ewma_ms": round(self.ewma_ms, 3) if self.ewma_ms is not None else None,
+            "successes": self.successes,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "quarantined": remaining > 0,
+            "quarantine_remaining_seconds": round(remaining, 3),
+        }
+
+
+class ProxyPoolState(str, enum.Enum):
+    """代理池状态"""
+    INITIALIZING = "initializing"  # 尚未完成首次获取
+    HEALTHY = "healthy"            # 最近一次获取成功
+    DEGRADED = "degraded"          # 获取失败，继续使用上次获取的代理并退避重试
+    UNAVAILABLE = "unavailable"    # 获取失败且没有代理，退避重试
+    CIRCUIT_OPEN = "circuit_open"  # 所有代理API均已熔断，等待熔断结束
+
+
+class ProxySource:
+    """代理API地址及其熔断状态"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.fetch_count = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.open_until = 0.0  # time.monotonic()，熔断结束时间
+        self.last_fetch_ms: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def is_open(self, now: float) -> bool:
+        """是否处于熔断中（熔断结束后允许一次试探请求，失败则重新熔断）"""
+        return self.open_until > now
+
+    def record_success(self, elapsed_ms: float) -> None:
+        """记录一次成功获取，关闭熔断"""
+        self.fetch_count += 1
+        self.last_fetch_ms = elapsed_ms
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.last_error = None
+
+    def record_failure(self, elapsed_ms: float, error: str, now: float, threshold: int, open_seconds: float) -> bool:
+        """记录一次失败，连续失败达到阈值时熔断，返回是否进入熔断"""
+        self.fetch_count += 1
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.last_fetch_ms = elapsed_ms
+        self.last_error = error
+        if self.consecutive_failures >= threshold:
+            self.open_until = now + open_seconds
+            return True
+        return False
+
+    def to_dict(self, now: float) -> Dict[str, Any]:
+        """来源统计"""
+        return {
+            "url": self.url,
+            "circuit_open": self.is_open(now),
+            "circuit_remaining_seconds": round(max(self.open_until - now, 0.0), 3),
+            "fetch_count": self.fetch_count,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "last_fetch_ms": round(self.last_fetch_ms, 3) if self.last_fetch_ms is not None else None,
+            "last_error": self.last_error,
+        }
+
+
+class _Ranking(NamedTuple):
+    """代理选择快照：按权重累加的前缀和，选择时二分查找"""
+    proxies: Tuple[str, ...]
+    cumulative: List[float]
+    best: Optional[str]
+    expires_at: float  # 快照过期时间（有代理解除隔离、探测结果过期或到达刷新周期）
+    generation: int  # 生成快照时的健康状态版本
+
+
+class ProxyAdmission(NamedTuple):
+    """按目标主机探测代理的结果"""
+    target: str
+    admitted: frozenset  # 通过探测且延迟在预算内的代理
+    results: Tuple[ProbeResult, ...]
+    expires_at: float  # time.monotonic()
+
+
+class ProxyPool:
+    """单个代理API的代理池"""
+
+    RANKING_TTL = 1.0  # 选择快照的最长使用时间（秒），延迟变化在此周期内体现
+
+    def __init__(
+        self,
+        proxy_url: str,
+        fetch_interval: Optional[float] = None,
+        fetch_timeout: Optional[float] = None,
+        retry_interval: Optional[float] = None,
+        idle_timeout: Optional[float] = None,
+        quarantine_base_seconds: Optional[float] = None,
+        quarantine_max_seconds: Optional[float] = None,
+        fallback_urls: Optional[List[str]] = None
+    ):
+        """
+        Args:
+            proxy_url: 代理API地址
+            fetch_interval: 刷新间隔（秒），默认使用全局配置
+            fetch_timeout: 请求代理API的超时时间（秒）
+            retry_interval: 获取失败后的首次重试间隔（秒），连续失败时翻倍，最多 proxy_retry_max_interval 秒
+            idle_timeout: 没有任务使用后保持刷新的时间（秒）
+            quarantine_base_seconds: 代理失败后的首次隔离时间（秒），连续失败时翻倍
+            quarantine_max_seconds: 最长隔离时间（秒）
+            fallback_urls: 备用代理API地址，主地址失败或熔断时依次使用
+        """
+        self.proxy_url = proxy_url
+        self.fetch_interval = max(float(fetch_interval or settings.proxy_fetch_interval), 1.0)
+        self.fetch_timeout = max(float(fetch_timeout or settings.proxy_fetch_timeout), 1.0)
+        self.retry_interval = max(float(retry_interval or settings.proxy_retry_interval), 1.0)
+        self.idle_timeout = max(float(idle_timeout if idle_timeout is not None else settings.proxy_idle_timeout), 0.0)
+        self.quarantine_base_seconds = float(quarantine_base_seconds or settings.proxy_quarantine_base_seconds)
+        self.quarantine_max_seconds = float(quarantine_max_seconds or settings.proxy_quarantine_max_seconds)
+        self.retry_max_interval = max(float(settings.proxy_retry_max_interval), self.retry_interval)
+        self.circuit_failure_threshold = max(int(settings.proxy_circuit_failure_threshold), 1)
+        self.circuit_open_seconds = max(float(settings.proxy_circuit_open_seconds), 1.0)
+
+        # 代理API地址（主地址在前），按顺序尝试
+        self._sources: List[ProxySource] = [ProxySource(proxy_url)]
+        self.add_fallback_urls(fallback_urls)
+
+        # 代理列表只整体替换，读取方拿到的始终是完整的一份
+        self._proxies: Tuple[str, ...] = ()
+        self._ready = threading.Event()  # 首次获取完成（无论成功与否）
+        self._waiters: List[threading.Event] = []  # wait_available 中等待代理的执行器，替换为非空列表时唤醒
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+        # 代理健康统计，随代理列表一起替换（保留仍在列表中的代理的统计）
+        self._health: Dict[str, ProxyHealth] = {}
+        self._health_lock = threading.Lock()
+        self._generation = 0  # 隔离状态、代理列表或探测结果变化时递增，使选择快照失效
+        self._rankings: Dict[Optional[str], _Ranking] = {}  # 目标主机 -> 选择快照（None 表示不限目标）
+
+        # 目标主机 -> 探测结果 / 进行中的探测
+        self._admissions: Dict[str, ProxyAdmission] = {}
+        self._probe_jobs: Dict[str, threading.Event] = {}
+
+        self.users = 0  # 正在使用的执行器数
+        self.last_used = time.monotonic()
+
+        # 统计
+        self.fetch_count = 0
+        self.fetch_failures = 0
+        self.consecutive_failures = 0
+        self.last_fetch_ms: Optional[float] = None
+        self.total_fetch_ms = 0.0
+        self.last_success_at: Optional[float] = None  # time.monotonic()
+        self.last_error: Optional[str] = None
+        self.last_source: Optional[str] = None  # 最近一次成功获取的代理API
+        self.empty_picks = 0  # 没有代理可选的次数（请求按策略直连、失败或等待）
+        self._state = ProxyPoolState.INITIALIZING
+
+    @property
+    def size(self) -> int:
+        """当前代理数量"""
+        return len(self._proxies)
+
+    @property
+    def age_seconds(self) -> Optional[float]:
+        """距上次成功刷新的秒数，从未成功时为 None"""
+        if self.last_success_at is None:
+            return None
+        return time.monotonic() - self.last_success_at
+
+    def pick(self, rotation: bool = True, target: Optional[str] = None) -> Optional[str]:
+        """
+        按健康度加权选择一个代理（不访问网络），代理池为空时返回 None
+
+        Args:
+            rotation: False 时固定使用当前评分最高的代理
+            target: 目标主机（target_key），该目标有未过期的探测结果时只选择通过探测的代理
+        """
+        ranking = self._rankings.get(target)
+        if ranking is None or ranking.generation != self._generation or time.monotonic() >= ranking.expires_at:
+            ranking = self._rebuild_ranking(target)
+        if not ranking.proxies:
+            self.empty_picks += 1
+            return None
+        if not rotation:
+            return ranking.best
+
+        index = bisect.bisect_right(ranking.cumulative, random.random() * ranking.cumulative[-1])
+        return ranking.proxies[min(index, len(ranking.proxies) - 1)]
+
+    def is_available(self, proxy: str) -> bool:
+        """代理是否仍在列表中且未被隔离"""
+        health = self._health.get(proxy)
+        return health is not None and health.quarantined_until <= time.monotonic()
+
+    def report(self, proxy: Optional[str], success: bool, latency_ms: Optional[float] = None) -> None:
+        """反馈一次请求结果，失败的代理按连续失败次数指数退避隔离"""
+        health = self._health.get(proxy) if proxy else None
+        if health is None:
+            return  # 未使用代理，或代理已不在列表中
+
+        with self._health_lock:
+            if success:
+                changed = health.record_success(latency_ms)
+            else:
+                changed = health.record_failure(
+                    time.monotonic(), self.quarantine_base_seconds, self.quarantine_max_seconds
+                )
+                if changed:
+                    logger.debug(
+                        f"代理 {proxy} 连续失败 {health.consecutive_failures} 次，"
+                        f"隔离 {health.quarantined_until - time.monotonic():.1f} 秒"
+                    )
+            if changed:
+                self._generation += 1
+
+    @staticmethod
+    def is_proxy_success(result: Dict[str, Any]) -> bool:
+        """请求结果是否说明代理可用：传输失败或代理认证失败视为代理故障，目标服务器的其他状态码不算"""
+        return bool(result.get("success")) and result.get("status_code") not in PROXY_FAILURE_STATUS_CODES
+
+    def get_ranking(self) -> List[Dict[str, Any]]:
+        """按选择权重从高到低排列的代理健康统计"""
+        now = time.monotonic()
+        with self._health_lock:
+            healths = list(self._health.values())
+            default_ms = self._default_latency(healths)
+            items = [health.to_dict(now, default_ms) for health in healths]
+
+        # 隔离中的代理排在后面
+        items.sort(key=lambda item: (item["quarantined"], -item["weight"]))
+        for rank, item in enumerate(items, 1):
+            item["rank"] = rank
+            item["weight"] = round(item["weight"] * 1000, 6)  # 每毫秒权重换算为每秒，便于阅读
+        return items
+
+    def _rebuild_ranking(self, target: Optional[str]) -> _Ranking:
+        """根据当前健康统计（和目标主机的探测结果）重建选择快照"""
+        with self._health_lock:
+            now = time.monotonic()
+            generation = self._generation
+            healths = [self._health[proxy] for proxy in self._proxies if proxy in self._health]
+            default_ms = self._default_latency(healths)
+            expires_at = now + self.RANKING_TTL
+
+            admission = self._admissions.get(target) if target else None
+            if admission is not None and admission.expires_at > now and admission.admitted:
+                admitted = [health for health in healths if health.proxy in admission.admitted]
+                if admitted:
+                    healths = admitted
+                    expires_at = min(expires_at, admission.expires_at)
+
+            available = [health for health in healths if health.quarantined_until <= now]
+            quarantined = [health for health in healths if health.quarantined_until > now]
+            if quarantined:
+                expires_at = min(expires_at, min(health.quarantined_until for health in quarantined))
+            if not available and quarantined:
+                # 全部隔离时使用最早解除隔离的代理，避免退回本地IP
+                available = [min(quarantined, key=lambda health: health.quarantined_until)]
+
+            proxies: List[str] = []
+            cumulative: List[float] = []
+            total = 0.0
+            best, best_weight = None, -1.0
+            for health in available:
+                weight = health.weight(default_ms)
+                total += weight
+                proxies.append(health.proxy)
+                cumulative.append(total)
+                if weight > best_weight:
+                    best, best_weight = health.proxy, weight
+
+            ranking = _Ranking(tuple(proxies), cumulative, best, expires_at, generation)
+            self._rankings[target] = ranking
+            return ranking
+
+    @staticmethod
+    def _default_latency(healths: List[ProxyHealth]) -> float:
+        """没有延迟数据的代理按已测代理的平均延迟计算权重"""
+        latencies = [health.ewma_ms for health in healths if health.ewma_ms is not None]
+        return sum(latencies) / len(latencies) if latencies else 1000.0
+
+    def prevalidate(self, target_url: str, timeout: Optional[float] = None) -> Optional[ProxyAdmission]:
+        """
+        探测代理到目标主机的连通性并等待结果，同一目标同时只探测一次，结果在有效期内直接复用
+
+        Args:
+            target_url: 目标URL
+            timeout: 最长等待时间（秒），超时后探测继续在后台完成
+
+        Returns:
+            ProxyAdmission: 探测结果，代理池为空或等待超时时返回 None
+        """
+        target = target_key(target_url)
+        with self._lock:
+            admission = self._admissions.get(target)
+            if admission is not None and admission.expires_at > time.monotonic():
+                return admission
+            if not self._proxies:
+                return None
+
+            job = self._probe_jobs.get(target)
+            if job is None:
+                job = self._probe_jobs[target] = threading.Event()
+                threading.Thread(
+                    target=self._run_probe, args=(target, job), name=f"ProxyProbe-{id(self):x}", daemon=True
+                ).start()
+
+        job.wait(timeout)
+        return self._admissions.get(target) if job.is_set() else None
+
+    def _run_probe(self, target: str, job: threading.Event) -> None:
+        """探测当前所有未隔离的代理，结果反馈到健康统计，延迟在预算内的代理才被采用"""
+        try:
+            now = time.monotonic()
+            candidates = [
+                proxy for proxy in self._proxies
+                if proxy in self._health and self._health[proxy].quarantined_until <= now
+            ] or list(self._proxies)
+
+            started = time.perf_counter()
+            results = probe_proxies(
+                candidates, target, settings.proxy_probe_concurrency, settings.proxy_probe_timeout
+            )
+            budget_ms = settings.proxy_probe_latency_budget_ms
+            admitted = frozenset(
+                result.proxy for result in results
+                if result.success and result.latency_ms is not None and result.latency_ms <= budget_ms
+            )
+
+            for result in results:
+                self.report(result.proxy, result.success, result.latency_ms)
+
+            with self._health_lock:
+                self._admissions[target] = ProxyAdmission(
+                    target, admitted, tuple(results), time.monotonic() + settings.proxy_probe_ttl_seconds
+                )
+                self._generation += 1
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if admitted:
+                logger.info(
+                    f"代理探测完成: {target}，{len(admitted)}/{len(results)} 个代理在 {budget_ms:.0f}ms 内可用，"
+                    f"耗时 {elapsed_ms:.1f}ms"
+                )
+            else:
+                logger.warning(f"代理探测完成: {target}，{len(results)} 个代理均不可用或超出延迟预算，按健康度选择代理")
+        except Exception as e:
+            logger.error(f"代理探测失败: {target}: {e}")
+        finally:
+            with self._lock:
+                self._probe_jobs.pop(target, None)
+            job.set()
+
+    def acquire(self) -> None:
+        """登记一个使用者，后台刷新线程未运行时启动"""
+        with self._lock:
+            self.users += 1
+            self.last_used = time.monotonic()
+            self._ensure_started()
+
+    def release(self) -> None:
+        """注销一个使用者，全部注销且空闲超过 idle_timeout 后停止刷新"""
+        with self._lock:
+            self.users = max(self.users - 1, 0)
+            self.last_used = time.monotonic()
+
+    @property
+    def state(self) -> ProxyPoolState:
+        """代理池状态"""
+        return self._state
+
+    def add_fallback_urls(self, urls: Optional[List[str]]) -> None:
+        """追加备用代理API地址（已存在的地址忽略）"""
+        known = {source.url for source in self._sources}
+        for url in urls or ():
+            url = (url or "").strip()
+            if url and url not in known:
+                self._sources.append(ProxySource(url))
+                known.add(url)
+
+    def wait_available(self, timeout: float, stop_flag: Optional[threading.Event] = None) -> bool:
+        """
+        等待代理池中有代理，返回是否有代理
+
+        刷新线程替换为非空列表时唤醒；stop_flag 为停止令牌（StopToken）时取消令牌也会立即唤醒
+        """
+        wake = threading.Event()
+        with self._lock:
+            if self._proxies:
+                return True
+            self._waiters.append(wake)
+
+        add_listener = getattr(stop_flag, "add_listener", None)
+        if add_listener is not None:
+            add_listener(wake.set)
+        try:
+            if stop_flag is None or not stop_flag.is_set():
+                wake.wait(max(timeout, 0))
+        finally:
+            if add_listener is not None:
+                stop_flag.remove_listener(wake.set)
+            with self._lock:
+                if wake in self._waiters:
+                    self._waiters.remove(wake)
+        return bool(self._proxies)
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """等待首次获取完成，返回代理池是否有可用代理"""
+        if not self._ready.is_set():
+            self._ready.wait(self.fetch_timeout + 1 if timeout is None else timeout)
+        return bool(self._proxies)
+
+    def request_refresh(self) -> None:
+        """立即刷新一次（不等待结果）"""
+        with self._lock:
+            self._ensure_started()
+        self._wake.set()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """停止后台刷新，保留当前代理列表"""
+        with self._lock:
+            thread = self._thread
+            self._stopping = True
+        self._wake.set()
+        if thread:
+            thread.join(timeout)
+
+    def refresh(self) -> bool:
+        """
+        依次从未熔断的代理API获取代理列表，第一个成功的结果整体替换当前列表，全部失败时保留原列表
+        """
+        now = time.monotonic()
+        sources = [source for source in self._sources if not source.is_open(now)]
+        errors: List[str] = []
+        proxies: List[str] = []
+        succeeded: Optional[ProxySource] = None
+
+        for source in sources:
+            started = time.perf_counter()
+            error = None
+            try:
+                proxies = self._fetch(source.url)
+                if not proxies:
+                    error = "代理API没有返回可用代理"
+            except requests.exceptions.RequestException as e:
+                error = f"网络错误: {e}"
+            except Exception as e:
+                error = str(e)
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.fetch_count += 1
+            self.last_fetch_ms = elapsed_ms
+            self.total_fetch_ms += elapsed_ms
+
+            if error is None:
+                source.record_success(elapsed_ms)
+                succeeded = source
+                break
+
+            self.fetch_failures += 1
+            errors.append(f"{source.url}: {error}")
+            if source.record_failure(elapsed_ms, error, time.monotonic(), self.circuit_failure_threshold, self.circuit_open_seconds):
+                logger.warning(f"代理API连续失败 {source.consecutive_failures} 次，熔断 {self.circuit_open_seconds:.0f} 秒: {source.url}")
+
+        if succeeded is not None:
+            with self._health_lock:
+                self._health = {proxy: self._health.get(proxy) or ProxyHealth(proxy) for proxy in proxies}
+                self._proxies = tuple(self._health)
+                self._generation += 1
+            with self._lock:
+                waiters, self._waiters = self._waiters, []
+            for waiter in waiters:
+                waiter.set()
+            self.last_success_at = time.monotonic()
+            self.consecutive_failures = 0
+            self.last_error = None
+            self.last_source = succeeded.url
+            suffix = "" if succeeded is self._sources[0] else "（备用地址）"
+            logger.info(
+                f"代理池已刷新: {succeeded.url}{suffix}，共 {len(proxies)} 个代理，耗时 {succeeded.last_fetch_ms:.1f}ms"
+            )
+        else:
+            self.consecutive_failures += 1
+            self.last_error = "; ".join(errors) or "所有代理API均已熔断"
+
+        self._set_state(self._compute_state(succeeded is not None))
+        self._ready.set()
+        return succeeded is not None
+
+    def next_refresh_delay(self, success: bool) -> float:
+        """下次刷新前的等待时间：成功后按刷新间隔，失败后指数退避（带抖动），全部熔断时等到最早的熔断结束"""
+        if success:
+            return self.fetch_interval
+
+        delay = min(self.retry_interval * 2 ** min(self.consecutive_failures - 1, 16), self.retry_max_interval)
+        delay *= random.uniform(0.8, 1.2)
+        now = time.monotonic()
+        if all(source.is_open(now) for source in self._sources):
+            delay = max(delay, min(source.open_until for source in self._sources) - now)
+        return delay
+
+    def _compute_state(self, success: bool) -> ProxyPoolState:
+        """根据最近一次刷新结果计算代理池状态"""
+        if success:
+            return ProxyPoolState.HEALTHY
+        now = time.monotonic()
+        if all(source.is_open(now) for source in self._sources):
+            return ProxyPoolState.CIRCUIT_OPEN
+        return ProxyPoolState.DEGRADED if self._proxies else ProxyPoolState.UNAVAILABLE
+
+    def _set_state(self, state: ProxyPoolState) -> None:
+        """更新状态，状态变化时记录日志"""
+        previous, self._state = self._state, state
+        if state == previous:
+            return
+
+        if state == ProxyPoolState.HEALTHY:
+            logger.info(f"代理池 {self.proxy_url} 已恢复")
+        elif state == ProxyPoolState.DEGRADED:
+            logger.warning(f"代理池 {self.proxy_url} 获取失败，继续使用原有 {len(self._proxies)} 个代理: {self.last_error}")
+        elif state == ProxyPoolState.UNAVAILABLE:
+            logger.error(f"代理池 {self.proxy_url} 暂无可用代理: {self.last_error}")
+        elif state == ProxyPoolState.CIRCUIT_OPEN:
+            suffix = f"继续使用原有 {len(self._proxies)} 个代理" if self._proxies else "暂无可用代理"
+            logger.error(f"代理池 {self.proxy_url} 的所有代理API均已熔断，{suffix}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """代理池统计"""
+        age = self.age_seconds
+        return {
+            "proxy_url": self.proxy_url,
+            "state": self._state.value,
+            "size": self.size,
+            "quarantined": sum(1 for health in list(self._health.values()) if health.quarantined_until > time.monotonic()),
+            "age_seconds": round(age, 3) if age is not None else None,
+            "refreshing": self._thread is not None,
+            "users": self.users,
+            "fetch_count": self.fetch_count,
+            "fetch_failures": self.fetch_failures,
+            "consecutive_failures": self.consecutive_failures,
+            "last_fetch_ms": round(self.last_fetch_ms, 3) if self.last_fetch_ms is not None else None,
+            "avg_fetch_ms": round(self.total_fetch_ms / self.fetch_count, 3) if self.fetch_count else None,
+            "last_error": self.last_error,
+            "last_source": self.last_source,
+            "empty_picks": self.empty_picks,
+            "fetch_interval": self.fetch_interval,
+            "sources": [source.to_dict(time.monotonic()) for source in list(self._sources)],
+            "probes": {
+                target: {
+                    "admitted": len(admission.admitted),
+                    "probed": len(admission.results),
+                    "expires_in_seconds": round(max(admission.expires_at - time.monotonic(), 0.0), 3),
+                }
+                for target, admission in list(self._admissions.items())
+            },
+        }
+
+    def _fetch(self, url: str) -> List[str]:
+        """请求代理API - 参考demo.py的get_proxy_ips逻辑"""
+        logger.debug(f"正在从 {url} 获取代理列表...")
+        response = requests.get(url, timeout=self.fetch_timeout)
+        data = response.json()
+
+        if not (data.get("success") and data.get("code") == 0):
+            raise ValueError(f"代理API返回错误: {data.get('msg', '未知错误')}")
+
+        proxies = []
+        # 参考demo.py的extract_ip_port方法
+        for item in data.get("data", []):
+            ip = item.get("ip")
+            port = item.get("port")
+            if ip and port:
+                proxies.append(f"http://{ip}:{port}")
+        return proxies
+
+    def _ensure_started(self) -> None:
+        """启动后台刷新线程（调用方持有 self._lock）"""
+        self._stopping = False
+        if self._thread and self._thread.is_alive():
+            return
+        self._wake.clear()
+        self._thread = threading.Thread(target=self._run, name=f"ProxyPoolRefresher-{id(self):x}", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        """后台刷新循环：成功后每 fetch_interval 秒刷新一次，失败后按指数退避重试"""
+        while True:
+            success = self.refresh()
+            self._wake.wait(self.next_refresh_delay(success))
+            self._wake.clear()
+
+            with self._lock:
+                idle = self.users == 0 and time.monotonic() - self.last_used >= self.idle_timeout
+                if self._stopping or idle:
+                    self._thread = None
+                    if idle:
+                        logger.info(f"代理池 {self.proxy_url} 已空闲 {self.idle_timeout:.0f} 秒，停止刷新")
+                    return
+
+
+class ProxyPoolService:
+    """代理池管理：每个代理API一个共享的代理池"""
+
+    def __init__(self):
+        self._pools: Dict[str, ProxyPool] = {}
+        self._lock = threading.Lock()
+
+    def get_pool(self, proxy_config: Optional[Dict[str, Any]]) -> Optional[ProxyPool]:
+        """获取代理配置对应的代理池，未启用代理或没有代理API时返回 None"""
+        if not proxy_config or not proxy_config.get("enabled"):
+            return None
+        proxy_url = (proxy_config.get("proxy_url") or "").strip()
+        if not proxy_url:
+            return None
+
+        fallback_urls = proxy_config.get("fallback_urls") or []
+        pool = self._pools.get(proxy_url)
+        if pool is None:
+            with self._lock:
+                pool = self._pools.get(proxy_url)
+                if pool is None:
+                    pool = self._pools[proxy_url] = ProxyPool(proxy_url, fallback_urls=fallback_urls)
+                    return pool
+        if fallback_urls:
+            pool.add_fallback_urls(fallback_urls)
+        return pool
+
+    def acquire(self, proxy_config: Optional[Dict[str, Any]], wait_timeout: Optional[float] = None) -> Optional[ProxyPool]:
+        """
+        任务开始执行时登记使用代理池，代理池尚未获取过代理时等待首次获取完成
+
+        同一代理API的多个执行器共享一次获取，结束时需调用 ProxyPool.release()
+        """
+        pool = self.get_pool(proxy_config)
+        if pool is None:
+            return None
+
+        pool.acquire()
+        if not pool.wait_ready(wait_timeout):
+            logger.warning(f"代理池 {pool.proxy_url} 暂无可用代理（状态: {pool.state.value}），后台将继续重试获取")
+        return pool
+
+    def refresh(self, proxy_url: Optional[str] = None) -> int:
+        """立即刷新指定（或全部）代理池，返回触发刷新的代理池数量"""
+        pools = [pool for url, pool in list(self._pools.items()) if proxy_url is None or url == proxy_url]
+        for pool in pools:
+            pool.request_refresh()
+        return len(pools)
+
+    def stop(self, timeout: Optional[float] = 5.0) -> None:
+        """停止所有代理池的后台刷新"""
+        for pool in list(self._pools.values()):
+            pool.stop(timeout)
+
+    def get_stats(self) -> List[Dict[str, Any]]:
+        """所有代理池的统计"""
+        return [pool.get_stats() for pool in list(self._pools.values())]
+
+    def get_ranking(self, proxy_url: Optional[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """指定（或全部）代理池的代理健康排名，按代理API分组"""
+        return {
+            url: pool.get_ranking()
+            for url, pool in list(self._pools.items())
+            if proxy_url is None or url == proxy_url
+        }
+
+
+# 全局代理池服务实例
+proxy_pool_service = ProxyPoolService()
@@ -0,0 +1,109 @@
+"""
+代理连通性探测
+并发地通过每个代理向目标主机发送轻量请求：HTTPS 目标发送 CONNECT，HTTP 目标发送 HEAD，
+只读取响应状态行，用于在指定时间任务开始前筛选可用且足够快的代理
+"""
+
+import asyncio
+import base64
+import time
+from typing import List, NamedTuple, Optional, Sequence
+from urllib.parse import unquote, urlsplit
+
+
+class ProbeResult(NamedTuple):
+    """单个代理的探测结果"""
+    proxy: str
+    success: bool
+    latency_ms: Optional[float]
+    status_code: Optional[int] = None
+    error: Optional[str] = None
+
+
+def target_key(url: str) -> str:
+    """目标主机标识: scheme://host:port"""
+    parts = urlsplit(url if "://" in url else f"http://{url}")
+    scheme = parts.scheme or "http"
+    port = parts.port or (443 if scheme == "https" else 80)
+    return f"{scheme}://{parts.hostname}:{port}"
+
+
+def probe_proxies(
+    proxies: Sequence[str],
+    target_url: str,
+    concurrency: int = 50,
+    timeout: float = 3.0
+) -> List[ProbeResult]:
+    """
+    并发探测代理，阻塞直到全部完成（在新的事件循环中运行，不能在事件循环线程中调用）
+
+    Args:
+        proxies: 代理地址列表，如 http://1.2.3.4:8080
+        target_url: 目标URL，只使用其中的协议、主机和端口
+        concurrency: 同时探测的代理数
+        timeout: 单个代理的探测超时（秒）
+    """
+    if not proxies:
+        return []
+    return asyncio.run(probe_proxies_async(proxies, target_url, concurrency, timeout))
+
+
+async def probe_proxies_async(
+    proxies: Sequence[str],
+    target_url: str,
+    concurrency: int = 50,
+    timeout: float = 3.0
+) -> List[ProbeResult]:
+    """并发探测代理，同时进行的探测数不超过 concurrency"""
+    semaphore = asyncio.Semaphore(max(int(concurrency), 1))
+    target = urlsplit(target_key(target_url))
+
+    async def bounded(proxy: str) -> ProbeResult:
+        async with semaphore:
+            return await _probe_one(proxy, target.scheme, target.hostname, target.port, timeout)
+
+    return list(await asyncio.gather(*(bounded(proxy) for proxy in proxies)))
+
+
+async def _probe_one(proxy: str, scheme: str, host: str, port: int, timeout: float) -> ProbeResult:
+    """通过单个代理向目标主机发送 CONNECT/HEAD，读取状态行"""
+    proxy_parts = urlsplit(proxy if "://" in proxy else f"http://{proxy}")
+    if scheme == "https":
+        request_line = f"CONNECT {host}:{port} HTTP/1.1\r\nHost: {host}:{port}\r\n"
+    else:
+        request_line = f"HEAD http://{host}:{port}/ HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n"
+    if proxy_parts.username:
+        credentials = f"{unquote(proxy_parts.username)}:{unquote(proxy_parts.password or '')}"
+        request_line += f"Proxy-Authorization: Basic {base64.b64encode(credentials.encode()).decode()}\r\n"
+
+    started = time.perf_counter()
+    writer = None
+    try:
+        async def exchange() -> int:
+            nonlocal writer
+            reader, writer = await asyncio.open_connection(proxy_parts.hostname, proxy_parts.port or 80)
+            writer.write((request_line + "\r\n").encode("latin-1"))
+            await writer.drain()
+            status_line = await reader.readline()
+            fields = status_line.split()
+            if len(fields) < 2 or not fields[0].startswith(b"HTTP/"):
+                raise ValueError(f"无效的响应: {status_line[:50]!r}")
+            return int(fields[1])
+
+        status_code = await asyncio.wait_for(exchange(), timeout)
+        latency_ms = (time.perf_counter() - started) * 1000
+
+        # CONNECT 只有 2xx 表示隧道建立；HEAD 返回 5xx 或 407 说明代理无法访问目标或需要认证
+        if scheme == "https":
+            success = 200 <= status_code < 300
+        else:
+            success = status_code < 500 and status_code != 407
+        return ProbeResult(proxy, success, latency_ms, status_code, None if success else f"HTTP {status_code}")
+
+    except asyncio.TimeoutError:
+        return ProbeResult(proxy, False, None, error="探测超时")
+    except Exception as e:
+        return ProbeResult(proxy, False, None, error=str(e) or type(e).__name__)
+    finally:
+        if writer is not None:
+            writer.close()
@@ -0,0 +1,184 @@
+"""
+执行记录后台写入服务
+执行器只把执行结果放入队列，后台线程每累计 N 条或每隔 M 毫秒批量插入一次，
+并把本批次的执行统计按任务聚合，每个任务只执行一条 UPDATE；队列有上限，写满后丢弃新记录而不阻塞执行器
+"""
+
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional, Union
+
+from loguru import logger
+from sqlalchemy import insert
+
+from ..config import settings
+from ..database import get_db_context
+from ..models.execution import ExecutionRecord, ExecutionStatusEnum
+from .task_service import TaskService
+
+
+class ExecutionRecordWriter:
+    """执行记录批量写入器"""
+
+    # 队列已满时丢弃记录的日志间隔（秒）
+    DROP_LOG_INTERVAL = 5.0
+
+    def __init__(
+        self,
+        batch_size: Optional[int] = None,
+        flush_ms: Optional[int] = None,
+        queue_size: Optional[int] = None
+    ):
+        """
+        Args:
+            batch_size: 累计多少条记录写入一次，默认使用全局配置
+            flush_ms: 第一条记录入队后最长多少毫秒写入一次，默认使用全局配置
+            queue_size: 队列最多缓存多少条记录，写满后丢弃新记录，默认使用全局配置
+        """
+        self.batch_size = max(int(batch_size or settings.record_batch_size), 1)
+        self.flush_interval = max(float(flush_ms or settings.record_flush_ms), 1.0) / 1000
+        self.queue_size = max(int(queue_size or settings.record_queue_size), self.batch_size)
+
+        # 队列元素: 记录字段字典 / threading.Event（刷新请求）/ None（停止）
+        self._queue: "queue.Queue[Union[Dict[str, Any], threading.Event, None]]" = queue.Queue(self.queue_size)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+        self.written_count = 0  # 已写入的记录数
+        self.dropped_count = 0  # 队列已满或写入失败丢弃的记录数
+        self.flush_count = 0  # 批量写入次数
+        self._last_drop_log = 0.0
+
+    def submit(self, record: Dict[str, Any]) -> None:
+        """
+        提交一条执行记录，立即返回，不等待数据库；数据库写入跟不上导致队列已满时丢弃该记录
+
+        Args:
+            record: ExecutionRecord 的字段字典，必须包含 task_id、status 和 execution_time
+        """
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self._drop(1, "队列已满")
+
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """等待在此之前提交的记录全部写入，返回是否在超时前完成"""
+        if not self._thread or not self._thread.is_alive():
+            return self._queue.empty()
+
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def stop(self, timeout: Optional[float] = 10.0) -> None:
+        """写入队列中剩余的记录并停止后台线程"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if not thread:
+            return
+
+        self._queue.put(None)
+        thread.join(timeout)
+        if thread.is_alive():
+            logger.warning(f"执行记录写入线程未能在 {timeout} 秒内退出，剩余 {self._queue.qsize()} 条")
+        else:
+            logger.info(f"执行记录写入线程已停止，共写入 {self.written_count} 条")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """写入统计"""
+        return {
+            "pending": self._queue.qsize(),
+            "written": self.written_count,
+            "dropped": self.dropped_count,
+            "flushes": self.flush_count,
+            "batch_size": self.batch_size,
+            "flush_ms": self.flush_interval * 1000,
+            "queue_size": self.queue_size,
+        }
+
+    def _ensure_started(self) -> None:
+        """首次提交时启动后台线程（调度服务停止后再次提交会重新启动）"""
+        if self._thread and self._thread.is_alive():
+            return
+
+        with self._lock:
+            if not self._thread or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="ExecutionRecordWriter", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        """后台写入循环"""
+        batch: List[Dict[str, Any]] = []
+        waiters: List[threading.Event] = []
+        flush_at = 0.0
+
+        while True:
+            timeout = max(flush_at - time.monotonic(), 0) if batch else None
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = False  # 到达最长写入间隔
+
+            if isinstance(item, dict):
+                if not batch:
+                    flush_at = time.monotonic() + self.flush_interval
+                batch.append(item)
+                if len(batch) < self.batch_size:
+                    continue
+            elif isinstance(item, threading.Event):
+                waiters.append(item)
+
+            if batch:
+                self._write(batch)
+                batch = []
+            for waiter in waiters:
+                waiter.set()
+            waiters = []
+
+            if item is None:
+                return
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        """批量插入执行记录并累加任务统计（同一事务）"""
+        deltas: Dict[int, Dict[str, Any]] = {}
+        for record in batch:
+            delta = deltas.setdefault(record["task_id"], {
+                "executions": 0,
+                "successes": 0,
+                "failures": 0,
+                "last_execution_at": record["execution_time"],
+            })
+            delta["executions"] += 1
+            if record["status"] == ExecutionStatusEnum.SUCCESS:
+                delta["successes"] += 1
+            else:
+                delta["failures"] += 1
+            delta["last_execution_at"] = max(delta["last_execution_at"], record["execution_time"])
+
+        try:
+            with get_db_context() as db:
+                db.execute(insert(ExecutionRecord), batch)
+                TaskService(db).apply_execution_deltas(deltas)
+            self.written_count += len(batch)
+            self.flush_count += 1
+        except Exception as e:
+            self._drop(len(batch), f"批量写入失败: {e}")
+
+    def _drop(self, count: int, reason: str) -> None:
+        """累计丢弃的记录数，日志按 DROP_LOG_INTERVAL 限频"""
+        with self._lock:
+            self.dropped_count += count
+            now = time.monotonic()
+            if now - self._last_drop_log < self.DROP_LOG_INTERVAL:
+                return
+            self._last_drop_log = now
+        logger.error(f"丢弃 {count} 条执行记录（{reason}），累计丢弃 {self.dropped_count} 条")
+
+
+# 全局执行记录写入器实例
+record_writer = ExecutionRecordWriter()
@@ -3,384 +3,618 @@
 基于 demo.py 的核心逻辑实现
 """
 
+import asyncio
 import threading
 import time
-import random
-import requests
+from collections import deque
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Any
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
 from concurrent.futures import ThreadPoolExecutor, Future
 from sqlalchemy.orm import Session
 
-from ..models.task import Task, TaskStatusEnum, TaskTypeEnum
+from ..models.task import Task, TaskStatusEnum, TaskTypeEnum, ScheduleTypeEnum, ExecutionEngineEnum, ProxyRotationEnum, ProxyUnavailablePolicyEnum, ClockSourceEnum
 from ..models.request import HttpRequest
-from ..models.execution import ExecutionRecord, ExecutionStatusEnum
+from ..models.execution import ExecutionStatusEnum
 from ..services.task_service import TaskService
-from ..services.executor_service import ExecutorService
-from ..services.network_time_service import network_time_service
+from ..services.executor_service import BodyDecider, ExecutorService
+from ..services.connection_manager import connection_manager
+from ..services.async_executor_service import async_engine, is_async_engine_available
+from ..services.network_time_service import network_time_service, ClockUncertaintyError
+from ..services.precise_timer import ReleaseResult
+from ..services.proxy_pool import ProxyPool, ProxyUnavailableError, proxy_pool_service
+from ..services.proxy_probe import target_key
+from ..services.record_writer import record_writer
+from ..services.start_barrier import FirePlan, StartBarrier
+from ..services.task_group import StopToken, TaskGroup
+from ..services.timer_queue import TaskTimerQueue
 from ..database import get_db_context
 from ..config import settings
+from ..utils.condition import Condition, ConditionParseError, ResponseContext, compile_condition, compile_key_message
+from ..utils.cron import next_fire_times
+from ..utils.keyword_matcher import KeywordMatcher
 from loguru import logger
 
 
-class ProxyManager:
-    """代理管理器 - 基于demo.py的代理管理逻辑"""
-    
-    def __init__(self):
-        self.proxy_list: List[str] = []
-        self.last_fetch_time = 0
-        self.fetch_interval = 30  # 30秒获取一次代理
-        self.fetch_failed = False  # 标记代理获取是否失败
-    
-    def get_proxy_list(self, proxy_url: str) -> List[str]:
-        """从代理API获取代理列表 - 参考demo.py的get_proxy_ips逻辑"""
-        try:
-            logger.debug(f"正在从 {proxy_url} 获取代理列表...")
-            response = requests.get(proxy_url, timeout=10)
-            data = response.json()
-            
-            if data.get("success") and data.get("code") == 0:
-                proxies = []
-                # 参考demo.py的extract_ip_port方法
-                for item in data.get("data", []):
-                    ip = item.get("ip")
-                    port = item.get("port")
-                    if ip and port:
-                        proxies.append(f"http://{ip}:{port}")
-                
-                logger.info(f"成功获取 {len(proxies)} 个代理")
-                self.fetch_failed = False
-                return proxies
-            else:
-                logger.error(f"代理API返回错误: {data.get('msg', '未知错误')}")
-                self.fetch_failed = True
-                return []
-                
-        except requests.exceptions.RequestException as e:
-            logger.error(f"获取代理失败，网络错误: {e}")
-            self.fetch_failed = True
-        except Exception as e:
-            logger.error(f"获取代理失败: {e}")
-            self.fetch_failed = True
-        
-        return []
-    
-    def get_random_proxy(self, proxy_config: Dict[str, Any]) -> Optional[str]:
-        """获取随机代理 - 基于demo.py的代理选择逻辑"""
-        if not proxy_config.get("enabled"):
-            logger.debug("代理未启用，使用本地IP")
-            return None
-        
-        current_time = time.time()
-        proxy_url = proxy_config.get("proxy_url")
-        
-        # 参考demo.py的代理刷新逻辑
-        if (not self.proxy_list or 
-            current_time - self.last_fetch_time > self.fetch_interval) and proxy_url and not self.fetch_failed:
-            
-            logger.debug("代理列表为空或需要刷新，尝试获取新的代理列表...")
-            new_proxies = self.get_proxy_list(proxy_url)
-            
-            if new_proxies:
-                self.proxy_list = new_proxies
-                self.last_fetch_time = current_time
-                logger.info(f"代理列表已更新，共 {len(self.proxy_list)} 个代理")
-            else:
-                logger.warning("获取代理列表失败，将使用本地IP")
-                if not self.proxy_list:  # 如果之前没有代理，标记为失败
-                    self.fetch_failed = True
-        
-        # 返回随机代理（如果启用了轮换）
-        if self.proxy_list and proxy_config.get("rotation", True):
-            selected_proxy = random.choice(self.proxy_list)
-            logger.debug(f"选择代理: {selected_proxy}")
-            return selected_proxy
-        elif self.proxy_list and not proxy_config.get("rotation", True):
-            # 如果不轮换，使用第一个代理
-            return self.proxy_list[0]
-        else:
-            if self.fetch_failed:
-                logger.debug("代理获取失败，使用本地IP")
-            else:
-                logger.debug("没有可用代理，使用本地IP")
-        return None
-    
-    def reset_proxy_status(self) -> None:
-        """重置代理状态，用于手动刷新"""
-        self.fetch_failed = False
-        self.last_fetch_time = 0
-        logger.info("代理状态已重置")
-
-
 class TaskRunner:
     """任务执行器"""
     
-    def __init__(self, task_id: int, request_id: int):
+    def __init__(
+        self,
+        task_id: int,
+        request_id: int,
+        start_barrier: Optional[StartBarrier] = None,
+        index: int = 0,
+        stop_token: Optional[StopToken] = None
+    ):
         self.task_id = task_id
         self.request_id = request_id
-        self.executor = ExecutorService()
-        self.proxy_manager = ProxyManager()
-        self.stop_flag = threading.Event()
+        # 同一任务的多个执行器共享启动屏障和停止令牌，index 为执行器在任务中的序号
+        self.start_barrier = start_barrier or StartBarrier(task_id, request_id)
+        self.index = index
+        self._executor: Optional[ExecutorService] = None  # 首次同步发送请求时创建
+        self.proxy_pool: Optional[ProxyPool] = None  # 任务开始执行时登记使用的共享代理池
+        self._proxy_target: Optional[str] = None  # 目标主机，用于按探测结果选择代理
+        self._rotation_policy: Optional[ProxyRotationEnum] = None  # 为空时每次按 rotation 选择
+        self._rotate_every = 0
+        self._sticky_proxy: Optional[str] = None  # 当前执行器固定使用的代理及已使用次数
+        self._sticky_uses = 0
+        self._unavailable_policy = ProxyUnavailablePolicyEnum.DIRECT  # 没有可用代理时的处理策略
+        self._unavailable_wait_seconds = 30.0
+        self._direct_warned = False
+        self.stop_flag = stop_token or StopToken()
+        self._exhausted_reported = False
+        self.running = False  # 是否已开始运行
+        self.in_flight = False  # 是否有正在发送的请求
+        self.warmup_result: Optional[Dict[str, Any]] = None  # 连接预热结果
+        self.release_result: Optional[ReleaseResult] = None  # 开始时间到达时的释放结果
+        self._warmed_proxy: Optional[str] = None  # 预热时选定的代理，首次尝试沿用
+        self._warmed_proxy_pending = False
+        self._start_record_fields: Dict[str, Any] = {}  # 只写入开始后首条执行记录的字段
+        self._fire_plan: Optional[FirePlan] = None  # 开始时间到达后首次请求的发出计划
         
+    @property
+    def executor(self) -> ExecutorService:
+        """同步请求执行服务（协程执行器通过异步执行引擎发送请求，不会创建）"""
+        if self._executor is None:
+            self._executor = ExecutorService()
+        return self._executor
+    
     def run(self) -> None:
         """运行任务"""
-        # 在执行线程中重新获取任务和请求对象，避免跨线程会话问题
+        # 任务和请求由启动屏障统一加载一次，各执行线程只读使用
+        self.running = True
         try:
-            with get_db_context() as db:
-                task = db.query(Task).filter(Task.id == self.task_id).first()
-                request = db.query(HttpRequest).filter(HttpRequest.id == self.request_id).first()
-                
-                if not task or not request:
-                    logger.error(f"任务 {self.task_id} 或请求 {self.request_id} 不存在")
-                    return
-                
-                logger.info(f"[{task.name}] 任务开始执行")
+            loaded = self.start_barrier.load()
+            if not loaded:
+                return
+            
+            task, request = loaded
+            logger.info(f"[{task.name}] 任务开始执行")
+            self._attach_proxy_pool(task, request, proxy_pool_service.acquire(task.proxy_config))
+            
+            # 根据任务类型执行
+            if task.task_type == TaskTypeEnum.SINGLE:
+                self._run_single(task, request)
+            elif task.task_type == TaskTypeEnum.RETRY:
+                self._run_retry(task, request)
+            else:
+                # 其他类型暂时按单次执行处理
+                self._run_single(task, request)
                 
-                # 根据任务类型执行
-                if task.task_type == TaskTypeEnum.SINGLE:
-                    self._run_single(task, request)
-                elif task.task_type == TaskTypeEnum.RETRY:
-                    self._run_retry(task, request)
-                else:
-                    # 其他类型暂时按单次执行处理
-                    self._run_single(task, request)
-                    
+        except ClockUncertaintyError as e:
+            logger.error(f"{e}，任务不执行")
+            self._finish_failed(self.task_id)
         except Exception as e:
             logger.error(f"任务 {self.task_id} 执行异常: {e}")
             import traceback
             traceback.print_exc()
+            self._finish_failed(self.task_id)
+        finally:
+            self._release_proxy_pool()
+            self.running = False
+    
+    def _send_request(
+        self,
+        request: HttpRequest,
+        proxy: Optional[str],
+        max_body_bytes: int = 0,
+        body_decider: Optional[BodyDecider] = None
+    ) -> Dict[str, Any]:
+        """发送请求，发送期间登记为进行中的请求"""
+        self.in_flight = True
+        try:
+            result = self.executor.execute_request(
+                request=request, proxy=proxy, max_body_bytes=max_body_bytes, body_decider=body_decider
+            )
+        finally:
+            self.in_flight = False
+        self._report_proxy(proxy, result)
+        return result
     
     def _run_single(self, task: Task, request: HttpRequest) -> None:
         """执行单次任务"""
+        self._prepare_start(task, request)
+        if self.stop_flag.is_set():
+            return
         self._execute_request(task, request)
     
     def _run_retry(self, task: Task, request: HttpRequest) -> None:
         """执行重试任务 - 基于demo.py的智能重试逻辑"""
         
-        retry_config = task.retry_config or {}
-        schedule_config = task.schedule_config or {}
+        options = self._get_retry_options(task)
+        max_attempts = options["max_attempts"]
+        interval_seconds = options["interval_seconds"]
         
-        max_attempts = retry_config.get("max_attempts", 10)
-        interval_seconds = retry_config.get("interval_seconds", 5)
-        success_condition = retry_config.get("success_condition")
-        stop_condition = retry_config.get("stop_condition")
-        key_message = retry_config.get("key_message")
-        time_diff = task.time_diff or 0
-        
-        attempt = 0
+        self._log_retry_options(task, options)
         
-        logger.info(f"[{task.name}] 开始重试任务，最大尝试次数: {max_attempts}, 间隔: {interval_seconds}秒")
-        if success_condition:
-            logger.info(f"[{task.name}] 成功条件: {success_condition}")
-        if key_message:
-            logger.info(f"[{task.name}] 关键消息: {key_message}")
-        if stop_condition:
-            logger.info(f"[{task.name}] 停止条件: {stop_condition}")
-        
-        # 判断是否有明确的停止条件
-        has_explicit_stop_condition = bool(success_condition or key_message or stop_condition)
-        if not has_explicit_stop_condition:
-            logger.info(f"[{task.name}] 未设置成功/停止条件，将执行完所有 {max_attempts} 次重试")
+        # 预热连接并等待开始时间（如果设置了）
+        self._prepare_start(task, request)
         
-        # 等待开始时间（如果设置了）
-        if schedule_config.get("type") == "datetime" and schedule_config.get("start_time"):
-            self._wait_for_start_time(schedule_config.get("start_time"), time_diff)
+        attempt = 0
+        finished = False
         
         while attempt < max_attempts and not self.stop_flag.is_set():
             attempt += 1
             logger.info(f"[{task.name}] 第 {attempt}/{max_attempts} 次尝试")
             
             # 执行请求
-            success, result = self._execute_request_with_attempt(task, request, attempt)
+            success, result = self._execute_request_with_attempt(task, request, attempt, options)
             
-            if success and result:
-                response_body = result.get("response_body", "")
-                response_code = result.get("status_code", 0)
-                
-                logger.debug(f"[{task.name}] 第 {attempt} 次请求成功，状态码: {response_code}")
-                
-                # 检查停止条件（优先级最高）
-                if stop_condition and self._check_stop_condition(response_body, response_code, stop_condition):
-                    logger.info(f"[{task.name}] 停止条件满足，任务终止 (尝试次数: {attempt})")
-                    self._update_task_completed(task.id, False)
-                    break
-                    
-                # 检查关键字（如果设置了）
-                if key_message and key_message.lower() in response_body.lower():
-                    logger.info(f"[{task.name}] 找到关键字 '{key_message}'，任务成功完成")
-                    self._update_task_completed(task.id, True)
-                    break
-                
-                # 检查成功条件
-                if success_condition:
-                    # 明确设置了成功条件，按条件判断
-                    if self._check_success_condition(response_body, response_code, success_condition):
-                        logger.info(f"[{task.name}] 成功条件满足，任务完成 (尝试次数: {attempt})")
-                        self._update_task_completed(task.id, True)
-                        break
-                    else:
-                        logger.debug(f"[{task.name}] 第 {attempt} 次请求完成，但未满足成功条件，继续重试")
-                else:
-                    # 没有设置明确的成功条件
-                    if has_explicit_stop_condition:
-                        # 有其他停止条件（如关键字），使用默认HTTP成功判断
-                        if self._check_success_condition(response_body, response_code, None):
-                            logger.info(f"[{task.name}] HTTP请求成功(状态码: {response_code})，任务完成 (尝试次数: {attempt})")
-                            self._update_task_completed(task.id, True)
-                            break
-                        else:
-                            logger.debug(f"[{task.name}] 第 {attempt} 次请求失败(状态码: {response_code})，继续重试")
-                    else:
-                        # 没有任何停止条件，记录执行但继续重试
-                        logger.debug(f"[{task.name}] 第 {attempt} 次请求完成(状态码: {response_code})，继续重试直到完成所有尝试")
-                        
-            else:
-                logger.warning(f"[{task.name}] 第 {attempt} 次尝试失败: {result.get('error_message', '未知错误') if result else '请求执行失败'}")
+            outcome = self._evaluate_attempt(task, attempt, success, result, options)
+            if outcome is not None:
+                self._finish_with_outcome(task, outcome)
+                finished = True
+                break
             
-            # 如果不是最后一次尝试，等待间隔时间（参考demo.py的等待逻辑）
+            # 如果不是最后一次尝试，等待间隔时间（参考demo.py的等待逻辑），其他线程结束任务时立即醒来
             if attempt < max_attempts and not self.stop_flag.is_set():
                 if interval_seconds > 0:
                     logger.debug(f"[{task.name}] 等待 {interval_seconds} 秒后进行下次尝试...")
-                    time.sleep(interval_seconds)
+                    self.stop_flag.wait(interval_seconds)
                 else:
                     logger.debug(f"[{task.name}] 间隔为0秒，立即进行下次尝试")
         
-        # 如果所有尝试都完成了
-        if attempt >= max_attempts:
-            if has_explicit_stop_condition:
-                logger.error(f"[{task.name}] 已达到最大尝试次数 ({max_attempts})，任务失败")
-                self._update_task_completed(task.id, False)
-            else:
-                logger.info(f"[{task.name}] 已完成所有 {max_attempts} 次重试，任务完成")
-                self._update_task_completed(task.id, True)
+        # 如果所有尝试都完成了（被停止或其他线程已得到结果时不再更新状态）
+        if not finished and not self.stop_flag.is_set():
+            self._finish_exhausted(task, options)
+    
+    def _prepare_start(self, task: Task, request: HttpRequest) -> None:
+        """指定时间任务：探测代理并选定首次请求的代理，经该代理对时、预热连接，再在启动屏障上等待开始时间"""
+        if not self.start_barrier.has_start_time():
+            return
+        
+        schedule_config = task.schedule_config or {}
+        
+        self._prevalidate_proxies(task, request)
+        
+        prewarm_seconds = schedule_config.get("prewarm_seconds") or 0
+        proxy = None
+        if prewarm_seconds > 0 or schedule_config.get("clock_source") == ClockSourceEnum.TARGET:
+            proxy = self._reserve_start_proxy(task)
+        # 按目标主机时钟对时时，校准探测经首次请求将使用的代理发送
+        self.start_barrier.deadline_for(self.index, proxy)
+        
+        if prewarm_seconds > 0:
+            keepalive_timeout = connection_manager.keepalive_timeout
+            if keepalive_timeout and prewarm_seconds >= keepalive_timeout:
+                logger.warning(f"[{task.name}] 预热提前量 {prewarm_seconds} 秒不小于连接空闲超时 {keepalive_timeout} 秒，预热的连接可能在使用前被关闭")
+            self._prewarm_connection(task, proxy)
+        
+        result = self.start_barrier.wait(self.index, self.stop_flag)
+        if result is not None:
+            self._on_start_released(result)
+    
+    def _reserve_start_proxy(self, task: Task) -> Optional[str]:
+        """提前选定开始后首次请求使用的代理（对时和预热都经该代理）"""
+        proxy = self._pick_proxy(task)
+        self._warmed_proxy = proxy
+        self._warmed_proxy_pending = True
+        return proxy
+    
+    def _prewarm_connection(self, task: Task, proxy: Optional[str]) -> None:
+        """提前建立到目标主机（或所选代理）的连接，由启动屏障为整个任务一次性预热，开始时间到达时首个请求直接复用"""
+        result = self.start_barrier.prewarm(self.index, proxy)
+        self.warmup_result = result
+        self._start_record_fields["warmup_time"] = result["total_time"]
+        
+        if result["success"]:
+            logger.info(
+                f"[{task.name}] 连接预热完成，DNS: {result['dns_time']:.1f}ms，"
+                f"建连: {result['connect_time']:.1f}ms，总耗时: {result['total_time']:.1f}ms"
+            )
+        else:
+            logger.warning(f"[{task.name}] 连接预热失败，首次请求将重新建立连接: {result['error_message']}")
+    
+    def _select_proxy(self, task: Task) -> Optional[str]:
+        """选择本次请求使用的代理，预热过的代理优先用于首次请求"""
+        if self._warmed_proxy_pending:
+            self._warmed_proxy_pending = False
+            return self._warmed_proxy
+        return self._pick_proxy(task)
     
-    def _wait_for_start_time(self, start_time_str: str, time_diff: float = 0) -> None:
-        """等待开始时间 - 参考demo.py的wait_for_start_time逻辑，使用网络时间"""
+    def _attach_proxy_pool(self, task: Task, request: HttpRequest, pool: Optional[ProxyPool]) -> None:
+        """记录登记的代理池、目标主机和轮换策略"""
+        self.proxy_pool = pool
+        self._proxy_target = target_key(request.url) if pool else None
+        
+        proxy_config = task.proxy_config or {}
+        policy = proxy_config.get("rotation_policy")
         try:
-            # 解析目标时间（支持毫秒）
-            target_time = network_time_service.parse_time_with_ms(start_time_str)
-            
-            # 如果只有时间没有日期，使用今天的日期
-            if target_time.year == 1900:  # strptime默认年份
-                today = datetime.now().date()
-                target_time = datetime.combine(today, target_time.time())
-            
-            # 应用时间差调整
-            if time_diff != 0:
-                target_time = target_time + timedelta(seconds=time_diff)
-                logger.info(f"任务 {self.task_id} 应用时间差调整: {time_diff}秒，目标时间: {network_time_service.format_time_with_ms(target_time)}")
-            else:
-                logger.info(f"任务 {self.task_id} 目标时间: {network_time_service.format_time_with_ms(target_time)}")
-            
-            # 同步网络时间
-            logger.info("正在同步网络时间...")
-            network_time_service.sync_time_diff()
+            self._rotation_policy = ProxyRotationEnum(policy) if policy else None
+        except ValueError:
+            logger.warning(f"[{task.name}] 未知的代理轮换策略 {policy}，按 rotation 配置选择代理")
+            self._rotation_policy = None
+        self._rotate_every = max(int(proxy_config.get("rotate_every") or 10), 1)
+        self._sticky_proxy = None
+        self._sticky_uses = 0
+        
+        policy = proxy_config.get("unavailable_policy")
+        try:
+            self._unavailable_policy = ProxyUnavailablePolicyEnum(policy) if policy else ProxyUnavailablePolicyEnum.DIRECT
+        except ValueError:
+            logger.warning(f"[{task.name}] 未知的无代理处理策略 {policy}，使用本地IP直连")
+            self._unavailable_policy = ProxyUnavailablePolicyEnum.DIRECT
+        self._unavailable_wait_seconds = float(proxy_config.get("unavailable_wait_seconds") or 30)
+        self._direct_warned = False
+    
+    def _pick_proxy(self, task: Task) -> Optional[str]:
+        """
+        从共享代理池中选择代理（不访问网络），未启用代理或代理池为空时使用本地IP
+        非逐次轮换的策略下执行器沿用上次的代理，请求复用经该代理建立的连接
+        """
+        if self.proxy_pool is None:
+            return None
+        
+        policy = self._rotation_policy
+        if policy is None or policy == ProxyRotationEnum.PER_ATTEMPT:
+            rotation = policy is not None or (task.proxy_config or {}).get("rotation", True)
+            return self.proxy_pool.pick(rotation, self._proxy_target)
+        
+        proxy = self._sticky_proxy
+        if (
+            proxy is None
+            or not self.proxy_pool.is_available(proxy)
+            or (policy == ProxyRotationEnum.EVERY_N and self._sticky_uses >= self._rotate_every)
+        ):
+            proxy = self.proxy_pool.pick(True, self._proxy_target)
+            self._sticky_proxy = proxy
+            self._sticky_uses = 0
+        self._sticky_uses += 1
+        return proxy
+    
+    def _proxy_required(self, task: Task, proxy: Optional[str]) -> bool:
+        """启用了代理但没有选到代理时，按策略判断是否不允许直连"""
+        if proxy is not None or self.proxy_pool is None:
+            return False
+        if self._unavailable_policy != ProxyUnavailablePolicyEnum.DIRECT:
+            return True
+        if not self._direct_warned:
+            self._direct_warned = True
+            logger.warning(f"[{task.name}] 代理池没有可用代理（状态: {self.proxy_pool.state.value}），使用本地IP直连")
+        return False
+    
+    def _wait_for_proxy(self, task: Task) -> str:
+        """没有可用代理：wait 策略下等待代理池获取到代理，否则本次尝试失败"""
+        if self._unavailable_policy == ProxyUnavailablePolicyEnum.WAIT:
+            logger.info(f"[{task.name}] 没有可用代理，最多等待 {self._unavailable_wait_seconds:.0f} 秒")
+            if self.proxy_pool.wait_available(self._unavailable_wait_seconds, self.stop_flag):
+                proxy = self._pick_proxy(task)
+                if proxy:
+                    return proxy
+        raise ProxyUnavailableError(f"没有可用代理（代理池状态: {self.proxy_pool.state.value}）")
+    
+    def _prevalidate_proxies(self, task: Task, request: HttpRequest) -> None:
+        """指定时间任务：等待开始时间期间并发探测代理到目标主机的连通性，开始后只使用通过探测的代理"""
+        if self.proxy_pool is None or not settings.proxy_probe_enabled:
+            return
+        
+        # 探测不能拖过开始时间，留出对时、选择代理和预热连接的余量（此时尚未对时，按网络时间估计开始时刻）
+        timeout = None
+        deadline_ns = self.start_barrier.nominal_deadline_ns()
+        if deadline_ns is not None:
+            timeout = max((deadline_ns - time.monotonic_ns()) / 1e9 - 0.5, 0)
+        
+        admission = self.proxy_pool.prevalidate(request.url, timeout)
+        if admission is None:
+            logger.warning(f"[{task.name}] 代理探测未能在开始前完成，按健康度选择代理")
+        elif self.index == 0:
+            logger.info(f"[{task.name}] 代理探测: {len(admission.admitted)}/{len(admission.results)} 个代理可用")
+    
+    def _report_proxy(self, proxy: Optional[str], result: Dict[str, Any]) -> None:
+        """把请求结果反馈给代理池，用于代理健康评分"""
+        if proxy and self.proxy_pool is not None:
+            self.proxy_pool.report(proxy, ProxyPool.is_proxy_success(result), result.get("response_time"))
             
-            last_log_time = None
+            # 失败时更换代理：请求失败或目标服务器返回错误状态码（可能已限制该IP）
+            if self._rotation_policy == ProxyRotationEnum.ON_FAILURE and proxy == self._sticky_proxy:
+                if not result.get("success") or (result.get("status_code") or 0) >= 400:
+                    self._sticky_proxy = None
+    
+    def _release_proxy_pool(self) -> None:
+        """注销代理池的使用"""
+        if self.proxy_pool is not None:
+            self.proxy_pool.release()
+            self.proxy_pool = None
+    
+    def _take_start_record_fields(self) -> Dict[str, Any]:
+        """取出尚未写入的开始阶段数据（预热耗时、释放误差），只记录在首条执行记录中"""
+        fields, self._start_record_fields = self._start_record_fields, {}
+        return fields
+    
+    def _timing_fields(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        发出时刻和首字节时间；开始时间到达后的首条记录还包含计划发出时刻、时钟偏移和估计的到达误差
+        
+        单调时钟时刻按同一个基准换算为本地时钟 Unix 微秒，计划与实际发出时刻之差即单调时钟上的发出误差。
+        到达误差 = 实际发出时刻 + 时钟偏移 + 单程延迟 - 开始时间（参考时钟），单程延迟取目标主机时钟校准的估计，
+        按网络时间对时时没有单程延迟的估计，取首字节时间的一半（包含服务器处理时间，偏大）
+        """
+        wall_offset_ns = time.time_ns() - time.monotonic_ns()
+        sent_ns = result.get("sent_ns")
+        first_byte_ms = result.get("first_byte_ms")
+        fields: Dict[str, Any] = {"first_byte_time": first_byte_ms}
+        if sent_ns is not None:
+            fields["sent_at"] = (sent_ns + wall_offset_ns) // 1000
+        
+        plan, self._fire_plan = self._fire_plan, None
+        if plan is None:
+            return fields
+        
+        fields.update(
+            planned_send_at=(plan.deadline_ns + wall_offset_ns) // 1000,
+            clock_offset=plan.clock_offset_s * 1000,
+            clock_source=plan.clock_source
+        )
+        one_way_ms = plan.one_way_ms if plan.one_way_ms is not None else (first_byte_ms / 2 if first_byte_ms is not None else None)
+        if sent_ns is not None and one_way_ms is not None:
+            arrival_ns = sent_ns + wall_offset_ns + round(plan.clock_offset_s * 1e9) + round(one_way_ms * 1e6)
+            fields["arrival_error"] = (arrival_ns - plan.target_ns) / 1000
+        return fields
+    
+    def _get_retry_options(self, task: Task) -> Dict[str, Any]:
+        """读取重试配置"""
+        retry_config = task.retry_config or {}
+        
+        success_condition = retry_config.get("success_condition")
+        stop_condition = retry_config.get("stop_condition")
+        key_message = retry_config.get("key_message")
+        success_keywords = retry_config.get("success_keywords") or []
+        stop_keywords = retry_config.get("stop_keywords") or []
+        
+        # 普通关键消息与成功/停止关键字合并为一个匹配器，一次扫描响应体；以 $ 开头的关键消息按 JSON 路径条件判断
+        plain_key_message = key_message if key_message and not key_message.strip().startswith("$") else None
+        keyword_matcher = KeywordMatcher(
+            {"stop": stop_keywords, "key_message": [plain_key_message] if plain_key_message else [], "success": success_keywords},
+            priority=["stop", "key_message", "success"],
+        )
+        
+        options = {
+            "max_attempts": retry_config.get("max_attempts", 10),
+            "interval_seconds": retry_config.get("interval_seconds", 5),
+            "max_body_bytes": retry_config.get("max_body_bytes") or 0,
+            "success_condition": success_condition,
+            "stop_condition": stop_condition,
+            "key_message": key_message,
+            # 条件只编译一次，每次尝试直接求值
+            "success_check": self._compile_condition(task, success_condition, "成功条件"),
+            "stop_check": self._compile_condition(task, stop_condition, "停止条件"),
+            "key_check": None if plain_key_message else self._compile_condition(task, key_message, "关键消息", compile_key_message),
+            "success_keywords": success_keywords,
+            "stop_keywords": stop_keywords,
+            "keyword_matcher": keyword_matcher if keyword_matcher else None,
+            # 判断是否有明确的停止条件
+            "has_explicit_stop_condition": bool(success_condition or key_message or stop_condition or success_keywords or stop_keywords),
+        }
+        options["body_decider"] = self._make_body_decider(options) if options["max_body_bytes"] > 0 else None
+        return options
+    
+    def _make_body_decider(self, options: Dict[str, Any]) -> Optional[BodyDecider]:
+        """流式读取响应体时，根据新读取的内容判断本次尝试的结论是否已经确定"""
+        checks = [options["stop_check"], options["key_check"], options["success_check"]]
+        keyword_matcher = options["keyword_matcher"]
+        
+        if keyword_matcher is None:
+            if any(check is not None and check.uses_body for check in checks):
+                # 条件需要完整的响应体，读取到字节上限为止
+                return None
+            # 所有条件只依赖状态码（或没有条件），不需要读取响应体
+            return BodyDecider(lambda status_code, text: True)
+        
+        # 停止类关键字或条件可能出现在后续内容中时，命中成功类关键字也不能提前结束
+        stop_check = options["stop_check"]
+        stop_may_follow = bool(options["stop_keywords"]) or (stop_check is not None and stop_check.uses_body)
+        
+        def decide(status_code: int, text: str) -> bool:
+            # 之前的内容已经扫描过且没有得出结论，只需扫描新内容（带上跨块的重叠部分）
+            hits = keyword_matcher.scan(text)
+            if "stop" in hits:
+                return True
+            return not stop_may_follow and ("key_message" in hits or "success" in hits)
+        
+        return BodyDecider(decide, overlap=keyword_matcher.max_keyword_length - 1)
+    
+    def _log_retry_options(self, task: Task, options: Dict[str, Any]) -> None:
+        """打印重试配置"""
+        logger.info(f"[{task.name}] 开始重试任务，最大尝试次数: {options['max_attempts']}, 间隔: {options['interval_seconds']}秒")
+        if options["success_condition"]:
+            logger.info(f"[{task.name}] 成功条件: {options['success_condition']}")
+        if options["key_message"]:
+            logger.info(f"[{task.name}] 关键消息: {options['key_message']}")
+        if options["stop_condition"]:
+            logger.info(f"[{task.name}] 停止条件: {options['stop_condition']}")
+        if options["success_keywords"]:
+            logger.info(f"[{task.name}] 成功关键字: {options['success_keywords']}")
+        if options["stop_keywords"]:
+            logger.info(f"[{task.name}] 停止关键字: {options['stop_keywords']}")
+        
+        if not options["has_explicit_stop_condition"]:
+            logger.info(f"[{task.name}] 未设置成功/停止条件，将执行完所有 {options['max_attempts']} 次重试")
+    
+    def _evaluate_attempt(
+        self,
+        task: Task,
+        attempt: int,
+        success: bool,
+        result: Optional[Dict[str, Any]],
+        options: Dict[str, Any]
+    ) -> Optional[bool]:
+        """
+        评估单次尝试的结果
+        
+        Returns:
+            True/False 表示任务以成功/失败结束，None 表示继续重试
+        """
+        if not (success and result):
+            logger.warning(f"[{task.name}] 第 {attempt} 次尝试失败: {result.get('error_message', '未知错误') if result else '请求执行失败'}")
+            return None
+        
+        response_body = result.get("response_body", "")
+        response_code = result.get("status_code", 0)
+        success_condition = options["success_condition"]
+        stop_condition = options["stop_condition"]
+        key_message = options["key_message"]
+        key_check = options["key_check"]
+        
+        # 本次尝试的所有条件共享同一个上下文，响应体最多解析一次 JSON
+        context = ResponseContext(response_body, response_code)
+        
+        # 所有关键字一次扫描，得到各类别命中的第一个关键字
+        keyword_matcher = options["keyword_matcher"]
+        keyword_hits = keyword_matcher.scan(response_body) if keyword_matcher else {}
+        
+        logger.debug(f"[{task.name}] 第 {attempt} 次请求成功，状态码: {response_code}")
+        
+        # 检查停止关键字和停止条件（优先级最高）
+        if "stop" in keyword_hits:
+            logger.info(f"[{task.name}] 找到停止关键字 '{keyword_hits['stop']}'，任务终止 (尝试次数: {attempt})")
+            return False
+        if stop_condition and self._check_stop_condition(context, options["stop_check"]):
+            logger.info(f"[{task.name}] 停止条件满足，任务终止 (尝试次数: {attempt})")
+            return False
             
-            while True:
-                # 使用网络时间进行比较
-                current_network_time = network_time_service.get_current_network_time()
-                
-                # 计算时间差（毫秒精度）
-                time_diff_seconds = (target_time - current_network_time).total_seconds()
-                
-                # 每5秒打印一次等待信息
-                now_timestamp = time.time()
-                if last_log_time is None or now_timestamp - last_log_time >= 5:
-                    if time_diff_seconds > 0:
-                        logger.info(f"任务 {self.task_id} 等待中... 还需 {time_diff_seconds:.3f} 秒，当前网络时间: {network_time_service.format_time_with_ms(current_network_time)}")
-                    last_log_time = now_timestamp
-                
-                # 检查是否到达目标时间（考虑毫秒精度）
-                if time_diff_seconds <= 0.001:  # 1毫秒容错
-                    logger.info(f"任务 {self.task_id} 开始时间到达！当前网络时间: {network_time_service.format_time_with_ms(current_network_time)}")
-                    break
-                
-                # 动态调整睡眠时间
-                if time_diff_seconds > 10:
-                    # 还有很长时间，每秒检查一次
-                    sleep_time = 1.0
-                elif time_diff_seconds > 1:
-                    # 还有几秒，每100毫秒检查一次
-                    sleep_time = 0.1
-                else:
-                    # 最后1秒，每10毫秒检查一次
-                    sleep_time = 0.01
-                
-                time.sleep(sleep_time)
-                
-                # 检查是否被停止
-                if self.stop_flag.is_set():
-                    logger.info(f"任务 {self.task_id} 在等待期间被停止")
-                    return
-                    
-        except Exception as e:
-            logger.error(f"任务 {self.task_id} 解析开始时间失败: {e}")
-            logger.info(f"任务 {self.task_id} 跳过时间等待，立即开始执行")
+        # 检查关键字（如果设置了）
+        if "key_message" in keyword_hits or (key_check is not None and key_check.evaluate(context)):
+            logger.info(f"[{task.name}] 找到关键字 '{key_message}'，任务成功完成")
+            return True
+        
+        # 检查成功关键字
+        if "success" in keyword_hits:
+            logger.info(f"[{task.name}] 找到成功关键字 '{keyword_hits['success']}'，任务成功完成 (尝试次数: {attempt})")
+            return True
+        
+        # 检查成功条件
+        if success_condition:
+            # 明确设置了成功条件，按条件判断
+            if self._check_success_condition(context, options["success_check"]):
+                logger.info(f"[{task.name}] 成功条件满足，任务完成 (尝试次数: {attempt})")
+                return True
+            logger.debug(f"[{task.name}] 第 {attempt} 次请求完成，但未满足成功条件，继续重试")
+        elif options["has_explicit_stop_condition"] and not options["success_keywords"]:
+            # 有其他停止条件（如关键字），使用默认HTTP成功判断（设置了成功关键字时必须命中关键字才算成功）
+            if self._check_success_condition(context, None):
+                logger.info(f"[{task.name}] HTTP请求成功(状态码: {response_code})，任务完成 (尝试次数: {attempt})")
+                return True
+            logger.debug(f"[{task.name}] 第 {attempt} 次请求失败(状态码: {response_code})，继续重试")
+        elif options["success_keywords"]:
+            logger.debug(f"[{task.name}] 第 {attempt} 次请求完成，但未找到成功关键字，继续重试")
+        else:
+            # 没有任何停止条件，记录执行但继续重试
+            logger.debug(f"[{task.name}] 第 {attempt} 次请求完成(状态码: {response_code})，继续重试直到完成所有尝试")
+        
+        return None
+    
+    def _finish_with_outcome(self, task: Task, success: bool) -> None:
+        """得到终止结果：取消同一任务的其他执行器，只有第一个得到结果的执行器更新任务状态"""
+        if self.stop_flag.cancel("success" if success else "stop_condition"):
+            self._update_task_completed(task.id, success)
+        else:
+            logger.debug(f"[{task.name}] 任务已由其他线程结束（{self.stop_flag.reason}），忽略本线程结果")
+    
+    def _report_exhausted(self) -> bool:
+        """本执行器未得到终止结果即结束，返回是否应由本执行器更新任务状态（同组最后一个结束）"""
+        if self._exhausted_reported:
+            return False
+        self._exhausted_reported = True
+        return self.stop_flag.runner_exhausted()
+    
+    def _finish_failed(self, task_id: int) -> None:
+        """本执行器失败结束，同组所有执行器都失败时任务失败"""
+        if self._report_exhausted():
+            self._update_task_completed(task_id, False)
+    
+    def _finish_exhausted(self, task: Task, options: Dict[str, Any]) -> None:
+        """所有尝试用完后更新任务状态（同一任务的执行器全部用完后才更新）"""
+        if not self._report_exhausted():
+            logger.debug(f"[{task.name}] 本线程尝试次数已用完，等待其他线程结束")
+            return
+        
+        max_attempts = options["max_attempts"]
+        if options["has_explicit_stop_condition"]:
+            logger.error(f"[{task.name}] 已达到最大尝试次数 ({max_attempts})，任务失败")
+            self._update_task_completed(task.id, False)
+        else:
+            logger.info(f"[{task.name}] 已完成所有 {max_attempts} 次重试，任务完成")
+            self._update_task_completed(task.id, True)
+    
+    def _on_start_released(self, result: ReleaseResult) -> None:
+        """开始时间到达：记录释放误差"""
+        if result.stopped:
+            logger.info(f"任务 {self.task_id} 在等待期间被停止")
+            return
+        
+        self.release_result = result
+        self._start_record_fields["release_error"] = result.error_us
+        self._fire_plan = self.start_barrier.fire_plan(self.index)
+        logger.info(f"任务 {self.task_id} 开始时间到达！释放误差: {result.error_us:.1f}μs")
     
-    def _check_success_condition(self, response_body: str, response_code: int, success_condition: str) -> bool:
-        """检查成功条件"""
-        if not success_condition:
+    def _check_success_condition(self, context: ResponseContext, success_condition: Optional[Condition]) -> bool:
+        """检查成功条件（条件已在读取重试配置时编译）"""
+        if success_condition is None:
             # 默认成功条件：状态码为2xx（成功状态码）
-            return 200 <= response_code < 300
-            
-        try:
-            # 支持简单的条件表达式
-            if "status_code" in success_condition:
-                # 替换变量并计算条件
-                condition = success_condition.replace("response.status_code", str(response_code))
-                return eval(condition)
-            elif "response_body" in success_condition:
-                # 简单的字符串包含检查
-                if "contains" in success_condition:
-                    # 例如: response_body.contains('success')
-                    match = success_condition.split("contains")
-                    if len(match) == 2:
-                        search_text = match[1].strip().strip("()\"'")
-                        return search_text.lower() in response_body.lower()
-                else:
-                    # 直接文本替换和计算
-                    condition = success_condition.replace("response_body", f"'{response_body}'")
-                    return eval(condition)
-            else:
-                # 直接作为响应体关键字检查
-                return success_condition.lower() in response_body.lower()
-        except Exception as e:
-            logger.error(f"评估成功条件失败: {e}, 条件: {success_condition}")
-            # 评估失败时，回退到默认逻辑（HTTP状态码检查）
-            return 200 <= response_code < 300
+            return 200 <= context.status_code < 300
+        return success_condition.evaluate(context)
     
-    def _check_stop_condition(self, response_body: str, response_code: int, stop_condition: str) -> bool:
-        """检查停止条件"""
-        if not stop_condition:
+    def _check_stop_condition(self, context: ResponseContext, stop_condition: Optional[Condition]) -> bool:
+        """检查停止条件（条件已在读取重试配置时编译）"""
+        if stop_condition is None:
             return False
-            
+        return stop_condition.evaluate(context)
+    
+    def _compile_condition(
+        self,
+        task: Task,
+        source: Optional[str],
+        label: str,
+        compiler: Callable[[str], Condition] = compile_condition
+    ) -> Optional[Condition]:
+        """编译条件表达式，格式错误时记录日志并返回 None（成功条件回退为HTTP状态码判断，其他条件视为不满足）"""
+        if not source:
+            return None
         try:
-            if "status_code" in stop_condition:
-                return eval(stop_condition.replace("response.status_code", str(response_code)))
-            elif "response_body" in stop_condition:
-                condition = stop_condition.replace("response_body", f"'{response_body}'")
-                return eval(condition)
-            else:
-                return stop_condition.lower() in response_body.lower()
-        except Exception as e:
-            logger.error(f"评估停止条件失败: {e}")
-            return False
+            return compiler(source)
+        except ConditionParseError as e:
+            logger.error(f"[{task.name}] {label}格式错误: {e}, 条件: {source}")
+            return None
     
-    def _execute_request_with_attempt(self, task: Task, request: HttpRequest, attempt_number: int) -> tuple[bool, Optional[Dict[str, Any]]]:
+    def _execute_request_with_attempt(
+        self,
+        task: Task,
+        request: HttpRequest,
+        attempt_number: int,
+        options: Optional[Dict[str, Any]] = None
+    ) -> Tuple[bool, Optional[Dict[str, Any]]]:
         """执行HTTP请求并记录尝试次数"""
         try:
             # 获取代理（参考demo.py的代理轮换逻辑）
-            proxy = self.proxy_manager.get_random_proxy(task.proxy_config)
+            proxy = self._select_proxy(task)
+            if self._proxy_required(task, proxy):
+                proxy = self._wait_for_proxy(task)
             if proxy:
                 logger.debug(f"[{task.name}] 使用代理: {proxy}")
             
             # 执行请求
-            result = self.executor.execute_request(
-                request=request,
-                proxy=proxy
-            )
+            options = options or {}
+            result = self._send_request(request, proxy, options.get("max_body_bytes", 0), options.get("body_decider"))
             
             # 记录执行结果（包含尝试次数）
             self._record_execution(task, request, result, proxy, attempt_number)
@@ -410,50 +644,40 @@ class TaskRunner:
             logger.error(f"任务 {task_id} 更新任务状态失败: {e}")
     
     def _record_execution(self, task: Task, request: HttpRequest, result: Dict[str, Any], proxy: Optional[str] = None, attempt_number: int = 1) -> None:
-        """记录执行结果到数据库"""
+        """记录执行结果（放入后台写入队列，不等待数据库）"""
         try:
-            with get_db_context() as db:
-                # 确定执行状态
-                if result.get("success"):
-                    status = ExecutionStatusEnum.SUCCESS
-                elif "timeout" in result.get("error_message", "").lower():
-                    status = ExecutionStatusEnum.TIMEOUT
-                else:
-                    status = ExecutionStatusEnum.FAILED
-                
-                # 创建执行记录，使用基本数据而不是对象引用
-                execution_record = ExecutionRecord(
-                    task_id=task.id,
-                    request_id=request.id,
-                    status=status,
-                    request_url=request.url,
-                    request_headers=request.headers,
-                    request_body=request.body,
-                    proxy_used=proxy or result.get("proxy_used"),
-                    response_code=result.get("status_code"),
-                    response_headers=result.get("response_headers"),
-                    response_body=result.get("response_body"),
-                    response_time=result.get("response_time"),
-                    error_message=result.get("error_message"),
-                    thread_id=str(threading.current_thread().ident),
-                    attempt_number=attempt_number,
-                    execution_time=datetime.now()
-                )
-                
-                db.add(execution_record)
-                db.commit()
-                
-                # 更新任务统计
-                task_service = TaskService(db)
-                task_service.increment_execution_count(
-                    task.id, 
-                    success=result.get("success", False)
-                )
+            # 确定执行状态
+            if result.get("success"):
+                status = ExecutionStatusEnum.SUCCESS
+            elif "timeout" in (result.get("error_message") or "").lower():
+                status = ExecutionStatusEnum.TIMEOUT
+            else:
+                status = ExecutionStatusEnum.FAILED
+            
+            # 使用基本数据而不是对象引用，由写入线程批量插入并累加任务统计
+            record_writer.submit(dict(
+                task_id=task.id,
+                request_id=request.id,
+                status=status,
+                request_url=request.url,
+                request_headers=request.headers,
+                request_body=request.body,
+                proxy_used=proxy or result.get("proxy_used"),
+                response_code=result.get("status_code"),
+                response_headers=result.get("response_headers"),
+                response_body=result.get("response_body"),
+                response_time=result.get("response_time"),
+                **self._take_start_record_fields(),
+                **self._timing_fields(result),
+                body_truncated=result.get("body_truncated"),
+                error_message=result.get("error_message"),
+                thread_id=str(threading.current_thread().ident),
+                attempt_number=attempt_number,
+                execution_time=datetime.now()
+            ))
                 
         except Exception as e:
             logger.error(f"任务 {task.id} 记录执行结果失败: {e}")
-            import traceback
-            traceback.print_exc()
     
     def stop(self) -> None:
         """停止任务"""
@@ -463,22 +687,25 @@ class TaskRunner:
         """执行单次请求 - 基于demo.py的单次执行逻辑"""
         try:
             # 获取代理
-            proxy = self.proxy_manager.get_random_proxy(task.proxy_config)
+            proxy = self._select_proxy(task)
+            if self._proxy_required(task, proxy):
+                proxy = self._wait_for_proxy(task)
             if proxy:
                 logger.debug(f"[{task.name}] 使用代理: {proxy}")
             
-            # 执行请求
-            result = self.executor.execute_request(
-                request=request,
-                proxy=proxy
-            )
+            # 执行请求（单次任务只按HTTP状态判定，设置了 max_body_bytes 时只读取响应体前缀）
+            max_body_bytes = (task.retry_config or {}).get("max_body_bytes") or 0
+            result = self._send_request(request, proxy, max_body_bytes)
             
             # 记录执行结果
             self._record_execution(task, request, result, proxy, 1)
             
             # 根据执行结果更新任务状态
             success = result.get("success", False)
-            self._update_task_completed(task.id, success)
+            if success:
+                self._finish_with_outcome(task, True)
+            else:
+                self._finish_failed(task.id)
             
             if success:
                 logger.info(f"[{task.name}] 单次任务执行成功")
@@ -496,7 +723,170 @@ class TaskRunner:
                 "proxy_used": None
             }
             self._record_execution(task, request, error_result, None, 1)
-            self._update_task_completed(task.id, False)
+            self._finish_failed(task.id)
+
+
+class AsyncTaskRunner(TaskRunner):
+    """
+    协程任务执行器 - 复用 TaskRunner 的状态和判定逻辑，请求在异步执行引擎的事件循环上发送
+    httpx 不提供预先建立连接的接口，异步引擎不做连接预热
+    """
+    
+    async def run_async(self) -> None:
+        """运行任务"""
+        loop = asyncio.get_running_loop()
+        self.running = True
+        try:
+            # 数据库访问是阻塞操作，放到线程池中执行
+            loaded = await loop.run_in_executor(None, self.start_barrier.load)
+            if not loaded:
+                return
+            
+            task, request = loaded
+            logger.info(f"[{task.name}] 任务开始执行（异步引擎）")
+            # 代理池首次获取代理时需要等待，放到线程池中执行
+            pool = await loop.run_in_executor(None, proxy_pool_service.acquire, task.proxy_config)
+            self._attach_proxy_pool(task, request, pool)
+            
+            if task.task_type == TaskTypeEnum.RETRY:
+                await self._run_retry_async(task, request)
+            else:
+                await self._run_single_async(task, request)
+                
+        except ClockUncertaintyError as e:
+            logger.error(f"{e}，任务不执行")
+            await loop.run_in_executor(None, self._finish_failed, self.task_id)
+        except Exception as e:
+            logger.error(f"任务 {self.task_id} 执行异常: {e}")
+            import traceback
+            traceback.print_exc()
+            await loop.run_in_executor(None, self._finish_failed, self.task_id)
+        finally:
+            self._release_proxy_pool()
+            self.running = False
+    
+    async def _run_single_async(self, task: Task, request: HttpRequest) -> None:
+        """执行单次任务"""
+        loop = asyncio.get_running_loop()
+        await self._prepare_start_async(task, request)
+        if self.stop_flag.is_set():
+            return
+        
+        single_options = {"max_body_bytes": (task.retry_config or {}).get("max_body_bytes") or 0}
+        success, result = await self._execute_request_with_attempt_async(task, request, 1, single_options)
+        if success:
+            await loop.run_in_executor(None, self._finish_with_outcome, task, True)
+        else:
+            await loop.run_in_executor(None, self._finish_failed, task.id)
+        
+        if success:
+            logger.info(f"[{task.name}] 单次任务执行成功")
+        else:
+            logger.warning(f"[{task.name}] 单次任务执行失败: {result.get('error_message', '未知错误') if result else '请求执行失败'}")
+    
+    async def _run_retry_async(self, task: Task, request: HttpRequest) -> None:
+        """执行重试任务，判定逻辑与 TaskRunner._run_retry 一致"""
+        loop = asyncio.get_running_loop()
+        
+        options = self._get_retry_options(task)
+        max_attempts = options["max_attempts"]
+        interval_seconds = options["interval_seconds"]
+        
+        self._log_retry_options(task, options)
+        
+        # 等待开始时间（如果设置了）
+        await self._prepare_start_async(task, request)
+        
+        attempt = 0
+        finished = False
+        
+        while attempt < max_attempts and not self.stop_flag.is_set():
+            attempt += 1
+            logger.info(f"[{task.name}] 第 {attempt}/{max_attempts} 次尝试")
+            
+            success, result = await self._execute_request_with_attempt_async(task, request, attempt, options)
+            
+            outcome = self._evaluate_attempt(task, attempt, success, result, options)
+            if outcome is not None:
+                await loop.run_in_executor(None, self._finish_with_outcome, task, outcome)
+                finished = True
+                break
+            
+            if attempt < max_attempts and interval_seconds > 0:
+                await self._sleep_async(interval_seconds)
+        
+        if not finished and not self.stop_flag.is_set():
+            await loop.run_in_executor(None, self._finish_exhausted, task, options)
+    
+    async def _execute_request_with_attempt_async(
+        self,
+        task: Task,
+        request: HttpRequest,
+        attempt_number: int,
+        options: Optional[Dict[str, Any]] = None
+    ) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """执行HTTP请求并记录尝试次数"""
+        options = options or {}
+        try:
+            proxy = self._select_proxy(task)
+            if self._proxy_required(task, proxy):
+                # 等待代理是阻塞操作，放到线程池中执行
+                proxy = await asyncio.get_running_loop().run_in_executor(None, self._wait_for_proxy, task)
+            if proxy:
+                logger.debug(f"[{task.name}] 使用代理: {proxy}")
+            
+            self.in_flight = True
+            try:
+                result = await async_engine.executor.execute_request(
+                    request=request,
+                    proxy=proxy,
+                    max_body_bytes=options.get("max_body_bytes", 0),
+                    body_decider=options.get("body_decider")
+                )
+            finally:
+                self.in_flight = False
+            self._report_proxy(proxy, result)
+            
+            # 只入队不访问数据库，可以直接在事件循环中调用
+            self._record_execution(task, request, result, proxy, attempt_number)
+            return result.get("success", False), result
+            
+        except Exception as e:
+            logger.error(f"[{task.name}] 第 {attempt_number} 次请求执行失败: {e}")
+            error_result = {
+                "success": False,
+                "error_message": str(e),
+                "proxy_used": None
+            }
+            self._record_execution(task, request, error_result, None, attempt_number)
+            return False, None
+    
+    async def _prepare_start_async(self, task: Task, request: HttpRequest) -> None:
+        """指定时间任务：探测代理后提前选定代理并创建客户端，经该代理对时，再在启动屏障上等待开始时间"""
+        if not self.start_barrier.has_start_time():
+            return
+        
+        loop = asyncio.get_running_loop()
+        if self.proxy_pool is not None:
+            await loop.run_in_executor(None, self._prevalidate_proxies, task, request)
+        
+        proxy = self._reserve_start_proxy(task)
+        async_engine.executor.prepare_client(proxy)
+        # 对时（可能需要同步网络时间或校准目标主机时钟）是阻塞操作，放到线程池中执行
+        await loop.run_in_executor(None, self.start_barrier.deadline_for, self.index, proxy)
+        
+        result = await self.start_barrier.wait_async(self.index, self.stop_flag)
+        if result is not None:
+            self._on_start_released(result)
+    
+    async def _sleep_async(self, seconds: float) -> None:
+        """可被停止标志中断的休眠"""
+        deadline = time.monotonic() + seconds
+        while not self.stop_flag.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(min(remaining, 0.1))
 
 
 class SchedulerService:
@@ -505,8 +895,13 @@ class SchedulerService:
     def __init__(self):
         self.running = False
         self.executor = ThreadPoolExecutor(max_workers=settings.default_thread_count)
-        self.task_futures: Dict[int, Future] = {}  # 任务ID -> Future
-        self.check_interval = 10  # 检查间隔（秒）
+        self.task_groups: Dict[int, TaskGroup] = {}  # 任务ID -> 执行组（所有执行器及其Future）
+        self.stop_timeout = 5  # 停止任务时等待执行器退出的秒数
+        self.timer_queue = TaskTimerQueue()  # 按下次执行时间排序的定时队列
+        self.cron_precompute_count = 16  # Cron任务每次预先计算的触发时间个数
+        self.start_prepare_seconds = 2  # 指定时间任务提前出队的秒数，执行器在开始前完成加载、对时并精确等待
+        self._cron_fire_times: Dict[int, Tuple[Tuple[str, Optional[str]], Deque[datetime]]] = {}
+        self._lock = threading.Lock()
         
     def start(self) -> None:
         """启动调度服务"""
@@ -515,8 +910,13 @@ class SchedulerService:
             return
         
         self.running = True
+        self.timer_queue.reopen()
+        network_time_service.start()
         logger.info("调度服务启动")
         
+        # 启动时从数据库加载待执行任务
+        self._load_pending_tasks()
+        
         # 启动调度线程
         scheduler_thread = threading.Thread(target=self._scheduler_loop, daemon=True)
         scheduler_thread.start()
@@ -527,38 +927,108 @@ class SchedulerService:
             return
         
         self.running = False
+        self.timer_queue.close()
         
-        # 停止所有正在运行的任务
-        for task_id, future in self.task_futures.items():
-            logger.info(f"停止任务 {task_id}")
-            future.cancel()
+        # 停止所有正在运行的任务：先通知所有执行组，再由线程池关闭时统一等待
+        with self._lock:
+            task_groups = list(self.task_groups.values())
+        for group in task_groups:
+            logger.info(f"停止任务 {group.task_id}")
+            group.stop(timeout=0)
         
-        # 关闭线程池
+        # 关闭线程池和异步执行引擎
         self.executor.shutdown(wait=True)
+        for group in task_groups:
+            group.join()
+        async_engine.shutdown()
+        
+        # 所有执行器退出后写入剩余的执行记录
+        record_writer.stop()
+        proxy_pool_service.stop()
+        network_time_service.stop()
         logger.info("调度服务已停止")
     
+    def schedule_task(self, task: Task) -> None:
+        """
+        根据任务当前状态更新定时队列
+        由任务创建、更新、启动等API调用，待执行任务按下次执行时间入队，其他状态出队
+        """
+        if task.status == TaskStatusEnum.PENDING:
+            self.timer_queue.schedule(task.id, self._dispatch_time(task))
+            logger.debug(f"任务 {task.id} 已加入定时队列，执行时间: {task.next_execution_at}")
+        else:
+            self.timer_queue.cancel(task.id)
+    
+    def unschedule_task(self, task_id: int) -> None:
+        """从定时队列中移除任务"""
+        self.timer_queue.cancel(task_id)
+        with self._lock:
+            self._cron_fire_times.pop(task_id, None)
+    
+    def _dispatch_time(self, task: Task) -> Optional[datetime]:
+        """
+        计算任务从定时队列出队的时间
+        指定时间任务提前出队（需要预热连接时再加上预热提前量），由执行器精确等待到开始时间
+        """
+        schedule_config = task.schedule_config or {}
+        if not task.next_execution_at or schedule_config.get("type") != ScheduleTypeEnum.DATETIME:
+            return task.next_execution_at
+        
+        prewarm_seconds = float(schedule_config.get("prewarm_seconds") or 0)
+        lead_seconds = max(prewarm_seconds, self.start_prepare_seconds)
+        if settings.proxy_probe_enabled and (task.proxy_config or {}).get("enabled"):
+            # 启用代理时再提前一些，在开始前完成代理探测
+            lead_seconds = max(lead_seconds, settings.proxy_probe_lead_seconds)
+        if schedule_config.get("clock_source") == ClockSourceEnum.TARGET:
+            # 按目标主机时钟对时：开始前需要若干次探测校准，且不应用手动时间差
+            return task.next_execution_at - timedelta(seconds=max(lead_seconds, settings.time_sync_target_lead_seconds))
+        # 时间差为负时实际开始时间更早，出队时间同样提前
+        lead_seconds += max(0, -(task.time_diff or 0))
+        return task.next_execution_at - timedelta(seconds=lead_seconds)
+    
+    def _load_pending_tasks(self) -> None:
+        """从数据库加载所有待执行任务到定时队列"""
+        try:
+            with get_db_context() as db:
+                task_service = TaskService(db)
+                pending_tasks = task_service.get_schedulable_tasks()
+                for task in pending_tasks:
+                    self.timer_queue.schedule(task.id, self._dispatch_time(task))
+                logger.info(f"已加载 {len(pending_tasks)} 个待执行任务到定时队列")
+        except Exception as e:
+            logger.error(f"加载待执行任务失败: {e}")
+    
     def _scheduler_loop(self) -> None:
-        """调度循环"""
+        """调度循环：休眠到下一个到期任务，而不是定期轮询数据库"""
         while self.running:
+            due_task_ids = self.timer_queue.wait_for_due()
+            if not due_task_ids or not self.running:
+                continue
+            
             try:
                 with get_db_context() as db:
                     task_service = TaskService(db)
                     
-                    # 获取待执行的任务
-                    pending_tasks = task_service.get_pending_tasks()
-                    
-                    for task in pending_tasks:
-                        if task.id not in self.task_futures:
-                            self._execute_task(task, db)
-                    
-                    # 清理已完成的任务
-                    self._cleanup_completed_tasks()
+                    for task_id in due_task_ids:
+                        with self._lock:
+                            if task_id in self.task_groups:
+                                continue
+                        
+                        # 以数据库状态为准，避免执行已被停止或修改的任务
+                        task = task_service.get_task(task_id)
+                        if not task or task.status != TaskStatusEnum.PENDING:
+                            continue
+                        
+                        dispatch_at = self._dispatch_time(task)
+                        if dispatch_at and dispatch_at > datetime.now():
+                            # 执行时间在入队后被推迟，重新入队
+                            self.timer_queue.schedule(task.id, dispatch_at)
+                            continue
+                        
+                        self._execute_task(task, db)
                     
             except Exception as e:
                 logger.error(f"调度循环异常: {e}")
-            
-            # 等待下次检查
-            time.sleep(self.check_interval)
     
     def _execute_task(self, task: Task, db: Session) -> None:
         """执行任务"""
@@ -573,93 +1043,187 @@ class SchedulerService:
             task_service = TaskService(db)
             task_service.update_task_status(task.id, TaskStatusEnum.RUNNING)
             
-            # 创建任务执行器，传递ID而不是对象来避免跨线程会话问题
-            task_runner = TaskRunner(task.id, request.id)
-            
             # 根据线程数配置执行
             thread_count = task.thread_count or 1
+            engine = self._select_engine(task)
             
-            if thread_count == 1:
-                # 单线程执行
-                future = self.executor.submit(task_runner.run)
-                self.task_futures[task.id] = future
-            else:
-                # 多线程执行
-                futures = []
+            # 所有执行器共享启动屏障：只加载一次任务、同步一次网络时间，并在同一时刻释放
+            start_barrier = StartBarrier(task.id, request.id, thread_count)
+            # 所有执行器共享停止令牌：任一执行器得到结果后其余执行器立即停止
+            stop_token = StopToken(thread_count)
+            
+            if engine == ExecutionEngineEnum.ASYNC:
+                # 协程执行：所有 worker 运行在同一个事件循环上
+                group = TaskGroup(task.id, stop_token)
                 for i in range(thread_count):
-                    # 为每个线程创建独立的TaskRunner实例
-                    runner = TaskRunner(task.id, request.id)
-                    future = self.executor.submit(runner.run)
-                    futures.append(future)
+                    runner = AsyncTaskRunner(task.id, request.id, start_barrier, i, stop_token)
+                    group.add(runner, async_engine.submit(runner.run_async()))
+            else:
+                executor = self._dedicated_executor(task, thread_count)
+                group = TaskGroup(task.id, stop_token, executor)
+                executor = executor or self.executor
+                if thread_count > executor._max_workers:
+                    logger.warning(
+                        f"任务 {task.name} 线程数 {thread_count} 超过线程池大小 {executor._max_workers}，"
+                        f"部分线程需排队等待"
+                    )
                 
-                # 使用第一个future作为主要跟踪对象
-                self.task_futures[task.id] = futures[0]
+                # 为每个线程创建独立的TaskRunner实例，传递ID而不是对象来避免跨线程会话问题
+                for i in range(thread_count):
+                    runner = TaskRunner(task.id, request.id, start_barrier, i, stop_token)
+                    group.add(runner, executor.submit(runner.run))
+            
+            self._track_group(group)
             
-            logger.info(f"任务 {task.name} 开始执行，线程数: {thread_count}")
+            logger.info(f"任务 {task.name} 开始执行，线程数: {thread_count}，执行引擎: {engine.value}")
             
         except Exception as e:
             logger.error(f"执行任务 {task.name} 失败: {e}")
             import traceback
             traceback.print_exc()
     
-    def _cleanup_completed_tasks(self) -> None:
-        """清理已完成的任务"""
-        completed_task_ids = []
+    def _dedicated_executor(self, task: Task, thread_count: int) -> Optional[ThreadPoolExecutor]:
+        """
+        指定时间任务按线程数创建专用线程池：执行器提前出队后要在线程中完成对时、代理探测和连接预热并等待开始时间，
+        占用共享线程池会使其他到期任务排队，线程数超过共享线程池大小时部分执行器也会在开始时间之后才运行。
+        其他任务使用共享线程池（返回 None）
+        """
+        schedule_config = task.schedule_config or {}
+        if schedule_config.get("type") != ScheduleTypeEnum.DATETIME or not schedule_config.get("start_time"):
+            return None
+        return ThreadPoolExecutor(max_workers=thread_count, thread_name_prefix=f"task-{task.id}")
+    
+    def _select_engine(self, task: Task) -> ExecutionEngineEnum:
+        """选择执行引擎：任务配置优先，其次为全局配置"""
+        engine_name = (task.schedule_config or {}).get("engine") or settings.execution_engine
+        try:
+            engine = ExecutionEngineEnum(engine_name)
+        except ValueError:
+            logger.warning(f"未知执行引擎 {engine_name}，使用线程池执行")
+            return ExecutionEngineEnum.THREAD
         
-        for task_id, future in self.task_futures.items():
-            if future.done():
-                completed_task_ids.append(task_id)
+        if engine == ExecutionEngineEnum.ASYNC and not is_async_engine_available():
+            logger.warning(f"未安装 httpx，任务 {task.name} 回退到线程池执行")
+            return ExecutionEngineEnum.THREAD
+        return engine
+    
+    def _track_group(self, group: TaskGroup) -> None:
+        """登记执行组，组内所有Future完成后通过回调自动清理"""
+        with self._lock:
+            self.task_groups[group.task_id] = group
+        # 所有Future登记完成后再添加回调，保证只有最后一个完成的Future触发清理
+        for future in group.futures:
+            future.add_done_callback(lambda f, g=group: self._on_runner_done(g, f))
+    
+    def _on_runner_done(self, group: TaskGroup, future: Future) -> None:
+        """执行器Future完成回调：检查异常，组内全部完成后从跟踪列表移除"""
+        task_id = group.task_id
+        if not future.cancelled():
+            exception = future.exception()
+            if exception:
+                logger.error(f"任务 {task_id} 执行异常: {exception}")
                 
+                # 更新任务状态为失败
                 try:
-                    # 检查任务是否有异常
-                    result = future.result()
-                except Exception as e:
-                    logger.error(f"任务 {task_id} 执行异常: {e}")
-                    
-                    # 更新任务状态为失败
-                    try:
-                        with get_db_context() as db:
-                            task_service = TaskService(db)
-                            task_service.update_task_status(task_id, TaskStatusEnum.FAILED)
-                    except Exception:
-                        pass
-        
-        # 从跟踪列表中移除已完成的任务
-        for task_id in completed_task_ids:
-            del self.task_futures[task_id]
+                    with get_db_context() as db:
+                        task_service = TaskService(db)
+                        task_service.update_task_status(task_id, TaskStatusEnum.FAILED)
+                except Exception:
+                    pass
+        
+        if not group.mark_done():
+            return
+        
+        with self._lock:
+            if self.task_groups.get(task_id) is group:
+                del self.task_groups[task_id]
+        
+        # 手动停止的任务不再重新调度
+        if group.stop_token.reason != "stopped":
+            self._rearm_cron_task(task_id)
     
-    def stop_task(self, task_id: int) -> bool:
-        """停止指定任务"""
-        logger.info(f"尝试停止任务 {task_id}")
+    def _rearm_cron_task(self, task_id: int) -> None:
+        """Cron任务执行结束后，按下一个触发时间重新加入定时队列"""
+        try:
+            with get_db_context() as db:
+                task_service = TaskService(db)
+                task = task_service.get_task(task_id)
+                
+                # 被停止的任务不再重新调度
+                if not task or task.status not in [TaskStatusEnum.COMPLETED, TaskStatusEnum.FAILED]:
+                    return
+                
+                schedule_config = task.schedule_config or {}
+                if schedule_config.get("type") != ScheduleTypeEnum.CRON:
+                    return
+                
+                fire_at = self._next_cron_fire_time(
+                    task_id,
+                    schedule_config.get("cron_expression"),
+                    schedule_config.get("timezone")
+                )
+                task = task_service.reschedule_task(task_id, fire_at)
+                self.schedule_task(task)
+                logger.info(f"Cron任务 {task_id} 下次执行时间: {fire_at}")
+                
+        except Exception as e:
+            logger.error(f"Cron任务 {task_id} 重新调度失败: {e}")
+    
+    def _next_cron_fire_time(self, task_id: int, expression: str, timezone: Optional[str]) -> datetime:
+        """从预先计算的触发时间中取出下一个，用完后再批量计算"""
+        now = datetime.now()
+        key = (expression, timezone)
         
-        # 检查任务是否在执行队列中
-        if task_id in self.task_futures:
-            future = self.task_futures[task_id]
-            success = future.cancel()
+        with self._lock:
+            cached = self._cron_fire_times.get(task_id)
+            if cached is None or cached[0] != key:
+                # 表达式或时区变更后丢弃旧的触发时间
+                cached = (key, deque())
+                self._cron_fire_times[task_id] = cached
             
-            logger.info(f"任务 {task_id} Future.cancel() 结果: {success}")
+            fire_times = cached[1]
+            while fire_times and fire_times[0] <= now:
+                fire_times.popleft()
             
-            if success:
-                # 成功取消，从跟踪列表中移除
-                del self.task_futures[task_id]
-                logger.info(f"任务 {task_id} 已从执行队列中移除")
+            if not fire_times:
+                fire_times.extend(
+                    next_fire_times(expression, timezone, self.cron_precompute_count, after=now)
+                )
+            
+            return fire_times.popleft()
+    
+    def stop_task(self, task_id: int) -> bool:
+        """停止指定任务：通知该任务的所有执行器退出并等待"""
+        logger.info(f"尝试停止任务 {task_id}")
+        
+        # 尚未到期的任务直接从定时队列移除
+        self.timer_queue.cancel(task_id)
+        
+        # 执行组保持登记，直到最后一个执行器退出时由 _on_runner_done 移除，
+        # 超时未退出的执行器仍计入运行统计
+        with self._lock:
+            group = self.task_groups.get(task_id)
+        
+        if group is not None:
+            stopped = group.stop(timeout=self.stop_timeout)
+            if stopped:
+                logger.info(f"任务 {task_id} 的 {len(group.runners)} 个执行器已全部停止")
             else:
-                # 取消失败，可能任务已经在执行中，强制移除并设置停止标志
-                logger.warning(f"任务 {task_id} 无法取消，可能已在执行中，尝试强制停止")
-                del self.task_futures[task_id]
-                success = True  # 认为停止成功
-                
-                # 更新数据库中的任务状态
-                try:
-                    with get_db_context() as db:
-                        task_service = TaskService(db)
-                        task_service.update_task_status(task_id, TaskStatusEnum.STOPPED)
-                    logger.info(f"任务 {task_id} 状态已更新为 STOPPED")
-                except Exception as e:
-                    logger.error(f"更新任务 {task_id} 状态失败: {e}")
-                    return False
+                logger.warning(
+                    f"任务 {task_id} 仍有 {group.alive_count} 个执行器未在 {self.stop_timeout} 秒内退出"
+                    f"（正在发送的请求: {group.attempts_in_flight}），将在当前请求结束后退出"
+                )
             
-            return success
+            # 更新数据库中的任务状态
+            try:
+                with get_db_context() as db:
+                    task_service = TaskService(db)
+                    task_service.update_task_status(task_id, TaskStatusEnum.STOPPED)
+                logger.info(f"任务 {task_id} 状态已更新为 STOPPED")
+            except Exception as e:
+                logger.error(f"更新任务 {task_id} 状态失败: {e}")
+                return False
+            return True
         else:
             # 任务不在执行队列中，可能是pending状态还未被调度器执行
             logger.info(f"任务 {task_id} 不在执行队列中，检查数据库状态")
@@ -687,8 +1251,27 @@ class SchedulerService:
             return False
     
     def get_running_task_count(self) -> int:
-        """获取正在运行的任务数量"""
-        return len(self.task_futures)
+        """获取正在运行的任务数量（仍有执行器存活的任务）"""
+        with self._lock:
+            task_groups = list(self.task_groups.values())
+        return sum(1 for group in task_groups if group.alive_count > 0)
+    
+    def get_running_stats(self) -> Dict[str, Any]:
+        """获取运行状态统计：运行中的任务、存活的执行器和正在发送的请求数"""
+        with self._lock:
+            task_groups = list(self.task_groups.values())
+        
+        groups = [group.to_dict() for group in task_groups]
+        return {
+            "running_tasks": sum(1 for group in groups if group["alive"] > 0),
+            "alive_runners": sum(group["alive"] for group in groups),
+            "running_runners": sum(group["running"] for group in groups),
+            "attempts_in_flight": sum(group["attempts_in_flight"] for group in groups),
+            "thread_pool_size": self.executor._max_workers,
+            "record_writer": record_writer.get_stats(),
+            "proxy_pools": proxy_pool_service.get_stats(),
+            "tasks": groups,
+        }
 
 
 # 全局调度服务实例
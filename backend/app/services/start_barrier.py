@@ -0,0 +1,333 @@
+"""
+任务启动屏障
+同一任务的所有执行器共享一个屏障：任务和请求只加载一次，网络时间只确认一次，连接为整个任务一次性预热，
+所有执行器停在同一个截止时间上一起释放，并可按线程序号错开释放时刻
+"""
+
+import asyncio
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from loguru import logger
+
+from ..database import get_db_context
+from ..models.request import HttpRequest
+from ..models.task import Task, ScheduleTypeEnum, ClockSourceEnum, CalibrationProbeEnum
+from .connection_manager import connection_manager
+from .executor_service import ExecutorService
+from .network_time_service import network_time_service, ClockUncertaintyError
+from .precise_timer import precise_timer, ReleaseResult
+from .target_clock import target_clock_calibrator, TargetClockCalibration
+
+
+class FirePlan(NamedTuple):
+    """一个执行器的发出计划，用于记录实际发出与计划的偏差"""
+    deadline_ns: int              # 计划发出时刻 time.monotonic_ns()（含错开偏移）
+    target_ns: int                # 请求应到达的时刻，参考时钟上的 Unix 纳秒（含错开偏移）
+    clock_offset_s: float         # 对时使用的时钟偏移：参考时钟 - 本地时钟（秒）
+    one_way_ms: Optional[float]   # 目标主机时钟校准估计的单程延迟（毫秒），按网络时间对时时为 None
+    clock_source: str             # 对时方式 network / target
+
+
+class StartBarrier:
+    """任务启动屏障"""
+
+    # 等待其余执行器登记预热代理的最长时间（秒），不超过距开始时间的一半
+    PREWARM_GATHER_SECONDS = 5.0
+
+    def __init__(self, task_id: int, request_id: int, parties: int = 1):
+        """
+        Args:
+            task_id: 任务ID
+            request_id: 请求ID
+            parties: 共享屏障的执行器数量（用于计算错开释放的偏移）
+        """
+        self.task_id = task_id
+        self.request_id = request_id
+        self.parties = max(parties, 1)
+
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._task: Optional[Task] = None
+        self._request: Optional[HttpRequest] = None
+        self._deadline_resolved = False
+        self._deadline_ns: Optional[int] = None
+        self._clock_error: Optional[str] = None  # 网络时间误差超过上限时的错误信息
+        self.calibration: Optional[TargetClockCalibration] = None  # 目标主机时钟校准结果
+        self._target_ns: Optional[int] = None  # 开始时间，参考时钟上的 Unix 纳秒
+        self._clock_offset_s = 0.0  # 换算截止时间时使用的时钟偏移（秒）
+        self._warm_cond = threading.Condition()
+        self._warm_proxies: Dict[int, Optional[str]] = {}  # 执行器序号 -> 开始时使用的代理
+        self._warm_results: Optional[Dict[Optional[str], Dict[str, Any]]] = None  # 代理 -> 预热结果
+        self._warming = False
+
+    def load(self) -> Optional[Tuple[Task, HttpRequest]]:
+        """加载任务和请求（只查询一次，会话关闭后对象处于游离状态，已加载的字段仍可访问）"""
+        with self._lock:
+            if not self._loaded:
+                with get_db_context() as db:
+                    self._task = db.query(Task).filter(Task.id == self.task_id).first()
+                    self._request = db.query(HttpRequest).filter(HttpRequest.id == self.request_id).first()
+                self._loaded = True
+
+        if not self._task or not self._request:
+            logger.error(f"任务 {self.task_id} 或请求 {self.request_id} 不存在")
+            return None
+        return self._task, self._request
+
+    def has_start_time(self) -> bool:
+        """任务是否需要等待开始时间"""
+        schedule_config = (self._task.schedule_config if self._task else None) or {}
+        return schedule_config.get("type") == ScheduleTypeEnum.DATETIME and bool(schedule_config.get("start_time"))
+
+    def deadline_for(self, index: int, proxy: Optional[str] = None) -> Optional[int]:
+        """
+        获取第 index 个执行器的释放时刻（time.monotonic_ns()），不需要等待时返回 None
+        第一个调用者负责确认网络时间并换算截止时间（按目标主机时钟对时时经该调用者的代理 proxy 探测），
+        其余调用者直接复用
+
+        Raises:
+            ClockUncertaintyError: 网络时间误差超过任务的 max_clock_uncertainty_ms
+        """
+        with self._lock:
+            if not self._deadline_resolved:
+                try:
+                    self._deadline_ns = self._resolve_deadline(proxy)
+                except ClockUncertaintyError as e:
+                    self._clock_error = str(e)
+                self._deadline_resolved = True
+
+        if self._clock_error is not None:
+            raise ClockUncertaintyError(self._clock_error)
+        if self._deadline_ns is None:
+            return None
+        return self._deadline_ns + self.offset_ns(index)
+
+    def nominal_deadline_ns(self) -> Optional[int]:
+        """按当前网络时间估计的开始时刻（time.monotonic_ns()，不同步、不校准），用于限制开始前准备工作的耗时"""
+        if not self.has_start_time():
+            return None
+        try:
+            schedule_config = self._task.schedule_config
+            target_time = self._parse_start_time(schedule_config.get("start_time"))
+            if schedule_config.get("clock_source") != ClockSourceEnum.TARGET:
+                target_time += timedelta(seconds=self._task.time_diff or 0)
+            return precise_timer.deadline_from_network_time(target_time)
+        except Exception:
+            return None
+
+    def fire_plan(self, index: int) -> Optional[FirePlan]:
+        """第 index 个执行器的发出计划，截止时间尚未换算或不需要等待时返回 None"""
+        if self._deadline_ns is None or self._target_ns is None:
+            return None
+
+        offset_ns = self.offset_ns(index)
+        calibration = self.calibration
+        return FirePlan(
+            deadline_ns=self._deadline_ns + offset_ns,
+            target_ns=self._target_ns + offset_ns,
+            clock_offset_s=self._clock_offset_s,
+            one_way_ms=calibration.one_way_ms if calibration else None,
+            clock_source=ClockSourceEnum.TARGET.value if calibration else ClockSourceEnum.NETWORK.value
+        )
+
+    def offset_ns(self, index: int) -> int:
+        """按 schedule_config 中的 stagger_start_ms ~ stagger_end_ms 线性分配第 index 个执行器的偏移"""
+        schedule_config = (self._task.schedule_config if self._task else None) or {}
+        start_ms = float(schedule_config.get("stagger_start_ms") or 0)
+        end_ms = float(schedule_config.get("stagger_end_ms") or 0)
+        if self.parties == 1 or start_ms == end_ms:
+            return int(start_ms * 1_000_000)
+
+        offset_ms = start_ms + (end_ms - start_ms) * index / (self.parties - 1)
+        return int(offset_ms * 1_000_000)
+
+    def wait(self, index: int, stop_flag: Optional[threading.Event] = None) -> Optional[ReleaseResult]:
+        """等待第 index 个执行器的释放时刻，不需要等待时返回 None"""
+        deadline_ns = self.deadline_for(index)
+        if deadline_ns is None:
+            return None
+        return precise_timer.wait_until(deadline_ns, stop_flag, name=f"任务 {self.task_id}#{index}")
+
+    async def wait_async(self, index: int, stop_flag: Optional[threading.Event] = None) -> Optional[ReleaseResult]:
+        """在事件循环中等待第 index 个执行器的释放时刻"""
+        loop = asyncio.get_running_loop()
+        # 首次换算在网络时间尚未同步或误差不满足时需要同步（阻塞操作），放到线程池中执行
+        deadline_ns = await loop.run_in_executor(None, self.deadline_for, index)
+        if deadline_ns is None:
+            return None
+        return await precise_timer.wait_until_async(deadline_ns, stop_flag, name=f"任务 {self.task_id}#{index}")
+
+    def prewarm(self, index: int, proxy: Optional[str]) -> Dict[str, Any]:
+        """
+        登记第 index 个执行器开始时使用的代理，并等待整个任务一次性预热连接：
+        所有执行器登记后（或等待超时后），按代理分组同时取出与执行器数量相同的连接并发建立，再一起放回连接池，
+        开始时每个执行器都有一个已建立的连接，而不是先后预热的执行器反复预热同一个空闲连接
+
+        Returns:
+            Dict: 该执行器所用代理的预热结果（字段同 ConnectionManager.prewarm）
+        """
+        deadline_ns = self.deadline_for(index)
+        gather_seconds = self.PREWARM_GATHER_SECONDS
+        if deadline_ns is not None:
+            gather_seconds = min(gather_seconds, max((deadline_ns - time.monotonic_ns()) / 1e9 / 2, 0))
+
+        with self._warm_cond:
+            late = self._warm_results is not None or self._warming
+            if not late:
+                self._warm_proxies[index] = proxy
+                self._warm_cond.notify_all()
+                self._warm_cond.wait_for(
+                    lambda: self._warming or len(self._warm_proxies) >= self.parties, gather_seconds
+                )
+                leader = not self._warming
+                if leader:
+                    self._warming = True
+                    proxies = dict(self._warm_proxies)
+                else:
+                    self._warm_cond.wait_for(lambda: self._warm_results is not None)
+
+        if late:
+            # 预热开始后才登记的执行器单独预热
+            return connection_manager.prewarm(self._request.url, ExecutorService._normalize_proxy(proxy))
+
+        if leader:
+            results: Dict[Optional[str], Dict[str, Any]] = {}
+            try:
+                results = self._prewarm_all(proxies)
+            finally:
+                with self._warm_cond:
+                    self._warm_results = results
+                    self._warm_cond.notify_all()
+
+        result = self._warm_results.get(proxy)
+        if result is None:
+            return connection_manager.prewarm(self._request.url, ExecutorService._normalize_proxy(proxy))
+        return result
+
+    def _prewarm_all(self, proxies: Dict[int, Optional[str]]) -> Dict[Optional[str], Dict[str, Any]]:
+        """按代理分组预热，每组的连接数等于使用该代理的执行器数量，各组同时进行"""
+        counts = Counter(proxies.values())
+        url = self._request.url
+        logger.info(f"任务 {self.task_id} 预热 {len(proxies)} 个连接（{len(counts)} 个代理分组）")
+
+        def warm(proxy: Optional[str]) -> Dict[str, Any]:
+            return connection_manager.prewarm(url, ExecutorService._normalize_proxy(proxy), connections=counts[proxy])
+
+        if len(counts) == 1:
+            proxy = next(iter(counts))
+            return {proxy: warm(proxy)}
+        with ThreadPoolExecutor(max_workers=min(len(counts), connection_manager.PREWARM_CONCURRENCY)) as executor:
+            return dict(zip(counts, executor.map(warm, counts)))
+
+    def _resolve_deadline(self, proxy: Optional[str] = None) -> Optional[int]:
+        """确认网络时间可用并将开始时间换算为单调时钟截止时间"""
+        if not self.has_start_time():
+            return None
+
+        try:
+            schedule_config = self._task.schedule_config
+            if schedule_config.get("clock_source") == ClockSourceEnum.TARGET:
+                deadline_ns = self._calibrate_target(schedule_config, proxy)
+                if deadline_ns is not None:
+                    return deadline_ns
+                logger.warning(f"任务 {self.task_id} 目标主机时钟校准失败，改用网络时间")
+
+            target_time = self._resolve_target_time(schedule_config.get("start_time"), self._task.time_diff or 0)
+
+            logger.info(f"任务 {self.task_id} 正在确认网络时间...")
+            self._sync_clock(float(schedule_config.get("max_clock_uncertainty_ms") or 0))
+            self._target_ns = round(target_time.timestamp() * 1e9)
+            self._clock_offset_s = network_time_service.get_time_diff()
+            return precise_timer.deadline_from_network_time(target_time)
+
+        except ClockUncertaintyError:
+            raise
+        except Exception as e:
+            logger.error(f"任务 {self.task_id} 解析开始时间失败: {e}")
+            logger.info(f"任务 {self.task_id} 跳过时间等待，立即开始执行")
+            return None
+
+    def _calibrate_target(self, schedule_config: dict, proxy: Optional[str] = None) -> Optional[int]:
+        """
+        按目标主机时钟换算截止时间：开始时间视为目标主机时钟上的时刻，不再应用手动时间差，
+        并按估计的单程延迟（经执行器使用的代理测得）提前发出，使请求在开始时间到达目标主机。校准失败时返回 None
+        """
+        target_time = self._resolve_target_time(schedule_config.get("start_time"))
+        if self._task.time_diff:
+            logger.info(f"任务 {self.task_id} 按目标主机时钟对时，忽略手动时间差 {self._task.time_diff} 秒")
+
+        probe = schedule_config.get("calibration_probe") or CalibrationProbeEnum.HEAD
+        try:
+            probe = CalibrationProbeEnum(probe)
+        except ValueError:
+            logger.warning(f"任务 {self.task_id} 未知的校准探测方式 {probe}，使用 HEAD 探测")
+            probe = CalibrationProbeEnum.HEAD
+
+        logger.info(f"任务 {self.task_id} 正在校准目标主机时钟{f'（经代理 {proxy}）' if proxy else ''}...")
+        calibration = target_clock_calibrator.calibrate(
+            self._request,
+            probe,
+            schedule_config.get("calibration_timestamp_field") or None,
+            schedule_config.get("calibration_url") or None,
+            proxy
+        )
+        if calibration is None:
+            return None
+        self.calibration = calibration
+        self._target_ns = round(target_time.timestamp() * 1e9)
+        self._clock_offset_s = calibration.offset_s
+
+        max_uncertainty_ms = float(schedule_config.get("max_clock_uncertainty_ms") or 0)
+        if max_uncertainty_ms > 0 and calibration.uncertainty_ms > max_uncertainty_ms:
+            raise ClockUncertaintyError(
+                f"任务 {self.task_id} 目标主机时钟误差 ±{calibration.uncertainty_ms:.2f}ms 超过上限 {max_uncertainty_ms}ms"
+                f"（最小往返 {calibration.rtt_ms:.2f}ms）"
+            )
+
+        compensate_latency = schedule_config.get("compensate_latency", True) is not False
+        if compensate_latency:
+            logger.info(f"任务 {self.task_id} 按单程延迟 {calibration.one_way_ms:.2f}ms 提前发出")
+        return calibration.deadline_for(target_time, compensate_latency)
+
+    def _sync_clock(self, max_uncertainty_ms: float) -> None:
+        """确认网络时间可用（后台已同步且误差满足时不再同步），设置了误差上限时检查误差是否满足"""
+        estimate = network_time_service.ensure_accuracy(max_uncertainty_ms)
+        if max_uncertainty_ms <= 0:
+            return
+
+        if estimate is None:
+            raise ClockUncertaintyError(f"任务 {self.task_id} 网络时间同步失败，无法保证误差不超过 {max_uncertainty_ms}ms")
+        uncertainty_ms = network_time_service.get_uncertainty_ms()
+        if uncertainty_ms > max_uncertainty_ms:
+            raise ClockUncertaintyError(
+                f"任务 {self.task_id} 网络时间误差 ±{uncertainty_ms:.2f}ms 超过上限 {max_uncertainty_ms}ms"
+                f"（最小往返 {estimate.rtt_ms:.2f}ms）"
+            )
+        logger.info(f"任务 {self.task_id} 网络时间误差 ±{uncertainty_ms:.2f}ms，不超过上限 {max_uncertainty_ms}ms")
+
+    @staticmethod
+    def _parse_start_time(start_time_str: str) -> datetime:
+        """解析开始时间（支持毫秒），只有时间没有日期时使用今天的日期"""
+        target_time = network_time_service.parse_time_with_ms(start_time_str)
+        if target_time.year == 1900:  # strptime默认年份
+            today = datetime.now().date()
+            target_time = datetime.combine(today, target_time.time())
+        return target_time
+
+    def _resolve_target_time(self, start_time_str: str, time_diff: float = 0) -> datetime:
+        """解析目标时间并应用时间差调整"""
+        target_time = self._parse_start_time(start_time_str)
+
+        # 应用时间差调整
+        if time_diff != 0:
+            target_time = target_time + timedelta(seconds=time_diff)
+            logger.info(f"任务 {self.task_id} 应用时间差调整: {time_diff}秒，目标时间: {network_time_service.format_time_with_ms(target_time)}")
+        else:
+            logger.info(f"任务 {self.task_id} 目标时间: {network_time_service.format_time_with_ms(target_time)}")
+
+        return target_time
@@ -0,0 +1,161 @@
+"""
+目标主机时钟校准
+指定时间任务真正需要对齐的是目标主机的时钟。开始前经执行器将使用的代理向目标主机发送轻量探测
+（HEAD / OPTIONS，或配置的空跑地址），从响应的 Date 头或 JSON 时间戳字段估计目标主机相对本地时钟的时间差，
+并用最小往返时间估计单程延迟。探测不会重放任务自身的请求，开始前不会产生下单等副作用
+
+Date 头只有秒级精度：每个样本只能说明服务器时间落在某一秒之内。之后的探测按当前估计对准服务器的
+整秒边界发出，响应落在边界前还是边界后都会把时间差区间缩小一半，直到区间不再大于往返时间。
+采样本身由 time_sources 中的 HTTP 时间源完成，与网络时间同步共用
+"""
+
+import time
+from datetime import datetime
+from typing import NamedTuple, Optional, Tuple
+
+import requests
+from loguru import logger
+
+from ..config import settings
+from ..models.request import HttpRequest
+from ..models.task import CalibrationProbeEnum
+from .connection_manager import connection_manager
+from .executor_service import ExecutorService
+from .proxy_probe import target_key
+from .time_sources import HttpDateTimeSource, HttpJsonTimeSource, HttpTimeSource, combine_samples
+
+
+class TargetClockCalibration(NamedTuple):
+    """目标主机时钟的校准结果"""
+    target: str             # 目标主机 scheme://host:port
+    source: str             # 时间来源: date（Date 头）/ json（JSON 时间戳字段）
+    offset_s: float         # 目标主机时间 - 本地时间（秒）
+    uncertainty_ms: float   # 时间差误差上限（毫秒）
+    rtt_ms: float           # 最小往返时间（毫秒）
+    one_way_ms: float       # 估计的单程延迟（毫秒）
+    samples: int            # 样本数
+    calibrated_ns: int      # 校准完成时的 time.monotonic_ns()
+
+    def deadline_for(self, target_time: datetime, compensate_latency: bool = True) -> int:
+        """
+        将目标主机时钟上的开始时间换算为 time.monotonic_ns() 发送时刻
+
+        Args:
+            target_time: 目标主机时钟上的开始时间（本地时区）
+            compensate_latency: 是否提前单程延迟发出，使请求在开始时间到达目标主机
+        """
+        now_ns = time.monotonic_ns()
+        wall_ns = time.time_ns()
+        remaining_ns = round(target_time.timestamp() * 1e9) - wall_ns - round(self.offset_s * 1e9)
+        if compensate_latency:
+            remaining_ns -= round(self.one_way_ms * 1e6)
+        return now_ns + remaining_ns
+
+
+class TargetClockCalibrator:
+    """目标主机时钟校准器"""
+
+    def calibrate(
+        self,
+        request: HttpRequest,
+        probe: CalibrationProbeEnum = CalibrationProbeEnum.HEAD,
+        timestamp_field: Optional[str] = None,
+        calibration_url: Optional[str] = None,
+        proxy: Optional[str] = None
+    ) -> Optional[TargetClockCalibration]:
+        """
+        校准目标主机时钟，失败时返回 None
+
+        Args:
+            request: 任务的请求（只使用其地址和请求头，不会发送请求本身）
+            probe: 探测方式
+            timestamp_field: url 探测时 JSON 响应中时间戳的字段路径（如 data.serverTime），为空时使用 Date 头
+            calibration_url: url 探测时请求的空跑地址（与任务请求同一主机、没有副作用的接口）
+            proxy: 执行器将使用的代理，探测经同一代理发送，测得的单程延迟与实际请求的路径一致
+        """
+        target = target_key(request.url)
+        source = self._build_source(request, probe, timestamp_field, calibration_url, proxy)
+
+        try:
+            samples = source.collect(
+                settings.time_sync_target_samples, settings.time_sync_timeout, settings.time_sync_sample_interval_ms
+            )
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"目标主机 {target} 时钟校准请求失败: {e}")
+            return None
+
+        if not samples:
+            logger.warning(f"目标主机 {target} 的响应中没有可用的时间（{timestamp_field or 'Date 头'}），无法校准")
+            return None
+
+        # 区间不相交时（负载均衡后多台服务器时钟不一致）使用往返时间最小的样本
+        lower_ns, upper_ns, _ = combine_samples(samples)
+        min_rtt_ns = min(s.rtt_ns for s in samples)
+        calibration = TargetClockCalibration(
+            target=target,
+            source=source.kind,
+            offset_s=(lower_ns + upper_ns) / 2 / 1e9,
+            uncertainty_ms=(upper_ns - lower_ns) / 2 / 1e6,
+            rtt_ms=min_rtt_ns / 1e6,
+            one_way_ms=min_rtt_ns / 2 / 1e6,
+            samples=len(samples),
+            calibrated_ns=time.monotonic_ns()
+        )
+        logger.info(
+            f"目标主机 {target} 时钟校准完成: 时间差 {calibration.offset_s * 1000:.2f}ms，"
+            f"误差 ±{calibration.uncertainty_ms:.2f}ms，最小往返 {calibration.rtt_ms:.2f}ms，样本 {calibration.samples}"
+        )
+        return calibration
+
+    @classmethod
+    def _build_source(
+        cls,
+        request: HttpRequest,
+        probe: CalibrationProbeEnum,
+        timestamp_field: Optional[str],
+        calibration_url: Optional[str] = None,
+        proxy: Optional[str] = None
+    ) -> HttpTimeSource:
+        """按探测方式构建目标主机的时间源"""
+        method, url, headers = cls._build_probe(request, probe, calibration_url)
+        proxy = ExecutorService._normalize_proxy(proxy)
+        options = dict(
+            method=method, headers=headers, name=target_key(request.url),
+            session_factory=lambda: cls._create_session(proxy)
+        )
+        if timestamp_field and method == "GET":
+            return HttpJsonTimeSource(url, path=timestamp_field, **options)
+        return HttpDateTimeSource(url, **options)
+
+    @staticmethod
+    def _create_session(proxy: Optional[str]) -> requests.Session:
+        """创建探测使用的 Session（共享连接池，经代理时与执行器使用同一代理）"""
+        session = connection_manager.create_session()
+        if proxy:
+            session.proxies = {"http": proxy, "https": proxy}
+        return session
+
+    @staticmethod
+    def _build_probe(
+        request: HttpRequest,
+        probe: CalibrationProbeEnum,
+        calibration_url: Optional[str] = None
+    ) -> Tuple[str, str, dict]:
+        """构建探测请求（不带请求体），返回 (method, url, headers)"""
+        url, headers, params, _ = ExecutorService._merge_override_params(request)
+        headers = {k: v for k, v in headers.items() if k.lower() not in ("content-type", "content-length")}
+
+        if probe == CalibrationProbeEnum.URL:
+            if calibration_url:
+                return "GET", calibration_url, headers
+            logger.warning(f"目标主机 {target_key(request.url)} 未配置校准地址 calibration_url，改用 HEAD 探测")
+        elif probe == CalibrationProbeEnum.REQUEST:
+            logger.warning("探测方式 request 已废弃（开始前重放任务请求可能产生副作用），改用 HEAD 探测")
+
+        method = "OPTIONS" if probe == CalibrationProbeEnum.OPTIONS else "HEAD"
+        url, _, _ = ExecutorService._build_request_args(method, url, headers, params, None)
+        return method, url, headers
+
+
+# 全局目标主机时钟校准器实例
+target_clock_calibrator = TargetClockCalibrator()
@@ -0,0 +1,175 @@
+"""
+任务执行组
+同一任务一次调度产生的所有执行器共享的协作状态
+"""
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+
+class StopToken:
+    """
+    任务停止令牌
+
+    同一任务的所有执行器共享一个令牌：任一执行器得到终止结果（成功或满足停止条件）
+    或任务被手动停止时取消令牌，其余执行器在下一次尝试前或休眠中立即退出。
+    接口与 threading.Event 兼容（is_set / set / wait），可以直接作为停止标志使用。
+    """
+
+    def __init__(self, parties: int = 1):
+        """
+        Args:
+            parties: 共享令牌的执行器数量
+        """
+        self.parties = max(parties, 1)
+        self.reason: Optional[str] = None  # 取消原因
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._remaining = self.parties  # 尚未结束的执行器数量
+        self._listeners: List[Callable[[], None]] = []  # 取消时回调（唤醒在其他同步原语上等待的执行器）
+
+    def cancel(self, reason: str = "stopped") -> bool:
+        """取消令牌，只有第一个调用者返回 True（由它负责写入任务的最终状态）"""
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self.reason = reason
+            self._event.set()
+            listeners, self._listeners = self._listeners, []
+        for listener in listeners:
+            listener()
+        return True
+
+    def add_listener(self, callback: Callable[[], None]) -> None:
+        """登记取消回调，令牌已取消时立即调用"""
+        with self._lock:
+            if not self._event.is_set():
+                self._listeners.append(callback)
+                return
+        callback()
+
+    def remove_listener(self, callback: Callable[[], None]) -> None:
+        """注销取消回调"""
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def set(self) -> None:
+        """手动停止（与 threading.Event.set 兼容）"""
+        self.cancel("stopped")
+
+    def is_set(self) -> bool:
+        """是否已取消"""
+        return self._event.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """休眠直到超时或令牌被取消，返回是否已取消"""
+        return self._event.wait(timeout)
+
+    def runner_exhausted(self) -> bool:
+        """
+        执行器在没有得到终止结果的情况下结束（尝试次数用完或执行异常）
+
+        Returns:
+            bool: 是否为最后一个结束的执行器且令牌未被取消，此时由调用者写入任务的最终状态
+        """
+        with self._lock:
+            self._remaining -= 1
+            return self._remaining <= 0 and not self._event.is_set()
+
+
+class TaskGroup:
+    """
+    任务执行组
+
+    登记一次调度产生的所有执行器及其 Future，提供协作式停止（设置所有执行器共享的停止令牌并等待退出），
+    并统计存活线程数和正在发送的请求数用于容量统计。
+    """
+
+    def __init__(self, task_id: int, stop_token: StopToken, executor: Optional[ThreadPoolExecutor] = None):
+        """
+        Args:
+            task_id: 任务ID
+            stop_token: 组内执行器共享的停止令牌
+            executor: 执行组专用的线程池（组内执行器全部结束后关闭），使用共享线程池时为 None
+        """
+        self.task_id = task_id
+        self.stop_token = stop_token
+        self.executor = executor
+        self.runners: List[Any] = []
+        self.futures: List[Future] = []
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._pending = 0  # 尚未结束的 Future 数量
+
+    def add(self, runner: Any, future: Future) -> None:
+        """登记执行器及其 Future"""
+        with self._lock:
+            self.runners.append(runner)
+            self.futures.append(future)
+            self._pending += 1
+
+    def mark_done(self) -> bool:
+        """某个 Future 结束，返回是否为组内最后一个结束的（此时关闭专用线程池）"""
+        with self._lock:
+            self._pending -= 1
+            if self._pending != 0:
+                return False
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+        return True
+
+    def done(self) -> bool:
+        """组内所有执行器是否都已结束"""
+        return all(future.done() for future in self.futures)
+
+    @property
+    def alive_count(self) -> int:
+        """尚未结束的执行器数量（包括排队等待线程的执行器）"""
+        return sum(1 for future in self.futures if not future.done())
+
+    @property
+    def running_count(self) -> int:
+        """已开始运行（占用线程或协程）的执行器数量"""
+        return sum(1 for runner in self.runners if getattr(runner, "running", False))
+
+    @property
+    def attempts_in_flight(self) -> int:
+        """正在发送的请求数"""
+        return sum(1 for runner in self.runners if getattr(runner, "in_flight", False))
+
+    def stop(self, timeout: float = 5) -> bool:
+        """
+        协作式停止：设置停止令牌，取消尚未开始的执行器，并等待运行中的执行器退出
+
+        Args:
+            timeout: 等待运行中的执行器退出的秒数
+
+        Returns:
+            bool: 所有执行器是否已在超时前退出
+        """
+        self.stop_token.set()
+        for future in self.futures:
+            future.cancel()
+
+        _, not_done = wait(self.futures, timeout=timeout)
+        return not not_done
+
+    def join(self) -> None:
+        """等待专用线程池中的执行器全部退出（调度服务停止时调用）"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """执行组状态"""
+        return {
+            "task_id": self.task_id,
+            "runners": len(self.runners),
+            "alive": self.alive_count,
+            "running": self.running_count,
+            "attempts_in_flight": self.attempts_in_flight,
+            "stopping": self.stop_token.is_set(),
+            "started_at": self.started_at,
+        }
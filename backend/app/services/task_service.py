@@ -2,20 +2,51 @@
 任务管理服务
 """
 
-from typing import List, Optional
-from datetime import datetime, timedelta
+import math
+from typing import Any, Dict, List, Optional
+from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import or_, func, update
 
 from ..models.task import Task, TaskTypeEnum, TaskStatusEnum, ScheduleTypeEnum
 from ..models.request import HttpRequest
+from ..models.execution import ExecutionRecord
 from ..schemas.task import TaskCreate, TaskUpdate
 from ..config import settings
+from ..utils.cron import next_fire_times
+
+
+def summarize_distribution(values: List[float], digits: int = 1) -> Optional[Dict[str, float]]:
+    """数值分布：数量、最小/最大值、均值、标准差和 p50/p90/p99（最近秩），没有数据时返回 None"""
+    if not values:
+        return None
+    
+    ordered = sorted(values)
+    count = len(ordered)
+    mean = sum(ordered) / count
+    stdev = (sum((v - mean) ** 2 for v in ordered) / count) ** 0.5
+    
+    def percentile(p: float) -> float:
+        return ordered[min(max(math.ceil(p * count / 100) - 1, 0), count - 1)]
+    
+    return {
+        "count": count,
+        "min": round(ordered[0], digits),
+        "p50": round(percentile(50), digits),
+        "p90": round(percentile(90), digits),
+        "p99": round(percentile(99), digits),
+        "max": round(ordered[-1], digits),
+        "mean": round(mean, digits),
+        "stdev": round(stdev, digits),
+    }
 
 
 class TaskService:
     """任务管理服务类"""
     
+    # 相邻两条首次尝试记录的计划发出时刻相差超过该值（秒）时视为不同次的开始时间
+    TIMING_RUN_GAP_SECONDS = 30
+    
     def __init__(self, db: Session):
         self.db = db
     
@@ -147,6 +178,17 @@ class TaskService:
         # 如果任务被停止，清除下次执行时间
         if status == TaskStatusEnum.STOPPED:
             db_task.next_execution_at = None
+        elif status in (TaskStatusEnum.COMPLETED, TaskStatusEnum.FAILED):
+            # 任务结束：单次任务不再执行；Cron任务由调度服务重新入队时设置下次执行时间（reschedule_task）；
+            # 其他任务重新计算下次执行时间
+            schedule_type = (db_task.schedule_config or {}).get("type")
+            if db_task.task_type == TaskTypeEnum.SINGLE:
+                db_task.next_execution_at = None
+            elif schedule_type != ScheduleTypeEnum.CRON:
+                try:
+                    db_task.next_execution_at = self._calculate_next_execution(db_task.schedule_config)
+                except ValueError:
+                    db_task.next_execution_at = None
         elif status == TaskStatusEnum.RUNNING and db_task.task_type != TaskTypeEnum.SINGLE:
             # 如果任务重新启动，重新计算下次执行时间
             from ..schemas.task import ScheduleConfigSchema
@@ -159,48 +201,46 @@ class TaskService:
         self.db.refresh(db_task)
         return db_task
     
-    def get_pending_tasks(self) -> List[Task]:
-        """获取待执行的任务"""
-        now = datetime.now()
-        return self.db.query(Task).filter(
-            and_(
-                Task.status == TaskStatusEnum.PENDING,
-                or_(
-                    Task.next_execution_at.is_(None),  # 立即执行
-                    Task.next_execution_at <= now      # 到时间执行
-                )
-            )
-        ).all()
-    
-    def get_running_tasks(self) -> List[Task]:
-        """获取运行中的任务"""
-        return self.db.query(Task).filter(Task.status == TaskStatusEnum.RUNNING).all()
+    def get_schedulable_tasks(self) -> List[Task]:
+        """获取所有待执行的任务（包括尚未到执行时间的任务），用于调度器启动时加载定时队列"""
+        return self.db.query(Task).filter(Task.status == TaskStatusEnum.PENDING).all()
     
-    def increment_execution_count(self, task_id: int, success: bool = True) -> None:
-        """增加执行计数"""
+    def reschedule_task(self, task_id: int, next_execution_at: datetime) -> Optional[Task]:
+        """将任务重新置为待执行状态并设置下次执行时间（用于周期性任务）"""
         db_task = self.get_task(task_id)
         if not db_task:
-            return
-        
-        db_task.execution_count += 1
-        db_task.last_execution_at = datetime.now()
+            return None
         
-        if success:
-            db_task.success_count += 1
-        else:
-            db_task.failure_count += 1
+        db_task.status = TaskStatusEnum.PENDING
+        db_task.next_execution_at = next_execution_at
         
-        # 对于单次任务，执行后设为完成
-        if db_task.task_type == TaskTypeEnum.SINGLE:
-            db_task.status = TaskStatusEnum.COMPLETED
-            db_task.next_execution_at = None
-        else:
-            # 计算下次执行时间
-            from ..schemas.task import ScheduleConfigSchema
-            schedule_config = ScheduleConfigSchema(**db_task.schedule_config)
-            next_execution_at = self._calculate_next_execution(schedule_config)
-            db_task.next_execution_at = next_execution_at
+        self.db.commit()
+        self.db.refresh(db_task)
+        return db_task
+    
+    def get_running_tasks(self) -> List[Task]:
+        """获取运行中的任务"""
+        return self.db.query(Task).filter(Task.status == TaskStatusEnum.RUNNING).all()
+    
+    def apply_execution_deltas(self, deltas: Dict[int, Dict[str, Any]]) -> None:
+        """
+        批量累加执行统计，每个任务一条 UPDATE 语句，不加载任务对象
         
+        Args:
+            deltas: {task_id: {"executions": 次数, "successes": 成功次数, "failures": 失败次数, "last_execution_at": 最后执行时间}}
+        """
+        for task_id, delta in deltas.items():
+            self.db.execute(
+                update(Task)
+                .where(Task.id == task_id)
+                .values(
+                    execution_count=func.coalesce(Task.execution_count, 0) + delta["executions"],
+                    success_count=func.coalesce(Task.success_count, 0) + delta["successes"],
+                    failure_count=func.coalesce(Task.failure_count, 0) + delta["failures"],
+                    last_execution_at=delta["last_execution_at"],
+                )
+                .execution_options(synchronize_session=False)
+            )
         self.db.commit()
     
     def count_tasks(self, status: Optional[TaskStatusEnum] = None) -> int:
@@ -232,12 +272,79 @@ class TaskService:
                 except Exception:
                     return None
         elif config.type == ScheduleTypeEnum.CRON:
-            # 这里需要实现cron表达式解析
-            # 暂时简化处理，每5分钟执行一次
-            return datetime.now() + timedelta(minutes=5)
+            if not config.cron_expression:
+                raise ValueError("Cron调度必须设置cron_expression")
+            # 表达式编译结果有缓存，重复计算不会重新解析
+            return next_fire_times(config.cron_expression, config.timezone)[0]
         
         return None
     
+    def get_timing_report(self, task_id: int, runs: int = 1) -> Dict[str, Any]:
+        """
+        发出时刻报告：最近 runs 次开始时间各线程首次请求的发出误差和到达误差分布
+        
+        发出误差 = 实际发出时刻 - 计划发出时刻（微秒），包含释放误差和释放后到请求发出之间的耗时；
+        到达误差为执行记录中估计的到达时刻 - 开始时间（微秒）
+        """
+        query = (
+            self.db.query(ExecutionRecord)
+            .filter(ExecutionRecord.task_id == task_id, ExecutionRecord.planned_send_at.isnot(None))
+            .order_by(ExecutionRecord.planned_send_at.desc())
+        )
+        
+        # 按计划发出时刻从近到远分组，每组是一次开始时间
+        groups: List[List[ExecutionRecord]] = []
+        gap_us = self.TIMING_RUN_GAP_SECONDS * 1_000_000
+        for record in query:
+            if not groups or groups[-1][-1].planned_send_at - record.planned_send_at > gap_us:
+                if len(groups) == runs:
+                    break
+                groups.append([])
+            groups[-1].append(record)
+        
+        run_reports = [self._timing_run_report(group) for group in groups]
+        records = [row for run in run_reports for row in run.pop("records")]
+        return {
+            "task_id": task_id,
+            "runs": run_reports,
+            "send_error_us": summarize_distribution([r["send_error_us"] for r in records if r["send_error_us"] is not None]),
+            "arrival_error_us": summarize_distribution([r["arrival_error_us"] for r in records if r["arrival_error_us"] is not None]),
+            "release_error_us": summarize_distribution([r["release_error_us"] for r in records if r["release_error_us"] is not None]),
+            "first_byte_ms": summarize_distribution([r["first_byte_ms"] for r in records if r["first_byte_ms"] is not None], 3),
+            "records": records,
+        }
+    
+    @staticmethod
+    def _timing_run_report(group: List[ExecutionRecord]) -> Dict[str, Any]:
+        """一次开始时间的发出时刻统计（records 为按计划发出时刻排序的各线程明细）"""
+        rows = []
+        for record in sorted(group, key=lambda r: r.planned_send_at):
+            rows.append({
+                "record_id": record.id,
+                "thread_id": record.thread_id,
+                "status": record.status.value if record.status else None,
+                "response_code": record.response_code,
+                "planned_send_at": record.planned_send_at,
+                "sent_at": record.sent_at,
+                "send_error_us": record.sent_at - record.planned_send_at if record.sent_at is not None else None,
+                "release_error_us": record.release_error,
+                "arrival_error_us": record.arrival_error,
+                "first_byte_ms": record.first_byte_time,
+                "clock_offset_ms": record.clock_offset,
+                "clock_source": record.clock_source,
+            })
+        
+        first = rows[0]
+        return {
+            "planned_start": datetime.fromtimestamp(first["planned_send_at"] / 1e6).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],
+            "threads": len(rows),
+            "clock_source": first["clock_source"],
+            "clock_offset_ms": first["clock_offset_ms"],
+            "send_error_us": summarize_distribution([r["send_error_us"] for r in rows if r["send_error_us"] is not None]),
+            "arrival_error_us": summarize_distribution([r["arrival_error_us"] for r in rows if r["arrival_error_us"] is not None]),
+            "records": rows,
+        }
+    
     def duplicate_task(self, task_id: int, new_name: str) -> Optional[Task]:
         """复制任务"""
         original = self.get_task(task_id)
@@ -0,0 +1,490 @@
+"""
+时间源
+网络时间同步和目标主机时钟校准共用的时间源实现。每个时间源在同一个连接（HTTP 保持连接的会话或同一个 UDP 套接字）
+上连续采样，每个样本给出时间差（时间源时间 - 本地时间）的一个区间；各时间源分别记录成功次数、往返时间和误差，
+同步时按表现排序，选用误差最小的时间源
+
+支持的类型（config.json 的 time_sync.sources）：
+- json:    HTTP 响应体中的时间戳字段，按字段路径提取，如 {"type": "json", "url": "...", "path": "data.t"}
+- date:    HTTP Date 响应头，如 {"type": "date", "url": "https://www.example.com/"}
+- ntp:     NTP 服务器（UDP），如 {"type": "ntp", "host": "ntp.aliyun.com"}
+- fixture: 进程内启动的本地模拟时间服务器，如 {"type": "fixture", "offset_ms": 0}，用于离线运行
+"""
+
+import json
+import math
+import socket
+import threading
+import time
+from abc import ABC, abstractmethod
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import requests
+from loguru import logger
+
+from .local_time_server import LocalTimeServer, from_ntp_timestamp, to_ntp_timestamp
+
+
+class ClockSample(NamedTuple):
+    """一次采样：时间差落在 [lower_ns, upper_ns] 区间内"""
+    rtt_ns: int
+    lower_ns: int
+    upper_ns: int
+
+
+class TimeSourceError(RuntimeError):
+    """时间源配置错误"""
+
+
+def intersect_samples(samples: Sequence[ClockSample]) -> Optional[Tuple[int, int]]:
+    """多个样本区间的交集 (lower_ns, upper_ns)，不相交时返回 None"""
+    lower_ns = max(s.lower_ns for s in samples)
+    upper_ns = min(s.upper_ns for s in samples)
+    if lower_ns > upper_ns:
+        return None
+    return lower_ns, upper_ns
+
+
+def combine_samples(samples: Sequence[ClockSample], best: int = 0) -> Tuple[int, int, int]:
+    """
+    合并样本得到时间差区间，返回 (lower_ns, upper_ns, 参与的样本数)
+
+    优先使用全部样本区间的交集；不相交时（服务器时间抖动或负载均衡后多台服务器时钟不一致）
+    改用往返时间最小的 best 个样本，仍不相交时只用往返时间最小的样本
+    """
+    bounds = intersect_samples(samples)
+    if bounds is not None:
+        return bounds[0], bounds[1], len(samples)
+
+    ranked = sorted(samples, key=lambda s: s.rtt_ns)
+    if best > 1:
+        bounds = intersect_samples(ranked[:best])
+        if bounds is not None:
+            return bounds[0], bounds[1], min(best, len(ranked))
+    return ranked[0].lower_ns, ranked[0].upper_ns, 1
+
+
+def parse_epoch(value: Any) -> Tuple[int, int]:
+    """解析秒或毫秒时间戳（数字或数字字符串），返回 (纳秒时间戳, 分辨率纳秒)"""
+    number = float(value)
+    if number >= 1e11:
+        return int(number) * 1_000_000, 1_000_000  # 毫秒时间戳
+    if number != int(number):
+        return int(number * 1000) * 1_000_000, 1_000_000  # 带小数的秒，按毫秒精度处理
+    return int(number) * 1_000_000_000, 1_000_000_000
+
+
+def extract_json_path(data: Any, path: str) -> Any:
+    """按点分隔的字段路径取值，列表用数字下标，如 data.items.0.time"""
+    for key in path.split("."):
+        data = data[int(key)] if isinstance(data, list) else data[key]
+    return data
+
+
+def parse_http_date(value: Optional[str]) -> Optional[Tuple[int, int]]:
+    """解析 HTTP Date 头，返回 (纳秒时间戳, 分辨率纳秒)"""
+    if not value:
+        return None
+    try:
+        return int(parsedate_to_datetime(value).timestamp()) * 1_000_000_000, 1_000_000_000
+    except (TypeError, ValueError):
+        return None
+
+
+class TimeSourceStats:
+    """时间源的表现统计"""
+
+    __slots__ = (
+        "successes", "failures", "consecutive_failures", "rtt_ms",
+        "uncertainty_ms", "last_error", "last_success_at", "retry_at_ns"
+    )
+
+    # 往返时间的 EWMA 平滑系数
+    RTT_ALPHA = 0.3
+
+    # 连续失败后的首次退避时间和最长退避时间（秒），退避期间同步时跳过该时间源
+    BACKOFF_BASE = 30.0
+    BACKOFF_MAX = 1800.0
+
+    def __init__(self):
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.rtt_ms: Optional[float] = None         # 最小往返时间的 EWMA（毫秒）
+        self.uncertainty_ms: Optional[float] = None  # 最近一次采样得到的误差（毫秒）
+        self.last_error: Optional[str] = None
+        self.last_success_at: Optional[float] = None
+        self.retry_at_ns = 0
+
+    def record_success(self, rtt_ms: float, uncertainty_ms: float) -> None:
+        """记录一次成功的采样"""
+        self.successes += 1
+        self.consecutive_failures = 0
+        self.rtt_ms = rtt_ms if self.rtt_ms is None else self.rtt_ms + self.RTT_ALPHA * (rtt_ms - self.rtt_ms)
+        self.uncertainty_ms = uncertainty_ms
+        self.last_error = None
+        self.last_success_at = time.time()
+        self.retry_at_ns = 0
+
+    def record_failure(self, error: str) -> None:
+        """记录一次失败的采样，连续失败时按指数退避暂停使用"""
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.last_error = error
+        backoff = min(self.BACKOFF_BASE * 2 ** (self.consecutive_failures - 1), self.BACKOFF_MAX)
+        self.retry_at_ns = time.monotonic_ns() + int(backoff * 1e9)
+
+    def available(self, now_ns: int) -> bool:
+        """是否可以参与本次同步"""
+        return self.consecutive_failures == 0 or now_ns >= self.retry_at_ns
+
+    def sort_key(self) -> Tuple[bool, float, float]:
+        """排序键：未失败的在前，误差小的在前，尚无统计的排在有统计的之后"""
+        return (
+            self.consecutive_failures > 0,
+            self.uncertainty_ms if self.uncertainty_ms is not None else math.inf,
+            self.rtt_ms if self.rtt_ms is not None else math.inf,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        total = self.successes + self.failures
+        return {
+            "successes": self.successes,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "success_rate": round(self.successes / total, 4) if total else None,
+            "rtt_ms": round(self.rtt_ms, 3) if self.rtt_ms is not None else None,
+            "uncertainty_ms": round(self.uncertainty_ms, 3) if self.uncertainty_ms is not None else None,
+            "last_error": self.last_error,
+            "last_success_at": self.last_success_at,
+        }
+
+
+class TimeSource(ABC):
+    """时间源基类"""
+
+    kind = ""
+
+    def __init__(self, name: Optional[str] = None):
+        self.name = name or self.kind
+        self.stats = TimeSourceStats()
+
+    @abstractmethod
+    def collect(self, samples: int, timeout: float, interval_ms: float = 0) -> List[ClockSample]:
+        """
+        连续采样
+
+        Args:
+            samples: 最多采样次数
+            timeout: 单次请求的超时（秒）
+            interval_ms: 相邻两次采样的间隔（毫秒）
+
+        Raises:
+            requests.exceptions.RequestException / OSError: 一个样本都没有取得时的网络错误
+        """
+
+    def describe(self) -> Dict[str, Any]:
+        """时间源信息和统计"""
+        return {"name": self.name, "type": self.kind, **self.stats.to_dict()}
+
+
+class HttpTimeSource(TimeSource):
+    """
+    HTTP 时间源基类
+
+    在同一个会话上连续请求，第一次请求同时完成 DNS、TCP 和 TLS，它的区间较宽但同样有效。
+    本地时间只在开始时读取一次系统时钟，之后都用 perf_counter_ns 推算。
+    时间戳分辨率较低（如 Date 头只有秒级）时，后续请求按当前估计对准时间源的整秒边界发出，
+    每次把区间缩小一半，区间不大于往返时间后停止
+    """
+
+    # 时间戳分辨率不小于该值（纳秒）时按整秒边界安排采样
+    BISECT_RESOLUTION_NS = 100_000_000
+
+    # 按边界安排采样时至少留出的提前量（纳秒）
+    SCHEDULE_MARGIN_NS = 2_000_000
+
+    DEFAULT_HEADERS = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+    }
+
+    def __init__(
+        self,
+        url: str,
+        method: str = "GET",
+        headers: Optional[Mapping[str, str]] = None,
+        data: Optional[str] = None,
+        json_body: Optional[Any] = None,
+        name: Optional[str] = None,
+        session_factory: Optional[Callable[[], requests.Session]] = None
+    ):
+        super().__init__(name or url)
+        self.url = url
+        self.method = method.upper()
+        self.headers = dict(self.DEFAULT_HEADERS if headers is None else headers)
+        self.data = data
+        self.json_body = json_body
+        self.session_factory = session_factory or requests.Session
+
+    @abstractmethod
+    def extract(self, headers: Mapping[str, str], content: bytes) -> Optional[Tuple[int, int]]:
+        """从响应中取出时间源时间，返回 (纳秒时间戳, 分辨率纳秒)，没有可用时间时返回 None"""
+
+    def collect(self, samples: int, timeout: float, interval_ms: float = 0) -> List[ClockSample]:
+        collected: List[ClockSample] = []
+        resolution_ns = 0
+        session = self.session_factory()
+
+        try:
+            anchor_wall_ns = time.time_ns()
+            anchor_perf_ns = time.perf_counter_ns()
+
+            for index in range(max(samples, 1)):
+                if collected and resolution_ns >= self.BISECT_RESOLUTION_NS:
+                    lower_ns, upper_ns, _ = combine_samples(collected)
+                    min_rtt_ns = min(s.rtt_ns for s in collected)
+                    if upper_ns - lower_ns <= min_rtt_ns:
+                        break  # 区间已不大于往返时间，继续采样不会更准确
+                    self._sleep_until_boundary((lower_ns + upper_ns) // 2, min_rtt_ns, resolution_ns, anchor_wall_ns, anchor_perf_ns)
+                elif index > 0 and interval_ms > 0:
+                    time.sleep(interval_ms / 1000)
+
+                sent_ns = time.perf_counter_ns()
+                response = session.request(
+                    self.method, self.url, headers=self.headers, data=self.data, json=self.json_body,
+                    timeout=timeout, allow_redirects=False, stream=True
+                )
+                received_ns = time.perf_counter_ns()
+                # 读完响应体后连接放回连接池，下一次采样直接复用
+                content = response.content
+
+                stamp = self.extract(response.headers, content)
+                if stamp is None:
+                    logger.debug(f"时间源 {self.name} 的响应中没有可用的时间（状态码 {response.status_code}）")
+                    if not collected:
+                        break  # 首次响应就没有时间，多半是地址或字段配置有误，不再继续请求
+                    continue
+
+                # 时间源时间 T 满足 server_ns <= T < server_ns + 分辨率，且打时间戳的本地时刻在发出和收到之间
+                server_ns, resolution_ns = stamp
+                collected.append(ClockSample(
+                    rtt_ns=received_ns - sent_ns,
+                    lower_ns=server_ns - (anchor_wall_ns + received_ns - anchor_perf_ns),
+                    upper_ns=server_ns + resolution_ns - (anchor_wall_ns + sent_ns - anchor_perf_ns)
+                ))
+
+        except requests.exceptions.RequestException as e:
+            if not collected:
+                raise
+            logger.debug(f"时间源 {self.name} 采样中断，使用已取得的 {len(collected)} 个样本: {e}")
+        finally:
+            session.close()
+
+        return collected
+
+    def _sleep_until_boundary(
+        self,
+        offset_ns: int,
+        rtt_ns: int,
+        resolution_ns: int,
+        anchor_wall_ns: int,
+        anchor_perf_ns: int
+    ) -> None:
+        """等待到下一次采样的发出时刻：按估计的时间差 offset_ns，让时间源恰好在下一个分辨率边界处打时间戳"""
+        now_local_ns = anchor_wall_ns + time.perf_counter_ns() - anchor_perf_ns
+        earliest_source_ns = now_local_ns + offset_ns + rtt_ns // 2 + self.SCHEDULE_MARGIN_NS
+        boundary_ns = math.ceil(earliest_source_ns / resolution_ns) * resolution_ns
+        send_perf_ns = anchor_perf_ns + (boundary_ns - offset_ns - rtt_ns // 2) - anchor_wall_ns
+
+        remaining_ns = send_perf_ns - time.perf_counter_ns()
+        if remaining_ns > 1_000_000:
+            time.sleep((remaining_ns - 1_000_000) / 1e9)
+        while time.perf_counter_ns() < send_perf_ns:
+            pass
+
+
+class HttpJsonTimeSource(HttpTimeSource):
+    """HTTP 响应体中的 JSON 时间戳字段"""
+
+    kind = "json"
+
+    def __init__(self, url: str, path: str = "data", **kwargs):
+        """
+        Args:
+            url: 时间接口地址
+            path: 时间戳字段路径（点分隔），值为秒或毫秒时间戳
+        """
+        super().__init__(url, **kwargs)
+        self.path = path
+
+    def extract(self, headers: Mapping[str, str], content: bytes) -> Optional[Tuple[int, int]]:
+        try:
+            return parse_epoch(extract_json_path(json.loads(content), self.path))
+        except (ValueError, KeyError, IndexError, TypeError):
+            return None
+
+
+class HttpDateTimeSource(HttpTimeSource):
+    """HTTP Date 响应头（秒级精度）"""
+
+    kind = "date"
+
+    def __init__(self, url: str, method: str = "HEAD", **kwargs):
+        super().__init__(url, method=method, **kwargs)
+
+    def extract(self, headers: Mapping[str, str], content: bytes) -> Optional[Tuple[int, int]]:
+        return parse_http_date(headers.get("Date"))
+
+
+class NtpTimeSource(TimeSource):
+    """NTP 服务器（SNTP 客户端模式，UDP）"""
+
+    kind = "ntp"
+
+    def __init__(self, host: str, port: int = 123, name: Optional[str] = None):
+        super().__init__(name or f"ntp://{host}:{port}")
+        self.host = host
+        self.port = port
+
+    def collect(self, samples: int, timeout: float, interval_ms: float = 0) -> List[ClockSample]:
+        collected: List[ClockSample] = []
+        family, _, _, _, address = socket.getaddrinfo(self.host, self.port, type=socket.SOCK_DGRAM)[0]
+        last_error: Optional[OSError] = None
+
+        with socket.socket(family, socket.SOCK_DGRAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(address)
+            anchor_wall_ns = time.time_ns()
+            anchor_perf_ns = time.perf_counter_ns()
+
+            for index in range(max(samples, 1)):
+                if index > 0 and interval_ms > 0:
+                    time.sleep(interval_ms / 1000)
+
+                sent_perf_ns = time.perf_counter_ns()
+                t1 = anchor_wall_ns + sent_perf_ns - anchor_perf_ns
+                transmit = to_ntp_timestamp(t1)
+                # LI=0, VN=4, Mode=3（客户端）
+                request = bytes([0x23]) + bytes(39) + transmit
+                try:
+                    sock.send(request)
+                    reply = sock.recv(512)
+                except OSError as e:
+                    last_error = e
+                    continue
+                received_perf_ns = time.perf_counter_ns()
+                t4 = anchor_wall_ns + received_perf_ns - anchor_perf_ns
+
+                # 只接受对本次请求的服务器应答（模式 4、层级非 0、原始时间戳与发出的一致）
+                if len(reply) < 48 or reply[0] & 0x07 != 4 or reply[1] == 0 or reply[24:32] != transmit:
+                    continue
+
+                t2 = from_ntp_timestamp(reply[32:40])
+                t3 = from_ntp_timestamp(reply[40:48])
+                delay = max((t4 - t1) - (t3 - t2), 0)
+                offset = ((t2 - t1) + (t3 - t4)) // 2
+                collected.append(ClockSample(rtt_ns=delay, lower_ns=offset - delay // 2, upper_ns=offset + delay // 2))
+
+        if not collected and last_error is not None:
+            raise last_error
+        return collected
+
+
+class FixtureTimeSource(HttpJsonTimeSource):
+    """本地模拟时间服务器（首次采样时在进程内启动），用于离线测试和基准"""
+
+    kind = "fixture"
+
+    def __init__(self, offset_ms: float = 0.0, one_way_ms: float = 0.0, name: Optional[str] = None):
+        self.server = LocalTimeServer(offset_ms=offset_ms, one_way_ms=one_way_ms)
+        super().__init__(url="", path="data", name=name or f"fixture(offset={offset_ms}ms)")
+
+    def collect(self, samples: int, timeout: float, interval_ms: float = 0) -> List[ClockSample]:
+        self.url = self.server.json_url
+        return super().collect(samples, timeout, interval_ms)
+
+
+# 时间源类型，可用 register_time_source_type 扩展
+TIME_SOURCE_TYPES: Dict[str, Callable[..., TimeSource]] = {
+    HttpJsonTimeSource.kind: HttpJsonTimeSource,
+    HttpDateTimeSource.kind: HttpDateTimeSource,
+    NtpTimeSource.kind: NtpTimeSource,
+    FixtureTimeSource.kind: FixtureTimeSource,
+}
+
+# 未配置时间源时使用的公共时间API - 参考demo.py
+DEFAULT_TIME_SOURCES: List[Dict[str, Any]] = [
+    {
+        "type": "json",
+        "name": "meituan",
+        "url": "https://cube.meituan.com/ipromotion/cube/toc/component/base/getServerCurrentTime",
+        "path": "data",
+    },
+    {
+        "type": "json",
+        "name": "taobao",
+        "url": "http://api.m.taobao.com/rest/api3.do?api=mtop.common.getTimestamp",
+        "path": "data.t",
+    },
+]
+
+
+def register_time_source_type(kind: str, factory: Callable[..., TimeSource]) -> None:
+    """注册时间源类型，配置中 type 为 kind 的时间源由 factory(**其余配置项) 创建"""
+    TIME_SOURCE_TYPES[kind] = factory
+
+
+def build_time_source(config: Mapping[str, Any]) -> TimeSource:
+    """按配置创建时间源"""
+    options = dict(config)
+    kind = options.pop("type", None)
+    factory = TIME_SOURCE_TYPES.get(kind)
+    if factory is None:
+        raise TimeSourceError(f"未知的时间源类型: {kind}（支持: {', '.join(TIME_SOURCE_TYPES)}）")
+    try:
+        return factory(**options)
+    except TypeError as e:
+        raise TimeSourceError(f"时间源配置错误 {dict(config)}: {e}")
+
+
+class TimeSourceRegistry:
+    """时间源注册表"""
+
+    def __init__(self, configs: Optional[Sequence[Mapping[str, Any]]] = None):
+        self._lock = threading.Lock()
+        self._sources: Tuple[TimeSource, ...] = ()
+        if configs:
+            self.configure(configs)
+
+    def configure(self, configs: Sequence[Mapping[str, Any]]) -> None:
+        """按配置替换全部时间源（配置有误时抛出 TimeSourceError，原有时间源不变）"""
+        sources = tuple(build_time_source(config) for config in configs)
+        with self._lock:
+            self._sources = sources
+
+    def add(self, source: TimeSource) -> TimeSource:
+        """追加一个时间源"""
+        with self._lock:
+            self._sources = self._sources + (source,)
+        return source
+
+    @property
+    def sources(self) -> Tuple[TimeSource, ...]:
+        return self._sources
+
+    def candidates(self) -> List[TimeSource]:
+        """本次同步要采样的时间源，表现好的在前；全部处于退避期时仍全部尝试"""
+        sources = self._sources
+        now_ns = time.monotonic_ns()
+        available = [source for source in sources if source.stats.available(now_ns)] or list(sources)
+        return sorted(available, key=lambda source: source.stats.sort_key())
+
+    def best(self) -> Optional[TimeSource]:
+        """当前表现最好的时间源"""
+        candidates = self.candidates()
+        return candidates[0] if candidates else None
+
+    def get_stats(self) -> List[Dict[str, Any]]:
+        """各时间源的统计，按表现排序"""
+        return [source.describe() for source in sorted(self._sources, key=lambda source: source.stats.sort_key())]
@@ -0,0 +1,105 @@
+"""
+任务定时队列
+按 next_execution_at 排序的最小堆，调度线程只休眠到下一个到期任务
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+
+class TaskTimerQueue:
+    """任务定时队列（最小堆 + 条件变量）"""
+
+    def __init__(self):
+        # 堆元素: (到期的单调时钟时间, 序号, 任务ID)
+        self._heap: List[Tuple[float, int, int]] = []
+        # 任务ID -> 当前有效的序号，重复调度或取消后旧的堆元素自动失效
+        self._entries: Dict[int, int] = {}
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def schedule(self, task_id: int, fire_at: Optional[datetime] = None) -> None:
+        """加入或重新调度任务，fire_at 为空表示立即执行"""
+        deadline = time.monotonic() + self._seconds_until(fire_at)
+
+        with self._cond:
+            seq = next(self._counter)
+            self._entries[task_id] = seq
+            heapq.heappush(self._heap, (deadline, seq, task_id))
+
+            # 新任务成为堆顶时唤醒调度线程，重新计算休眠时长
+            if self._heap[0][1] == seq:
+                self._cond.notify()
+
+    def cancel(self, task_id: int) -> bool:
+        """取消任务（惰性删除，堆中的旧元素在出堆时丢弃）"""
+        with self._cond:
+            return self._entries.pop(task_id, None) is not None
+
+    def wait_for_due(self) -> List[int]:
+        """阻塞直到有任务到期，返回全部到期任务ID；队列关闭后返回空列表"""
+        with self._cond:
+            while not self._closed:
+                self._discard_stale()
+
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+
+                timeout = self._heap[0][0] - time.monotonic()
+                if timeout > 0:
+                    self._cond.wait(timeout)
+                    continue
+
+                due_task_ids = []
+                now = time.monotonic()
+                while self._heap and self._heap[0][0] <= now:
+                    _, seq, task_id = heapq.heappop(self._heap)
+                    if self._entries.get(task_id) == seq:
+                        del self._entries[task_id]
+                        due_task_ids.append(task_id)
+
+                if due_task_ids:
+                    return due_task_ids
+
+            return []
+
+    def close(self) -> None:
+        """关闭队列并唤醒等待中的调度线程"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def reopen(self) -> None:
+        """重新打开队列（调度服务重启时使用）"""
+        with self._cond:
+            self._closed = False
+            self._heap.clear()
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self._entries)
+
+    def __contains__(self, task_id: int) -> bool:
+        with self._cond:
+            return task_id in self._entries
+
+    def _discard_stale(self) -> None:
+        """丢弃堆顶已失效的元素"""
+        while self._heap and self._entries.get(self._heap[0][2]) != self._heap[0][1]:
+            heapq.heappop(self._heap)
+
+    @staticmethod
+    def _seconds_until(fire_at: Optional[datetime]) -> float:
+        """计算距离执行时间的秒数（数据库中保存的是本地时间）"""
+        if fire_at is None:
+            return 0.0
+        if fire_at.tzinfo is not None:
+            fire_at = fire_at.astimezone().replace(tzinfo=None)
+        return max((fire_at - datetime.now()).total_seconds(), 0.0)
@@ -3,5 +3,21 @@
 """
 
 from .parser import FiddlerParser, CurlParser
+from .cron import CronExpression, CronParseError, compile_cron, next_fire_times
+from .condition import Condition, ConditionParseError, ResponseContext, compile_condition, compile_key_message
+from .keyword_matcher import KeywordMatcher
 
-__all__ = ['FiddlerParser', 'CurlParser'] 
\ No newline at end of file
+__all__ = [
+    'FiddlerParser',
+    'CurlParser',
+    'CronExpression',
+    'CronParseError',
+    'compile_cron',
+    'next_fire_times',
+    'Condition',
+    'ConditionParseError',
+    'ResponseContext',
+    'compile_condition',
+    'compile_key_message',
+    'KeywordMatcher',
+]
@@ -0,0 +1,459 @@
+"""
+成功/停止条件表达式
+条件只解析一次并编译为闭包，每次尝试直接对原始响应求值，不再拼接字符串和调用 eval()
+
+语法:
+    字段      status_code / response.status_code、response_body / response.text、$.data.msg（JSON 路径）
+    比较      == != < <= > >=，如 status_code == 200、$.code != 0
+    集合      status_code in [200, 201]、'ok' in response_body（区分大小写）
+    文本      response_body.contains('成功')（不区分大小写）、contains / startswith / endswith
+    正则      response_body.matches('\\d{6}')、$.data.msg =~ '^ok'
+    逻辑      and / or / not（也可写作 && / || / !），支持括号
+不引用任何字段的条件（如 售罄）按关键字处理：响应体包含该文本即满足（不区分大小写）
+响应体只在 JSON 路径被求值时才解析，同一次尝试的所有条件共享一个 ResponseContext，最多解析一次
+"""
+
+import ast
+import json
+import re
+from functools import lru_cache
+from typing import Any, Callable, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # 未安装时使用标准库解析
+    orjson = None
+
+
+class ConditionParseError(ValueError):
+    """条件表达式格式错误"""
+
+
+# 顶层不是对象或数组的响应体不可能匹配 JSON 路径，不必解析
+_JSON_START = re.compile(r"\s*[\[{]")
+
+
+def _loads(text: str) -> Any:
+    """解析 JSON（优先使用 orjson）"""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+class ResponseContext:
+    """一次响应的求值上下文，JSON 在第一次被 JSON 路径访问时才解析"""
+
+    __slots__ = ("status_code", "body", "_json", "_json_parsed")
+
+    def __init__(self, body: Optional[str], status_code: Optional[int] = 0):
+        self.status_code = status_code or 0
+        self.body = body or ""
+        self._json: Any = None
+        self._json_parsed = False
+
+    @property
+    def json(self) -> Any:
+        """解析后的响应体，不是合法 JSON 时为 None"""
+        if not self._json_parsed:
+            self._json_parsed = True
+            if _JSON_START.match(self.body):
+                try:
+                    self._json = _loads(self.body)
+                except ValueError:
+                    self._json = None
+        return self._json
+
+
+# JSON 路径不存在时的取值
+_MISSING = object()
+
+Evaluator = Callable[[ResponseContext], Any]
+
+_STATUS_FIELDS = {"status_code", "response.status_code"}
+_BODY_FIELDS = {"response_body", "response.text", "response.body"}
+_METHODS = {"contains", "startswith", "endswith", "matches"}
+_CONSTANTS = {"true": True, "false": False, "null": None, "True": True, "False": False, "None": None}
+_KEYWORDS = {"and", "or", "not", "in", "contains", "matches"}
+
+_TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<number>-?\d+(?:\.\d+)?)
+      | (?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+      | (?P<path>\$(?:\.[^\s.\[\]()=!<>,'"&|]+|\[\d+\]|\['[^']*'\]|\["[^"]*"\])*)
+      | (?P<name>[A-Za-z_]\w*(?:\.[A-Za-z_]\w*)*)
+      | (?P<op>==|!=|<=|>=|=~|&&|\|\||[<>()\[\],!])
+    )""", re.VERBOSE)
+
+# 解析失败时，包含这些内容的条件视为写错的表达式，而不是关键字
+_EXPRESSION_HINT = re.compile(r"status_code|response_body|response\.|\$[.\[]")
+
+
+def _tokenize(text: str) -> List[Tuple[str, str]]:
+    """将表达式拆分为 (类型, 文本) 列表"""
+    tokens = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = _TOKEN_RE.match(text, position)
+        if not match or match.end() == position:
+            raise ConditionParseError(f"无法识别的字符: {text[position:position + 10]!r}")
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "name" and value in _KEYWORDS:
+            kind = "op"
+        tokens.append((kind, value))
+        position = match.end()
+    return tokens
+
+
+def _parse_path(path: str) -> Tuple[Any, ...]:
+    """将 $.data.items[0].msg 解析为 ('data', 'items', 0, 'msg')"""
+    steps: List[Any] = []
+    for key, index, quoted in re.findall(r"\.([^.\[]+)|\[(\d+)\]|\[['\"]([^'\"]*)['\"]\]", path[1:]):
+        if index:
+            steps.append(int(index))
+        else:
+            steps.append(key or quoted)
+    return tuple(steps)
+
+
+def _lookup(data: Any, steps: Tuple[Any, ...]) -> Any:
+    """按路径取值，不存在时返回 _MISSING"""
+    for step in steps:
+        if isinstance(step, int):
+            if not isinstance(data, list) or not -len(data) <= step < len(data):
+                return _MISSING
+            data = data[step]
+        elif isinstance(data, dict) and step in data:
+            data = data[step]
+        else:
+            return _MISSING
+    return data
+
+
+def _as_text(value: Any) -> str:
+    """将字段值转换为文本（用于包含和正则匹配）"""
+    if value is _MISSING or value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def _loose_equal(left: Any, right: Any) -> bool:
+    """相等比较：类型不同时按文本比较（如 JSON 中的 "0" 与 0）"""
+    if left is _MISSING or right is _MISSING:
+        return False
+    if left == right:
+        return True
+    if isinstance(left, (bool, type(None))) or isinstance(right, (bool, type(None))):
+        return False
+    if type(left) is not type(right) and not isinstance(left, (dict, list)) and not isinstance(right, (dict, list)):
+        return str(left) == str(right)
+    return False
+
+
+def _compare(left: Any, right: Any, operator: str) -> bool:
+    """大小比较，无法转换为数值时不满足"""
+    try:
+        left, right = float(left), float(right)
+    except (TypeError, ValueError):
+        return False
+    if operator == "<":
+        return left < right
+    if operator == "<=":
+        return left <= right
+    if operator == ">":
+        return left > right
+    return left >= right
+
+
+def _text_searcher(needle: str, ignore_case: bool) -> Callable[[str], bool]:
+    """编译文本包含检查：需要忽略大小写时使用预编译正则，避免每次复制并转换整个响应体"""
+    if not ignore_case or needle.lower() == needle.upper():
+        return lambda text: needle in text
+    return re.compile(re.escape(needle), re.IGNORECASE).search
+
+
+class _Parser:
+    """递归下降解析器，直接生成求值闭包"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = _tokenize(text)
+        self.position = 0
+        self.field_count = 0  # 表达式引用的字段数，为0时按关键字处理
+        self.uses_json = False  # 表达式是否包含 JSON 路径
+        self.uses_body = False  # 表达式是否引用响应体（包括 JSON 路径）
+
+    def parse(self) -> Evaluator:
+        if not self.tokens:
+            raise ConditionParseError("条件为空")
+        evaluator = self._parse_or()
+        if self.position < len(self.tokens):
+            raise ConditionParseError(f"多余的内容: {self.tokens[self.position][1]!r}")
+        return evaluator
+
+    # ---- 词法辅助 ----
+
+    def _peek(self) -> Optional[str]:
+        if self.position < len(self.tokens):
+            kind, value = self.tokens[self.position]
+            return value if kind == "op" else None
+        return None
+
+    def _accept(self, *values: str) -> Optional[str]:
+        value = self._peek()
+        if value in values:
+            self.position += 1
+            return value
+        return None
+
+    def _expect(self, value: str) -> None:
+        if not self._accept(value):
+            found = self.tokens[self.position][1] if self.position < len(self.tokens) else "结尾"
+            raise ConditionParseError(f"期望 {value!r}，实际为 {found!r}")
+
+    def _next(self) -> Tuple[str, str]:
+        if self.position >= len(self.tokens):
+            raise ConditionParseError("表达式不完整")
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    # ---- 逻辑运算 ----
+
+    def _parse_or(self) -> Evaluator:
+        operands = [self._parse_and()]
+        while self._accept("or", "||"):
+            operands.append(self._parse_and())
+        if len(operands) == 1:
+            return operands[0]
+        return lambda ctx: any(_truthy(operand(ctx)) for operand in operands)
+
+    def _parse_and(self) -> Evaluator:
+        operands = [self._parse_not()]
+        while self._accept("and", "&&"):
+            operands.append(self._parse_not())
+        if len(operands) == 1:
+            return operands[0]
+        return lambda ctx: all(_truthy(operand(ctx)) for operand in operands)
+
+    def _parse_not(self) -> Evaluator:
+        if self._accept("not", "!"):
+            operand = self._parse_not()
+            return lambda ctx: not _truthy(operand(ctx))
+        return self._parse_comparison()
+
+    # ---- 比较 ----
+
+    def _parse_comparison(self) -> Evaluator:
+        left = self._parse_operand()
+
+        operator = self._accept("==", "!=", "<", "<=", ">", ">=", "=~", "in", "contains", "matches")
+        if operator is None and self._peek() == "not" and self._peek_ahead() == "in":
+            self.position += 2
+            operator = "not in"
+        if operator is None:
+            return left
+
+        if operator in ("=~", "matches"):
+            return self._regex_predicate(left, self._parse_string())
+        if operator == "contains":
+            return self._contains_predicate(left, self._parse_string(), ignore_case=True)
+
+        right = self._parse_operand()
+        if operator == "==":
+            return lambda ctx: _loose_equal(left(ctx), right(ctx))
+        if operator == "!=":
+            return lambda ctx: not _loose_equal(left(ctx), right(ctx))
+        if operator in ("in", "not in"):
+            negate = operator == "not in"
+            return lambda ctx: _membership(left(ctx), right(ctx)) != negate
+        return lambda ctx: _compare(left(ctx), right(ctx), operator)
+
+    def _peek_ahead(self) -> Optional[str]:
+        if self.position + 1 < len(self.tokens):
+            kind, value = self.tokens[self.position + 1]
+            return value if kind == "op" else None
+        return None
+
+    def _regex_predicate(self, operand: Evaluator, pattern: str) -> Evaluator:
+        try:
+            search = re.compile(pattern).search
+        except re.error as e:
+            raise ConditionParseError(f"正则表达式错误 {pattern!r}: {e}")
+        return lambda ctx: search(_as_text(operand(ctx))) is not None
+
+    def _contains_predicate(self, operand: Evaluator, needle: str, ignore_case: bool) -> Evaluator:
+        search = _text_searcher(needle, ignore_case)
+        return lambda ctx: bool(search(_as_text(operand(ctx))))
+
+    # ---- 操作数 ----
+
+    def _parse_string(self) -> str:
+        kind, value = self._next()
+        if kind != "string":
+            raise ConditionParseError(f"期望字符串，实际为 {value!r}")
+        return ast.literal_eval(value)
+
+    def _parse_operand(self) -> Evaluator:
+        if self._accept("("):
+            first = self._parse_or()
+            if self._peek() == ",":
+                return self._parse_sequence(first, ")")
+            self._expect(")")
+            return first
+        if self._accept("["):
+            if self._accept("]"):
+                return lambda ctx: []
+            return self._parse_sequence(self._parse_operand(), "]")
+
+        kind, value = self._next()
+        if kind == "number":
+            number = float(value) if "." in value else int(value)
+            return lambda ctx: number
+        if kind == "string":
+            text = ast.literal_eval(value)
+            return lambda ctx: text
+        if kind in ("path", "name"):
+            return self._parse_name(value)
+        raise ConditionParseError(f"意外的符号: {value!r}")
+
+    def _parse_sequence(self, first: Evaluator, closing: str) -> Evaluator:
+        items = [first]
+        while self._accept(","):
+            if self._peek() == closing:
+                break
+            items.append(self._parse_operand())
+        self._expect(closing)
+        return lambda ctx: [item(ctx) for item in items]
+
+    def _parse_name(self, name: str) -> Evaluator:
+        if name in _CONSTANTS:
+            constant = _CONSTANTS[name]
+            return lambda ctx: constant
+
+        # 方法调用: response_body.contains('成功')、$.data.msg.contains('成功')
+        field_name, _, method = name.rpartition(".")
+        if method in _METHODS and field_name and self._peek() == "(":
+            operand = self._field(field_name)
+            self._expect("(")
+            argument = self._parse_string()
+            self._expect(")")
+            if method == "contains":
+                return self._contains_predicate(operand, argument, ignore_case=True)
+            if method == "matches":
+                return self._regex_predicate(operand, argument)
+            if method == "startswith":
+                return lambda ctx: _as_text(operand(ctx)).startswith(argument)
+            return lambda ctx: _as_text(operand(ctx)).endswith(argument)
+
+        return self._field(name)
+
+    def _field(self, name: str) -> Evaluator:
+        if name.startswith("$"):
+            self.field_count += 1
+            self.uses_json = self.uses_body = True
+            steps = _parse_path(name)
+            return lambda ctx: _lookup(ctx.json, steps)
+        if name in _STATUS_FIELDS:
+            self.field_count += 1
+            return lambda ctx: ctx.status_code
+        if name in _BODY_FIELDS:
+            self.field_count += 1
+            self.uses_body = True
+            return lambda ctx: ctx.body
+        raise ConditionParseError(f"未知字段: {name!r}")
+
+
+def _truthy(value: Any) -> bool:
+    """单独作为条件的字段值"""
+    return value is not _MISSING and bool(value)
+
+
+def _membership(item: Any, container: Any) -> bool:
+    """in 运算：列表按相等比较，文本按子串（区分大小写）"""
+    if item is _MISSING or container is _MISSING:
+        return False
+    if isinstance(container, list):
+        return any(_loose_equal(item, candidate) for candidate in container)
+    if isinstance(container, dict):
+        return _as_text(item) in container
+    return _as_text(item) in _as_text(container)
+
+
+class Condition:
+    """编译后的条件"""
+
+    __slots__ = ("source", "is_keyword", "uses_json", "uses_body", "_evaluator")
+
+    def __init__(
+        self,
+        source: str,
+        evaluator: Evaluator,
+        is_keyword: bool = False,
+        uses_json: bool = False,
+        uses_body: bool = True
+    ):
+        self.source = source
+        self.is_keyword = is_keyword
+        self.uses_json = uses_json  # 求值时是否需要解析响应体
+        self.uses_body = uses_body  # 为 False 时只依赖状态码，不需要读取响应体
+        self._evaluator = evaluator
+
+    def evaluate(self, context: ResponseContext) -> bool:
+        """对响应求值"""
+        return _truthy(self._evaluator(context))
+
+    def matches(self, response_body: Optional[str], status_code: Optional[int] = 0) -> bool:
+        """对单个响应求值（多个条件检查同一响应时应共享 ResponseContext）"""
+        return self.evaluate(ResponseContext(response_body, status_code))
+
+    def __repr__(self) -> str:
+        return f"<Condition({self.source!r})>"
+
+
+@lru_cache(maxsize=1024)
+def compile_condition(source: str) -> Condition:
+    """
+    编译条件表达式（结果按表达式文本缓存）
+
+    Raises:
+        ConditionParseError: 表达式格式错误
+    """
+    text = source.strip()
+    try:
+        parser = _Parser(text)
+        evaluator = parser.parse()
+        if parser.field_count:
+            return Condition(source, evaluator, uses_json=parser.uses_json, uses_body=parser.uses_body)
+    except ConditionParseError:
+        if _EXPRESSION_HINT.search(text):
+            raise
+
+    # 不引用任何字段，按关键字处理
+    return _keyword_condition(source, text)
+
+
+@lru_cache(maxsize=1024)
+def compile_key_message(key_message: str) -> Condition:
+    """
+    编译关键消息：以 $ 开头时按条件表达式处理（如 $.data.msg.contains('成功')，
+    单独的 JSON 路径表示该字段存在且非空），否则按关键字处理
+
+    Raises:
+        ConditionParseError: JSON 路径表达式格式错误
+    """
+    text = key_message.strip()
+    if text.startswith("$"):
+        return compile_condition(text)
+    return _keyword_condition(key_message, text)
+
+
+def _keyword_condition(source: str, keyword: str) -> Condition:
+    """响应体包含关键字（不区分大小写）"""
+    search = _text_searcher(keyword, ignore_case=True)
+    return Condition(source, lambda ctx: bool(search(ctx.body)), is_keyword=True)
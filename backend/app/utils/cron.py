@@ -0,0 +1,312 @@
+"""
+Cron 表达式解析与触发时间计算
+表达式只解析一次并编译为位集，计算下次触发时间时每个字段都是 O(1) 的位运算
+"""
+
+import calendar
+from datetime import datetime, timedelta, tzinfo
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+try:
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+except ImportError:  # Python 3.8
+    ZoneInfo = None
+    ZoneInfoNotFoundError = KeyError
+
+from loguru import logger
+
+
+class CronParseError(ValueError):
+    """Cron 表达式格式错误"""
+
+
+# 字段定义: (名称, 最小值, 最大值)
+_SECOND = ("second", 0, 59)
+_MINUTE = ("minute", 0, 59)
+_HOUR = ("hour", 0, 23)
+_DAY = ("day", 1, 31)
+_MONTH = ("month", 1, 12)
+_WEEKDAY = ("weekday", 0, 7)
+
+_MONTH_NAMES = {
+    name: index for index, name in enumerate(
+        ["JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "OCT", "NOV", "DEC"], 1
+    )
+}
+_WEEKDAY_NAMES = {
+    name: index for index, name in enumerate(["SUN", "MON", "TUE", "WED", "THU", "FRI", "SAT"])
+}
+
+_MACROS = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+
+# 7位星期模式重复6次即可覆盖一个月的所有日期
+_WEEK_REPEAT = sum(1 << (7 * i) for i in range(6))
+
+# 查找下次触发时间时最多向后搜索的年数（例如 2月30日 永远不会触发）
+_MAX_YEARS_AHEAD = 8
+
+
+def _next_bit(mask: int, start: int) -> int:
+    """返回 mask 中 >= start 的最低位序号，不存在时返回 -1"""
+    shifted = mask >> start
+    if not shifted:
+        return -1
+    return start + (shifted & -shifted).bit_length() - 1
+
+
+@lru_cache(maxsize=1024)
+def _weekday_day_mask(weekdays: int, year: int, month: int) -> int:
+    """将星期位集转换为指定月份的日期位集（第 d 位表示 d 号）"""
+    # calendar.weekday 中周一为0，cron 中周日为0
+    first_weekday = (calendar.weekday(year, month, 1) + 1) % 7
+    rotated = ((weekdays >> first_weekday) | (weekdays << (7 - first_weekday))) & 0x7F
+    days_in_month = calendar.monthrange(year, month)[1]
+    return ((rotated * _WEEK_REPEAT) << 1) & ((1 << (days_in_month + 1)) - 2)
+
+
+class CronExpression:
+    """
+    编译后的 Cron 表达式
+
+    支持标准5字段格式（分 时 日 月 周）以及带秒的6字段格式（秒 分 时 日 月 周），
+    字段支持 *、?、列表、范围、步长以及月份/星期英文缩写，另支持 @daily 等宏。
+    """
+
+    def __init__(self, expression: str):
+        self.expression = expression.strip()
+        fields = _MACROS.get(self.expression.lower(), self.expression).split()
+
+        if len(fields) == 5:
+            fields.insert(0, "0")
+            self.has_seconds = False
+        elif len(fields) == 6:
+            self.has_seconds = True
+        else:
+            raise CronParseError(f"Cron表达式应包含5或6个字段: {expression}")
+
+        second, minute, hour, day, month, weekday = fields
+        self.seconds = self._parse_field(second, _SECOND)
+        self.minutes = self._parse_field(minute, _MINUTE)
+        self.hours = self._parse_field(hour, _HOUR)
+        self.days = self._parse_field(day, _DAY)
+        self.months = self._parse_field(month, _MONTH, _MONTH_NAMES)
+        weekdays = self._parse_field(weekday, _WEEKDAY, _WEEKDAY_NAMES)
+        # 周日可以写作0或7
+        self.weekdays = (weekdays | (weekdays >> 7)) & 0x7F
+
+        # 日和周同时受限时按标准 cron 语义取并集，否则只看受限的字段
+        self.day_restricted = day not in ("*", "?")
+        self.weekday_restricted = weekday not in ("*", "?")
+
+    def next_fire_time(self, after: datetime) -> datetime:
+        """计算严格晚于 after 的下次触发时间，after 的时区信息会被保留"""
+        tz = after.tzinfo
+        year, month, day, hour, minute, second = self._start_fields(after.replace(tzinfo=None))
+        max_year = year + _MAX_YEARS_AHEAD
+
+        while year <= max_year:
+            # 月
+            next_month = _next_bit(self.months, month)
+            if next_month < 0:
+                year, month, day, hour, minute, second = year + 1, 1, 1, 0, 0, 0
+                continue
+            if next_month != month:
+                month, day, hour, minute, second = next_month, 1, 0, 0, 0
+
+            # 日
+            next_day = _next_bit(self._day_mask(year, month), day)
+            if next_day < 0:
+                year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+                day, hour, minute, second = 1, 0, 0, 0
+                continue
+            if next_day != day:
+                day, hour, minute, second = next_day, 0, 0, 0
+
+            # 时
+            next_hour = _next_bit(self.hours, hour)
+            if next_hour < 0:
+                year, month, day = self._following_day(year, month, day)
+                hour, minute, second = 0, 0, 0
+                continue
+            if next_hour != hour:
+                hour, minute, second = next_hour, 0, 0
+
+            # 分
+            next_minute = _next_bit(self.minutes, minute)
+            if next_minute < 0:
+                minute, second = 0, 0
+                if hour == 23:
+                    year, month, day = self._following_day(year, month, day)
+                    hour = 0
+                else:
+                    hour += 1
+                continue
+            if next_minute != minute:
+                minute, second = next_minute, 0
+
+            # 秒
+            next_second = _next_bit(self.seconds, second)
+            if next_second < 0:
+                second = 0
+                fire_time = datetime(year, month, day, hour, minute) + timedelta(minutes=1)
+                year, month, day = fire_time.year, fire_time.month, fire_time.day
+                hour, minute = fire_time.hour, fire_time.minute
+                continue
+
+            return datetime(year, month, day, hour, minute, next_second, tzinfo=tz)
+
+        raise CronParseError(f"Cron表达式在 {_MAX_YEARS_AHEAD} 年内没有触发时间: {self.expression}")
+
+    def next_fire_times(self, after: datetime, count: int) -> List[datetime]:
+        """计算 after 之后的 count 个触发时间"""
+        fire_times = []
+        current = after
+        for _ in range(count):
+            current = self.next_fire_time(current)
+            fire_times.append(current)
+        return fire_times
+
+    def matches(self, moment: datetime) -> bool:
+        """判断指定时间是否命中表达式"""
+        return bool(
+            (self.seconds >> moment.second) & 1
+            and (self.minutes >> moment.minute) & 1
+            and (self.hours >> moment.hour) & 1
+            and (self.months >> moment.month) & 1
+            and (self._day_mask(moment.year, moment.month) >> moment.day) & 1
+        )
+
+    def _start_fields(self, after: datetime) -> Tuple[int, int, int, int, int, int]:
+        """从 after 的下一个时间粒度开始查找"""
+        if self.has_seconds:
+            start = after.replace(microsecond=0) + timedelta(seconds=1)
+        else:
+            start = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        return start.year, start.month, start.day, start.hour, start.minute, start.second
+
+    def _day_mask(self, year: int, month: int) -> int:
+        """计算指定月份中可触发的日期位集"""
+        days_in_month = calendar.monthrange(year, month)[1]
+        valid_days = (1 << (days_in_month + 1)) - 2
+        if self.day_restricted and self.weekday_restricted:
+            return (self.days | _weekday_day_mask(self.weekdays, year, month)) & valid_days
+        if self.weekday_restricted:
+            return _weekday_day_mask(self.weekdays, year, month)
+        return self.days & valid_days
+
+    @staticmethod
+    def _following_day(year: int, month: int, day: int) -> Tuple[int, int, int]:
+        """返回下一天的年月日"""
+        following = datetime(year, month, day) + timedelta(days=1)
+        return following.year, following.month, following.day
+
+    @staticmethod
+    def _parse_field(field: str, spec: Tuple[str, int, int], names: Optional[dict] = None) -> int:
+        """将单个字段解析为位集"""
+        name, min_value, max_value = spec
+        mask = 0
+
+        for part in field.upper().split(","):
+            if not part:
+                raise CronParseError(f"{name} 字段为空: {field}")
+
+            step = 1
+            has_step = "/" in part
+            if has_step:
+                part, step_str = part.split("/", 1)
+                if not step_str.isdigit() or int(step_str) == 0:
+                    raise CronParseError(f"{name} 字段步长无效: {field}")
+                step = int(step_str)
+
+            if part in ("*", "?"):
+                start, end = min_value, max_value
+            elif "-" in part:
+                start_str, end_str = part.split("-", 1)
+                start = CronExpression._parse_value(start_str, spec, names)
+                end = CronExpression._parse_value(end_str, spec, names)
+            else:
+                start = CronExpression._parse_value(part, spec, names)
+                # "5/15" 表示从5开始每15个单位
+                end = max_value if has_step else start
+
+            if start > end:
+                raise CronParseError(f"{name} 字段范围无效: {field}")
+
+            for value in range(start, end + 1, step):
+                mask |= 1 << value
+
+        return mask
+
+    @staticmethod
+    def _parse_value(value: str, spec: Tuple[str, int, int], names: Optional[dict]) -> int:
+        """解析字段中的单个值"""
+        name, min_value, max_value = spec
+        if names and value in names:
+            return names[value]
+        if not value.isdigit():
+            raise CronParseError(f"{name} 字段值无效: {value}")
+        number = int(value)
+        if not min_value <= number <= max_value:
+            raise CronParseError(f"{name} 字段值超出范围 [{min_value}, {max_value}]: {value}")
+        return number
+
+    def __repr__(self) -> str:
+        return f"<CronExpression('{self.expression}')>"
+
+
+@lru_cache(maxsize=4096)
+def compile_cron(expression: str) -> CronExpression:
+    """编译 Cron 表达式（带缓存，同一表达式只解析一次）"""
+    return CronExpression(expression)
+
+
+@lru_cache(maxsize=128)
+def get_timezone(name: Optional[str]) -> Optional[tzinfo]:
+    """获取时区对象，不可用时返回 None（使用本地时间）"""
+    if not name or ZoneInfo is None:
+        return None
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        logger.warning(f"未知时区 {name}，使用本地时间")
+        return None
+
+
+def next_fire_times(
+    expression: str,
+    timezone: Optional[str] = None,
+    count: int = 1,
+    after: Optional[datetime] = None
+) -> List[datetime]:
+    """
+    按指定时区计算 Cron 表达式之后的 count 个触发时间
+
+    Args:
+        expression: Cron 表达式
+        timezone: 时区名称，例如 Asia/Shanghai
+        count: 计算的触发时间个数
+        after: 起始时间（本地时间），默认为当前时间
+
+    Returns:
+        List[datetime]: 触发时间列表（本地时间，不含时区信息，与数据库中保存的时间一致）
+    """
+    cron = compile_cron(expression)
+    tz = get_timezone(timezone)
+
+    start = after or datetime.now()
+    if tz is None:
+        return cron.next_fire_times(start.replace(tzinfo=None), count)
+
+    if start.tzinfo is None:
+        start = start.astimezone()
+    fire_times = cron.next_fire_times(start.astimezone(tz), count)
+    return [fire_time.astimezone().replace(tzinfo=None) for fire_time in fire_times]
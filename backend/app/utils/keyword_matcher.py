@@ -0,0 +1,111 @@
+"""
+多关键字匹配
+不同类别（停止、关键消息、成功）的所有关键字编译为一个匹配器，一次扫描响应体即可得到各类别命中的关键字，
+安装 pyahocorasick 时使用 Aho-Corasick 自动机，否则使用预编译的正则多选分支（同样只扫描一遍，在 C 中完成）
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+try:
+    import ahocorasick
+except ImportError:  # 未安装时使用正则实现
+    ahocorasick = None
+
+
+class KeywordMatcher:
+    """
+    多关键字匹配器（不区分大小写）
+
+    类别按 priority 从高到低排列，扫描到最高优先级类别的关键字后立即停止。
+    """
+
+    def __init__(self, keywords: Dict[str, Iterable[str]], priority: Optional[Sequence[str]] = None):
+        """
+        Args:
+            keywords: {类别: 关键字列表}
+            priority: 类别优先级（从高到低），默认为 keywords 的顺序
+        """
+        self.priority: List[str] = list(priority or keywords.keys())
+
+        # 小写关键字 -> 所属类别（同一关键字可以属于多个类别）
+        self._labels: Dict[str, Set[str]] = {}
+        for label, words in keywords.items():
+            for word in words or ():
+                word = (word or "").strip()
+                if word:
+                    self._labels.setdefault(word.lower(), set()).add(label)
+
+        self._automaton = None
+        self._pattern: Optional["re.Pattern[str]"] = None
+        if not self._labels:
+            return
+
+        if ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for word, labels in self._labels.items():
+                self._automaton.add_word(word, (word, frozenset(labels)))
+            self._automaton.make_automaton()
+        else:
+            # 长关键字在前，同一位置优先匹配最长的关键字；零宽前瞻使重叠的关键字都能被扫描到
+            words = sorted(self._labels, key=len, reverse=True)
+            self._pattern = re.compile(
+                "(?=(" + "|".join(re.escape(word) for word in words) + "))", re.IGNORECASE
+            )
+            # 同一位置命中的较短关键字一定是最长关键字的前缀，预先找出每个关键字的所有前缀关键字
+            self._prefixes: Dict[str, List[str]] = {
+                word: sorted((other for other in self._labels if word.startswith(other)), key=len)
+                for word in self._labels
+            }
+
+    def __bool__(self) -> bool:
+        return bool(self._labels)
+
+    @property
+    def keyword_count(self) -> int:
+        """关键字数量"""
+        return len(self._labels)
+
+    @property
+    def max_keyword_length(self) -> int:
+        """最长关键字的字符数（分块扫描时相邻块需要重叠的长度加一）"""
+        return max(map(len, self._labels), default=0)
+
+    def scan(self, text: Optional[str]) -> Dict[str, str]:
+        """
+        扫描文本
+
+        Returns:
+            Dict: {类别: 该类别第一个命中的关键字}，扫描到最高优先级类别后提前结束
+        """
+        found: Dict[str, str] = {}
+        if not text or not self._labels:
+            return found
+
+        top = self.priority[0] if self.priority else None
+        for word, labels in self._iter_matches(text):
+            for label in labels:
+                found.setdefault(label, word)
+            if top in found:
+                break
+        return found
+
+    def first(self, text: Optional[str]) -> Optional[Tuple[str, str]]:
+        """按优先级返回命中的 (类别, 关键字)，没有命中时返回 None"""
+        found = self.scan(text)
+        for label in self.priority:
+            if label in found:
+                return label, found[label]
+        return None
+
+    def _iter_matches(self, text: str) -> Iterable[Tuple[str, Iterable[str]]]:
+        """按出现位置依次产生 (关键字, 类别集合)"""
+        if self._automaton is not None:
+            for _, (word, labels) in self._automaton.iter(text.lower()):
+                yield word, labels
+            return
+
+        for match in self._pattern.finditer(text):
+            longest = match.group(1).lower()
+            for word in self._prefixes.get(longest, ()):
+                yield word, self._labels[word]
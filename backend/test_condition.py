@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+测试成功/停止条件表达式的编译与求值
+"""
+
+from backend.app.utils import condition as condition_module
+from backend.app.utils.condition import ConditionParseError, ResponseContext, compile_condition, compile_key_message
+from backend.app.utils.keyword_matcher import KeywordMatcher
+
+
+BODY = '{"code": 0, "data": {"msg": "OK done", "items": [{"id": 5}]}}'
+
+
+def test_expressions():
+    """测试各类表达式的求值结果"""
+    print("🔍 测试条件表达式求值...")
+
+    cases = [
+        ("response.status_code == 200", True),
+        ("status_code in [200, 201]", True),
+        ("status_code not in (200, 201)", False),
+        ("status_code >= 500 or status_code == 429", False),
+        ("response_body.contains('ok DONE')", True),
+        ("'OK' in response_body", True),
+        ("'ok' in response_body", False),
+        ("$.code == 0", True),
+        ("$.code == '0'", True),
+        ("$.data.msg =~ '^OK'", True),
+        ("$.data.msg.contains('done')", True),
+        ("$.data.items[0].id >= 5 and not $.missing", True),
+        ("$.data.items[1].id == 5", False),
+        ("status_code == 200 && ($.code != 0 || $.data.msg contains 'ok')", True),
+        ("response_body matches '\"code\":\\\\s*0'", True),
+    ]
+
+    passed = True
+    for expression, expected in cases:
+        actual = compile_condition(expression).matches(BODY, 200)
+        if actual != expected:
+            print(f"❌ {expression}: 期望 {expected}, 实际 {actual}")
+            passed = False
+
+    if passed:
+        print(f"✅ {len(cases)} 个表达式全部正确")
+    assert passed
+
+
+def test_keywords():
+    """测试不引用字段的条件按关键字处理"""
+    print("\n🔍 测试关键字条件...")
+
+    cases = [("done", True), ("Ok Done", True), ("售罄", False), ("sold out", False), ("200", False)]
+    passed = True
+    for keyword, expected in cases:
+        condition = compile_condition(keyword)
+        actual = condition.matches(BODY, 200)
+        if not condition.is_keyword or actual != expected:
+            print(f"❌ {keyword}: 期望 {expected}, 实际 {actual}")
+            passed = False
+
+    if passed:
+        print(f"✅ {len(cases)} 个关键字条件全部正确")
+    assert passed
+
+
+def test_non_json_body():
+    """测试响应体不是 JSON 时 JSON 路径条件不满足"""
+    print("\n🔍 测试非 JSON 响应...")
+
+    context = ResponseContext("<html>busy</html>", 503)
+    passed = (
+        not compile_condition("$.code == 0").evaluate(context)
+        and compile_condition("status_code == 503 and response_body.contains('BUSY')").evaluate(context)
+    )
+
+    print(f"{'✅' if passed else '❌'} 非 JSON 响应求值")
+    assert passed
+
+
+def test_lazy_json():
+    """测试响应体只在 JSON 路径求值时解析，且同一上下文只解析一次"""
+    print("\n🔍 测试 JSON 延迟解析...")
+
+    parse_count = 0
+    original_loads = condition_module._loads
+
+    def counting_loads(text):
+        nonlocal parse_count
+        parse_count += 1
+        return original_loads(text)
+
+    condition_module._loads = counting_loads
+    try:
+        context = ResponseContext(BODY, 200)
+        compile_condition("status_code == 200 and response_body.contains('done')").evaluate(context)
+        not_parsed = parse_count == 0
+
+        for expression in ["$.code == 0", "$.data.msg.contains('ok')", "$.data.items[0].id == 5"]:
+            compile_condition(expression).evaluate(context)
+        passed = not_parsed and parse_count == 1
+    finally:
+        condition_module._loads = original_loads
+
+    print(f"{'✅' if passed else '❌'} 非 JSON 条件不解析，3 个 JSON 条件共解析 {parse_count} 次")
+    assert passed
+
+
+def test_key_message():
+    """测试关键消息：$ 开头按 JSON 路径条件处理，否则按关键字处理"""
+    print("\n🔍 测试关键消息...")
+
+    cases = [
+        ("done", True),
+        ("$.data.msg", True),
+        ("$.data.missing", False),
+        ("$.data.msg.contains('done')", True),
+        ("$.data.msg == 'sold out'", False),
+    ]
+    passed = True
+    for key_message, expected in cases:
+        actual = compile_key_message(key_message).matches(BODY, 200)
+        if actual != expected:
+            print(f"❌ {key_message}: 期望 {expected}, 实际 {actual}")
+            passed = False
+
+    if passed:
+        print(f"✅ {len(cases)} 个关键消息全部正确")
+    assert passed
+
+
+def test_keyword_matcher():
+    """测试多关键字匹配：一次扫描得到各类别命中的关键字，按优先级取结果"""
+    print("\n🔍 测试多关键字匹配...")
+
+    matcher = KeywordMatcher(
+        {"stop": ["Sold Out", "captcha"], "key_message": ["done"], "success": ["sold", "成功"]},
+        priority=["stop", "key_message", "success"],
+    )
+    cases = [
+        ("we SOLD OUT today", ("stop", "sold out")),
+        ("抢购成功 sold", ("success", "成功")),
+        ("Done, captcha later", ("stop", "captcha")),
+        ("DONE 成功", ("key_message", "done")),
+        ("nothing", None),
+    ]
+    passed = True
+    for text, expected in cases:
+        actual = matcher.first(text)
+        if actual != expected:
+            print(f"❌ {text}: 期望 {expected}, 实际 {actual}")
+            passed = False
+
+    # 重叠的关键字都能被扫描到
+    if matcher.scan("SOLD OUT") != {"success": "sold", "stop": "sold out"}:
+        print(f"❌ 重叠关键字: {matcher.scan('SOLD OUT')}")
+        passed = False
+
+    if passed:
+        print(f"✅ {len(cases) + 1} 个匹配结果全部正确")
+    assert passed
+
+
+def test_invalid_expressions():
+    """测试非法表达式"""
+    print("\n🔍 测试非法表达式...")
+
+    passed = True
+    for expression in ["status_code ==", "response_body.contains(", "$.a == (1", "status_code == 200 )", "response_body.matches('[')"]:
+        try:
+            compile_condition(expression)
+            print(f"❌ 未能识别非法表达式: {expression}")
+            passed = False
+        except ConditionParseError as e:
+            print(f"   {expression} -> {e}")
+
+    if passed:
+        print("✅ 非法表达式全部被拒绝")
+    assert passed
+
+
+def main():
+    """主函数"""
+    print("🚀 条件表达式测试")
+    print("=" * 50)
+
+    tests = {
+        "表达式求值": test_expressions,
+        "关键字条件": test_keywords,
+        "非JSON响应": test_non_json_body,
+        "JSON延迟解析": test_lazy_json,
+        "关键消息": test_key_message,
+        "多关键字匹配": test_keyword_matcher,
+        "非法表达式": test_invalid_expressions,
+    }
+
+    results = {}
+    for name, test in tests.items():
+        try:
+            test()
+            results[name] = True
+        except AssertionError:
+            results[name] = False
+
+    print("\n" + "=" * 50)
+    print("📊 测试总结:")
+    for name, passed in results.items():
+        print(f"   {name}: {'✅ 成功' if passed else '❌ 失败'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+测试 Cron 表达式解析与触发时间计算
+"""
+
+from datetime import datetime, timedelta
+from backend.app.utils.cron import CronExpression, CronParseError, next_fire_times
+
+
+def brute_force_next(cron: CronExpression, after: datetime) -> datetime:
+    """逐分钟（或逐秒）扫描得到下次触发时间，用于校验位集算法"""
+    if cron.has_seconds:
+        step = timedelta(seconds=1)
+        current = after.replace(microsecond=0) + step
+    else:
+        step = timedelta(minutes=1)
+        current = after.replace(second=0, microsecond=0) + step
+
+    while not cron.matches(current):
+        current += step
+    return current
+
+
+def test_next_fire_time():
+    """测试下次触发时间计算"""
+    print("🔍 测试下次触发时间计算...")
+
+    cases = [
+        "*/5 * * * *",
+        "0 9 * * 1-5",
+        "30 2 29 2 *",
+        "0 0 13 * FRI",
+        "15,45 */3 1-10 JAN,JUL *",
+        "0 0 * * 7",
+        "@hourly",
+        "*/20 30 10 * * *",
+        "59 23 31 12 *",
+    ]
+    starts = [datetime(2024, 1, 1), datetime(2024, 2, 28, 23, 59, 30), datetime(2025, 7, 15, 10, 30, 40)]
+
+    passed = True
+    for expression in cases:
+        cron = CronExpression(expression)
+        for start in starts:
+            expected = brute_force_next(cron, start)
+            actual = cron.next_fire_time(start)
+            if actual != expected:
+                print(f"❌ {expression} @ {start}: 期望 {expected}, 实际 {actual}")
+                passed = False
+
+    if passed:
+        print(f"✅ {len(cases)} 个表达式的触发时间全部正确")
+    assert passed
+
+
+def test_timezone():
+    """测试时区换算"""
+    print("\n🔍 测试时区换算...")
+
+    fire_times = next_fire_times("0 10 * * *", "Asia/Shanghai", count=3)
+    intervals = {b - a for a, b in zip(fire_times, fire_times[1:])}
+    passed = len(fire_times) == 3 and intervals == {timedelta(days=1)}
+
+    print(f"{'✅' if passed else '❌'} Asia/Shanghai 每天10点: {fire_times}")
+    assert passed
+
+
+def test_invalid_expressions():
+    """测试非法表达式"""
+    print("\n🔍 测试非法表达式...")
+
+    passed = True
+    for expression in ["* * *", "61 * * * *", "* * * * MON/0", "a b c d e", "0 0 30 2 *"]:
+        try:
+            CronExpression(expression).next_fire_time(datetime(2024, 1, 1))
+            print(f"❌ 未能识别非法表达式: {expression}")
+            passed = False
+        except CronParseError as e:
+            print(f"   {expression} -> {e}")
+
+    if passed:
+        print("✅ 非法表达式全部被拒绝")
+    assert passed
+
+
+def main():
+    """主函数"""
+    print("🚀 Cron 表达式测试")
+    print("=" * 50)
+
+    tests = {
+        "触发时间计算": test_next_fire_time,
+        "时区换算": test_timezone,
+        "非法表达式": test_invalid_expressions,
+    }
+
+    results = {}
+    for name, test in tests.items():
+        try:
+            test()
+            results[name] = True
+        except AssertionError:
+            results[name] = False
+
+    print("\n" + "=" * 50)
+    print("📊 测试总结:")
+    for name, passed in results.items():
+        print(f"   {name}: {'✅ 成功' if passed else '❌ 失败'}")
+
+
+if __name__ == "__main__":
+    main()
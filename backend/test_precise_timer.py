@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+测试精确定时器的协程等待
+"""
+
+import asyncio
+import threading
+import time
+
+from backend.app.services.precise_timer import PreciseTimer
+
+
+def test_staggered_release():
+    """测试错开的截止时间：后一个协程自旋时不阻塞前一个协程释放后的回调"""
+    print("🔍 测试错开释放...")
+
+    timer = PreciseTimer(spin_threshold_ms=20)
+    stagger_ns = 5_000_000
+
+    async def run():
+        base_ns = time.monotonic_ns() + 50_000_000
+        callback_ns = []
+
+        async def first():
+            result = await timer.wait_until_async(base_ns, name="first")
+            # 模拟释放后等待连接/首字节的 I/O：需要事件循环再次调度才能继续
+            await asyncio.sleep(0.001)
+            callback_ns.append(time.monotonic_ns())
+            return result
+
+        results = await asyncio.gather(first(), timer.wait_until_async(base_ns + stagger_ns, name="second"))
+        return base_ns, results, callback_ns
+
+    base_ns, results, callback_ns = asyncio.run(run())
+    second_deadline_ns = base_ns + stagger_ns
+
+    passed = (
+        len(callback_ns) == 1
+        and callback_ns[0] < second_deadline_ns
+        and all(result.released_ns >= result.deadline_ns for result in results)
+    )
+    lead_ms = (second_deadline_ns - callback_ns[0]) / 1e6 if callback_ns else 0.0
+    print(f"{'✅' if passed else '❌'} 首个回调早于第二个截止时间 {lead_ms:.3f}ms，"
+          f"释放误差 {[f'{result.error_us:.0f}us' for result in results]}")
+    assert passed
+
+
+def test_stop_flag():
+    """测试粗略等待阶段被停止时立即返回"""
+    print("\n🔍 测试停止等待...")
+
+    timer = PreciseTimer(spin_threshold_ms=2)
+    stop_flag = threading.Event()
+    stop_flag.set()
+
+    started = time.monotonic()
+    result = asyncio.run(timer.wait_until_async(time.monotonic_ns() + 10_000_000_000, stop_flag=stop_flag))
+    elapsed = time.monotonic() - started
+
+    passed = result.stopped and elapsed < 1.0
+    print(f"{'✅' if passed else '❌'} stopped={result.stopped}, 耗时 {elapsed:.3f}s")
+    assert passed
+
+
+def main():
+    """主函数"""
+    print("🚀 精确定时器测试")
+    print("=" * 50)
+
+    tests = {
+        "错开释放": test_staggered_release,
+        "停止等待": test_stop_flag,
+    }
+
+    results = {}
+    for name, test in tests.items():
+        try:
+            test()
+            results[name] = True
+        except AssertionError:
+            results[name] = False
+
+    print("\n" + "=" * 50)
+    print("📊 测试总结:")
+    for name, passed in results.items():
+        print(f"   {name}: {'✅ 成功' if passed else '❌ 失败'}")
+
+
+if __name__ == "__main__":
+    main()
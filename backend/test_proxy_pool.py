@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+测试共享代理池（使用桩代理API，不访问网络）
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Union
+
+from backend.app.models.task import ProxyUnavailablePolicyEnum
+from backend.app.services.proxy_pool import ProxyHealth, ProxyPool, ProxyPoolState, ProxyUnavailableError
+from backend.app.services.scheduler_service import TaskRunner
+from backend.app.services.task_group import StopToken
+
+
+FetchResult = Union[List[str], Exception]
+
+
+class StubProxyPool(ProxyPool):
+    """代理API由桩函数代替：responses 为 地址 -> 代理列表 / 异常 / 返回二者之一的函数"""
+
+    def __init__(self, responses: Dict[str, Union[FetchResult, Callable[[], FetchResult]]], **kwargs):
+        urls = list(responses)
+        super().__init__(urls[0], fallback_urls=urls[1:], **kwargs)
+        self.responses = responses
+        self.fetched: List[str] = []  # 按顺序记录访问过的代理API
+
+    def _fetch(self, url: str) -> List[str]:
+        self.fetched.append(url)
+        response = self.responses[url]
+        if callable(response):
+            response = response()
+        if isinstance(response, Exception):
+            raise response
+        return list(response)
+
+
+def proxies(prefix: str, count: int) -> List[str]:
+    """生成一组代理地址"""
+    return [f"http://{prefix}{i}:8080" for i in range(count)]
+
+
+def test_atomic_replacement():
+    """测试刷新线程整体替换代理列表：并发读取方看到的始终是某一次获取的完整列表"""
+    print("🔍 测试代理列表整体替换...")
+
+    lists = [proxies("a", 50), proxies("b", 30)]
+    turn = [0]
+
+    def next_list():
+        turn[0] += 1
+        return lists[turn[0] % 2]
+
+    pool = StubProxyPool({"http://provider/": next_list})
+    pool.refresh()
+
+    stop = threading.Event()
+    errors: List[str] = []
+    reads = [0]
+
+    def reader():
+        while not stop.is_set():
+            snapshot = [item["proxy"] for item in pool.get_ranking()]
+            if set(snapshot) not in (set(lists[0]), set(lists[1])):
+                errors.append(f"列表不完整: {len(snapshot)} 个")
+            proxy = pool.pick()
+            if proxy is None or not (proxy in lists[0] or proxy in lists[1]):
+                errors.append(f"选到无效代理: {proxy}")
+            reads[0] += 1
+
+    readers = [threading.Thread(target=reader) for _ in range(4)]
+    for thread in readers:
+        thread.start()
+    for _ in range(100):
+        pool.refresh()
+    stop.set()
+    for thread in readers:
+        thread.join()
+
+    passed = not errors and pool.fetch_count == 101 and reads[0] > 0
+    print(f"{'✅' if passed else '❌'} 刷新 {pool.fetch_count} 次，并发读取 {reads[0]} 次，异常 {len(errors)} 次"
+          + (f": {errors[0]}" if errors else ""))
+    assert passed
+
+
+def test_health_kept_across_refresh():
+    """测试刷新后仍在列表中的代理保留健康统计，已移除的代理不再接受反馈"""
+    print("\n🔍 测试刷新保留健康统计...")
+
+    current = [proxies("a", 3)]
+    pool = StubProxyPool({"http://provider/": lambda: current[0]})
+    pool.refresh()
+
+    kept, removed = current[0][0], current[0][2]
+    pool.report(kept, True, 50.0)
+    pool.report(removed, True, 50.0)
+
+    current[0] = current[0][:2] + proxies("c", 1)
+    pool.refresh()
+    pool.report(removed, False)
+
+    ranking = {item["proxy"]: item for item in pool.get_ranking()}
+    passed = (
+        pool.size == 3
+        and removed not in ranking
+        and ranking[kept]["successes"] == 1
+        and ranking[kept]["ewma_ms"] == 50.0
+        and ranking[current[0][2]]["successes"] == 0
+    )
+    print(f"{'✅' if passed else '❌'} 保留代理成功 {ranking[kept]['successes']} 次，"
+          f"已移除代理{'不在' if removed not in ranking else '仍在'}排名中")
+    assert passed
+
+
+def test_latency_ewma():
+    """测试延迟EWMA与成功率"""
+    print("\n🔍 测试延迟EWMA...")
+
+    health = ProxyHealth("http://a0:8080")
+    rate_before = health.success_rate
+    for latency in (100.0, 200.0, 200.0):
+        health.record_success(latency)
+    health.record_failure(0.0, 1.0, 60.0)
+
+    # 100 -> 100 + 0.3 * 100 = 130 -> 130 + 0.3 * 70 = 151
+    passed = (
+        rate_before == 0.5
+        and abs(health.ewma_ms - 151.0) < 1e-9
+        and abs(health.success_rate - 4 / 6) < 1e-9
+    )
+    print(f"{'✅' if passed else '❌'} EWMA {health.ewma_ms:.1f}ms，成功率 {health.success_rate:.3f}")
+    assert passed
+
+
+def test_quarantine_backoff():
+    """测试失败隔离按连续失败次数指数退避，隔离期内的失败不延长隔离，成功解除隔离"""
+    print("\n🔍 测试失败隔离...")
+
+    health = ProxyHealth("http://a0:8080")
+    delays = []
+    extended = []
+    now = 0.0
+    for _ in range(5):
+        health.record_failure(now, 1.0, 4.0)
+        delays.append(health.quarantined_until - now)
+        # 隔离期内陆续失败的并发请求
+        extended.append(health.record_failure(now + 0.1, 1.0, 4.0))
+        now = health.quarantined_until
+
+    released = health.record_success(10.0)
+    passed = (
+        delays == [1.0, 2.0, 4.0, 4.0, 4.0]
+        and not any(extended)
+        and health.consecutive_failures == 0
+        and released
+        and health.quarantined_until == 0.0
+    )
+    print(f"{'✅' if passed else '❌'} 隔离时长 {delays}，成功后解除隔离: {released}")
+    assert passed
+
+
+def test_weighted_pick():
+    """测试按健康度加权选择：快的代理被选中更多，隔离的代理不被选择，全部隔离时选最早解除的"""
+    print("\n🔍 测试加权选择...")
+
+    fast, slow, bad = proxies("a", 3)
+    pool = StubProxyPool({"http://provider/": [fast, slow, bad]}, quarantine_base_seconds=30)
+    pool.refresh()
+    pool.report(fast, True, 10.0)
+    pool.report(slow, True, 1000.0)
+    pool.report(bad, False)
+
+    picks = [pool.pick() for _ in range(2000)]
+    fast_share = picks.count(fast) / len(picks)
+    best = pool.pick(rotation=False)
+
+    pool.report(fast, False)
+    pool.report(slow, False)
+    health = {item["proxy"]: item for item in pool.get_ranking()}
+    earliest = min((fast, slow, bad), key=lambda proxy: health[proxy]["quarantine_remaining_seconds"])
+    fallback = {pool.pick() for _ in range(20)}
+
+    passed = (
+        bad not in picks
+        and fast_share > 0.9
+        and best == fast
+        and not pool.is_available(bad)
+        and fallback == {earliest}
+    )
+    print(f"{'✅' if passed else '❌'} 快代理占比 {fast_share:.1%}，固定选择 {best == fast}，"
+          f"全部隔离时选择 {fallback}")
+    assert passed
+
+
+def test_circuit_breaker():
+    """测试代理API熔断：按顺序使用备用地址，连续失败达到阈值后熔断，熔断结束后试探恢复"""
+    print("\n🔍 测试熔断与备用地址...")
+
+    primary, first_fallback, second_fallback = "http://primary/", "http://fallback-1/", "http://fallback-2/"
+    pool = StubProxyPool({
+        primary: ConnectionError("primary down"),
+        first_fallback: [],
+        second_fallback: proxies("f", 2),
+    })
+    pool.circuit_failure_threshold = 2
+
+    orders = []
+    for _ in range(3):
+        pool.fetched.clear()
+        pool.refresh()
+        orders.append(list(pool.fetched))
+    stats = {source["url"]: source for source in pool.get_stats()["sources"]}
+    healthy_state, healthy_source = pool.state, pool.last_source
+
+    # 所有地址都失败：保留原列表并降级，全部熔断后等到最早的熔断结束
+    pool.responses[second_fallback] = ConnectionError("fallback down")
+    pool.refresh()
+    pool.refresh()
+    degraded_size = pool.size
+    open_state = pool.state
+    delay = pool.next_refresh_delay(False)
+
+    # 熔断结束后主地址恢复
+    for source in pool._sources:
+        source.open_until = 0.0
+    pool.responses[primary] = proxies("p", 3)
+    pool.fetched.clear()
+    recovered = pool.refresh()
+
+    passed = (
+        orders[0] == [primary, first_fallback, second_fallback]
+        and orders[1] == [primary, first_fallback, second_fallback]
+        and orders[2] == [second_fallback]
+        and stats[primary]["circuit_open"] and stats[first_fallback]["circuit_open"]
+        and healthy_state == ProxyPoolState.HEALTHY and healthy_source == second_fallback
+        and degraded_size == 2
+        and open_state == ProxyPoolState.CIRCUIT_OPEN
+        and delay >= pool.circuit_open_seconds - 1
+        and recovered and pool.fetched == [primary] and pool.last_source == primary
+        and pool.state == ProxyPoolState.HEALTHY and pool.size == 3
+    )
+    print(f"{'✅' if passed else '❌'} 访问顺序 {[len(order) for order in orders]}，熔断后状态 {open_state.value}，"
+          f"重试等待 {delay:.0f}s，恢复后来源 {pool.last_source}")
+    assert passed
+
+
+def test_unavailable_states():
+    """测试从未获取到代理时的状态：失败为 unavailable，全部熔断为 circuit_open"""
+    print("\n🔍 测试无代理状态...")
+
+    pool = StubProxyPool({"http://provider/": ConnectionError("down")})
+    pool.circuit_failure_threshold = 2
+    pool.refresh()
+    first_state = pool.state
+    pool.refresh()
+
+    passed = (
+        first_state == ProxyPoolState.UNAVAILABLE
+        and pool.state == ProxyPoolState.CIRCUIT_OPEN
+        and pool.wait_ready(0) is False
+    )
+    print(f"{'✅' if passed else '❌'} 状态 {first_state.value} -> {pool.state.value}")
+    assert passed
+
+
+def test_wait_available():
+    """测试等待代理：刷新线程替换为非空列表时立即唤醒，取消停止令牌时立即返回"""
+    print("\n🔍 测试等待代理...")
+
+    current: List[FetchResult] = [ConnectionError("down")]
+    pool = StubProxyPool({"http://provider/": lambda: current[0]})
+    pool.refresh()
+
+    def refresh_later():
+        time.sleep(0.1)
+        current[0] = proxies("a", 2)
+        pool.refresh()
+
+    threading.Thread(target=refresh_later, daemon=True).start()
+    started = time.monotonic()
+    available = pool.wait_available(5)
+    available_elapsed = time.monotonic() - started
+
+    empty = StubProxyPool({"http://provider/": ConnectionError("down")})
+    stop_token = StopToken()
+    threading.Timer(0.1, stop_token.set).start()
+    started = time.monotonic()
+    stopped = empty.wait_available(5, stop_token)
+    stopped_elapsed = time.monotonic() - started
+
+    timed_out = empty.wait_available(0.05)
+
+    passed = (
+        available and available_elapsed < 0.5
+        and not stopped and stopped_elapsed < 0.5
+        and not timed_out and not empty._waiters
+    )
+    print(f"{'✅' if passed else '❌'} 获取到代理后 {available_elapsed * 1000:.0f}ms 唤醒，"
+          f"停止后 {stopped_elapsed * 1000:.0f}ms 返回")
+    assert passed
+
+
+def attach_runner(pool: ProxyPool, policy: ProxyUnavailablePolicyEnum, wait_seconds: float = 5) -> tuple:
+    """创建使用指定无代理策略的执行器（不访问数据库）"""
+    task = SimpleNamespace(
+        name="proxy-policy",
+        proxy_config={"enabled": True, "unavailable_policy": policy.value, "unavailable_wait_seconds": wait_seconds},
+    )
+    request = SimpleNamespace(url="http://target.example/")
+    runner = TaskRunner(1, 1)
+    runner._attach_proxy_pool(task, request, pool)
+    return runner, task
+
+
+def test_unavailable_policies():
+    """测试代理池为空时的三种处理策略：direct 直连，fail 本次失败，wait 等待代理"""
+    print("\n🔍 测试无代理处理策略...")
+
+    current: List[FetchResult] = [ConnectionError("down")]
+    pool = StubProxyPool({"http://provider/": lambda: current[0]})
+    pool.refresh()
+
+    runner, task = attach_runner(pool, ProxyUnavailablePolicyEnum.DIRECT)
+    direct_proxy = runner._select_proxy(task)
+    direct_ok = direct_proxy is None and not runner._proxy_required(task, direct_proxy)
+
+    runner, task = attach_runner(pool, ProxyUnavailablePolicyEnum.FAIL)
+    started = time.monotonic()
+    try:
+        runner._wait_for_proxy(task)
+        fail_ok = False
+    except ProxyUnavailableError:
+        fail_ok = runner._proxy_required(task, None) and time.monotonic() - started < 0.1
+
+    runner, task = attach_runner(pool, ProxyUnavailablePolicyEnum.WAIT, wait_seconds=5)
+    wait_required = runner._proxy_required(task, None)
+
+    def refresh_later():
+        time.sleep(0.1)
+        current[0] = proxies("a", 2)
+        pool.refresh()
+
+    threading.Thread(target=refresh_later, daemon=True).start()
+    started = time.monotonic()
+    waited_proxy = runner._wait_for_proxy(task)
+    wait_elapsed = time.monotonic() - started
+    wait_ok = wait_required and waited_proxy in proxies("a", 2) and wait_elapsed < 0.5
+
+    passed = direct_ok and fail_ok and wait_ok
+    print(f"{'✅' if passed else '❌'} direct: {direct_ok}, fail: {fail_ok}, "
+          f"wait: {waited_proxy}（{wait_elapsed * 1000:.0f}ms）")
+    assert passed
+
+
+def main():
+    """主函数"""
+    print("🚀 代理池测试")
+    print("=" * 50)
+
+    tests = {
+        "代理列表整体替换": test_atomic_replacement,
+        "刷新保留健康统计": test_health_kept_across_refresh,
+        "延迟EWMA": test_latency_ewma,
+        "失败隔离": test_quarantine_backoff,
+        "加权选择": test_weighted_pick,
+        "熔断与备用地址": test_circuit_breaker,
+        "无代理状态": test_unavailable_states,
+        "等待代理": test_wait_available,
+        "无代理处理策略": test_unavailable_policies,
+    }
+
+    results = {}
+    for name, test in tests.items():
+        try:
+            test()
+            results[name] = True
+        except AssertionError:
+            results[name] = False
+
+    print("\n" + "=" * 50)
+    print("📊 测试总结:")
+    for name, passed in results.items():
+        print(f"   {name}: {'✅ 成功' if passed else '❌ 失败'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+测试执行记录后台批量写入
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.app.models.base import Base
+from backend.app.models.execution import ExecutionRecord, ExecutionStatusEnum
+from backend.app.models.request import HttpRequest
+from backend.app.models.task import Task
+from backend.app.services import record_writer as record_writer_module
+from backend.app.services.record_writer import ExecutionRecordWriter
+
+
+class MemoryDatabase:
+    """内存 SQLite 数据库，统计对 tasks 表执行的 UPDATE 语句数"""
+
+    def __init__(self):
+        self.engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(bind=self.engine, autoflush=False)
+        self.task_updates = 0
+        self.fail_writes = False
+
+        @event.listens_for(self.engine, "before_cursor_execute")
+        def count_updates(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("UPDATE TASKS"):
+                self.task_updates += 1
+
+        with self.context() as db:
+            request = HttpRequest(name="req", method="GET", url="http://localhost/")
+            db.add(request)
+            db.flush()
+            for name in ("a", "b"):
+                db.add(Task(name=name, request_id=request.id, task_type="single", schedule_config={}))
+            db.commit()
+            self.request_id = request.id
+            self.task_ids = [task.id for task in db.query(Task).order_by(Task.id)]
+
+    @contextmanager
+    def context(self):
+        if self.fail_writes:
+            raise RuntimeError("database unavailable")
+        db = self.Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def record(self, task_id: int, status: ExecutionStatusEnum, execution_time: datetime):
+        return {
+            "task_id": task_id,
+            "request_id": self.request_id,
+            "status": status,
+            "execution_time": execution_time,
+        }
+
+    def count_records(self) -> int:
+        with self.context() as db:
+            return db.query(ExecutionRecord).count()
+
+    def task(self, task_id: int) -> Task:
+        with self.context() as db:
+            return db.get(Task, task_id)
+
+
+@contextmanager
+def patched_database():
+    """把写入器使用的数据库会话替换为内存数据库"""
+    database = MemoryDatabase()
+    original = record_writer_module.get_db_context
+    record_writer_module.get_db_context = database.context
+    try:
+        yield database
+    finally:
+        record_writer_module.get_db_context = original
+
+
+def test_size_trigger():
+    """测试累计到 batch_size 条时立即写入，不等待最长间隔"""
+    print("🔍 测试按条数写入...")
+
+    with patched_database() as database:
+        writer = ExecutionRecordWriter(batch_size=5, flush_ms=60_000)
+        now = datetime.now()
+        for _ in range(5):
+            writer.submit(database.record(database.task_ids[0], ExecutionStatusEnum.SUCCESS, now))
+
+        deadline = time.monotonic() + 2
+        while writer.written_count < 5 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        written = database.count_records()
+        writer.stop()
+
+    passed = written == 5 and writer.flush_count == 1
+    print(f"{'✅' if passed else '❌'} 写入 {written} 条，批量写入 {writer.flush_count} 次")
+    assert passed
+
+
+def test_time_trigger():
+    """测试不足 batch_size 条时在 flush_ms 后写入"""
+    print("\n🔍 测试按时间写入...")
+
+    with patched_database() as database:
+        writer = ExecutionRecordWriter(batch_size=1000, flush_ms=100)
+        started = time.monotonic()
+        writer.submit(database.record(database.task_ids[0], ExecutionStatusEnum.SUCCESS, datetime.now()))
+
+        while writer.written_count < 1 and time.monotonic() - started < 2:
+            time.sleep(0.005)
+        elapsed = time.monotonic() - started
+        written = database.count_records()
+        writer.stop()
+
+    passed = written == 1 and writer.flush_count == 1 and 0.09 <= elapsed < 1.0
+    print(f"{'✅' if passed else '❌'} 写入 {written} 条，入队后 {elapsed * 1000:.0f}ms 写入")
+    assert passed
+
+
+def test_aggregated_deltas():
+    """测试同一批次中同一任务的多条记录聚合为一条 UPDATE"""
+    print("\n🔍 测试执行统计聚合...")
+
+    with patched_database() as database:
+        writer = ExecutionRecordWriter(batch_size=1000, flush_ms=60_000)
+        task_a, task_b = database.task_ids
+        base = datetime(2024, 1, 1, 12, 0, 0)
+        records = [
+            database.record(task_a, ExecutionStatusEnum.SUCCESS, base + timedelta(seconds=2)),
+            database.record(task_a, ExecutionStatusEnum.FAILED, base + timedelta(seconds=5)),
+            database.record(task_a, ExecutionStatusEnum.TIMEOUT, base + timedelta(seconds=1)),
+            database.record(task_b, ExecutionStatusEnum.SUCCESS, base),
+        ]
+        for record in records:
+            writer.submit(record)
+        flushed = writer.flush()
+        writer.stop()
+
+        a = database.task(task_a)
+        b = database.task(task_b)
+        updates = database.task_updates
+
+    passed = (
+        flushed
+        and updates == 2
+        and (a.execution_count, a.success_count, a.failure_count) == (3, 1, 2)
+        and a.last_execution_at == base + timedelta(seconds=5)
+        and (b.execution_count, b.success_count, b.failure_count) == (1, 1, 0)
+    )
+    print(f"{'✅' if passed else '❌'} UPDATE {updates} 条，任务A: {a.execution_count}/{a.success_count}/"
+          f"{a.failure_count} 最后执行 {a.last_execution_at}，任务B: {b.execution_count}/{b.success_count}/{b.failure_count}")
+    assert passed
+
+
+def test_drop_when_full():
+    """测试数据库写入阻塞导致队列写满时丢弃新记录，提交不阻塞"""
+    print("\n🔍 测试队列已满时丢弃...")
+
+    with patched_database() as database:
+        blocked = threading.Event()
+        release = threading.Event()
+        original_context = database.context
+
+        @contextmanager
+        def slow_context():
+            blocked.set()
+            release.wait(5)
+            with original_context() as db:
+                yield db
+
+        record_writer_module.get_db_context = slow_context
+        writer = ExecutionRecordWriter(batch_size=2, flush_ms=60_000, queue_size=4)
+        task_id = database.task_ids[0]
+        now = datetime.now()
+
+        # 前两条组成一批后写入线程阻塞在数据库上，随后队列最多再缓存 4 条
+        writer.submit(database.record(task_id, ExecutionStatusEnum.SUCCESS, now))
+        writer.submit(database.record(task_id, ExecutionStatusEnum.SUCCESS, now))
+        blocked.wait(2)
+
+        started = time.monotonic()
+        for _ in range(10):
+            writer.submit(database.record(task_id, ExecutionStatusEnum.SUCCESS, now))
+        submit_elapsed = time.monotonic() - started
+        dropped = writer.dropped_count
+
+        release.set()
+        writer.flush()
+        writer.stop()
+        written = database.count_records()
+
+    passed = dropped == 6 and written == 6 and submit_elapsed < 0.5 and writer.get_stats()["dropped"] == 6
+    print(f"{'✅' if passed else '❌'} 丢弃 {dropped} 条，写入 {written} 条，提交耗时 {submit_elapsed * 1000:.1f}ms")
+    assert passed
+
+
+def test_drop_on_write_error():
+    """测试数据库写入失败时整批计入丢弃数"""
+    print("\n🔍 测试写入失败时丢弃...")
+
+    with patched_database() as database:
+        writer = ExecutionRecordWriter(batch_size=3, flush_ms=60_000)
+        database.fail_writes = True
+        now = datetime.now()
+        for _ in range(3):
+            writer.submit(database.record(database.task_ids[0], ExecutionStatusEnum.SUCCESS, now))
+        writer.flush()
+        writer.stop()
+
+    passed = writer.dropped_count == 3 and writer.written_count == 0
+    print(f"{'✅' if passed else '❌'} 丢弃 {writer.dropped_count} 条，写入 {writer.written_count} 条")
+    assert passed
+
+
+def main():
+    """主函数"""
+    print("🚀 执行记录批量写入测试")
+    print("=" * 50)
+
+    tests = {
+        "按条数写入": test_size_trigger,
+        "按时间写入": test_time_trigger,
+        "执行统计聚合": test_aggregated_deltas,
+        "队列已满时丢弃": test_drop_when_full,
+        "写入失败时丢弃": test_drop_on_write_error,
+    }
+
+    results = {}
+    for name, test in tests.items():
+        try:
+            test()
+            results[name] = True
+        except AssertionError:
+            results[name] = False
+
+    print("\n" + "=" * 50)
+    print("📊 测试总结:")
+    for name, passed in results.items():
+        print(f"   {name}: {'✅ 成功' if passed else '❌ 失败'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+测试任务执行组与停止令牌
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.app.services.task_group import StopToken, TaskGroup
+
+
+class FakeRunner:
+    """模拟执行器：cooperative 为 True 时响应停止令牌，否则卡住直到 release 被设置"""
+
+    def __init__(self, stop_token: StopToken, cooperative: bool, release: threading.Event):
+        self.stop_token = stop_token
+        self.cooperative = cooperative
+        self.release = release
+        self.running = False
+        self.in_flight = False
+
+    def run(self):
+        self.running = True
+        self.in_flight = not self.cooperative
+        try:
+            if self.cooperative:
+                self.stop_token.wait(5)
+            else:
+                self.release.wait(5)
+        finally:
+            self.running = False
+            self.in_flight = False
+
+
+def start_group(cooperative_flags):
+    """按给定的执行器行为创建执行组，返回执行组、卡住执行器的放行事件与清理次数"""
+    stop_token = StopToken(len(cooperative_flags))
+    executor = ThreadPoolExecutor(max_workers=len(cooperative_flags))
+    group = TaskGroup(1, stop_token, executor=executor)
+    release = threading.Event()
+    cleanups = []
+    all_done = threading.Event()
+
+    def on_done(_future):
+        if group.mark_done():
+            cleanups.append(threading.current_thread().name)
+            all_done.set()
+
+    for cooperative in cooperative_flags:
+        runner = FakeRunner(stop_token, cooperative, release)
+        future = executor.submit(runner.run)
+        group.add(runner, future)
+        future.add_done_callback(on_done)
+
+    return group, release, cleanups, all_done
+
+
+def test_stop_cooperative():
+    """测试所有执行器都响应停止令牌时 stop 返回 True"""
+    print("🔍 测试协作式停止...")
+
+    group, _, cleanups, all_done = start_group([True, True, True])
+    stopped = group.stop(timeout=2)
+    all_done.wait(2)
+
+    passed = stopped and group.alive_count == 0 and len(cleanups) == 1
+    print(f"{'✅' if passed else '❌'} stopped={stopped}, alive={group.alive_count}, 清理次数={len(cleanups)}")
+    assert passed
+
+
+def test_stop_stuck_runner():
+    """测试有执行器卡住时 stop 超时返回 False，卡住的执行器结束后才清理"""
+    print("\n🔍 测试卡住的执行器...")
+
+    group, release, cleanups, all_done = start_group([True, False, True])
+    stopped = group.stop(timeout=0.3)
+    alive_after_stop = group.alive_count
+    in_flight_after_stop = group.attempts_in_flight
+    cleanups_before_release = len(cleanups)
+
+    release.set()
+    all_done.wait(2)
+
+    passed = (
+        not stopped
+        and alive_after_stop == 1
+        and in_flight_after_stop == 1
+        and cleanups_before_release == 0
+        and len(cleanups) == 1
+        and group.alive_count == 0
+    )
+    print(f"{'✅' if passed else '❌'} stopped={stopped}, 超时后存活={alive_after_stop}, "
+          f"放行前清理次数={cleanups_before_release}, 最终清理次数={len(cleanups)}")
+    assert passed
+
+
+def test_mark_done_last_only():
+    """测试只有最后一个结束的 Future 触发清理"""
+    print("\n🔍 测试最后一个 Future 触发清理...")
+
+    group = TaskGroup(1, StopToken(3))
+    for _ in range(3):
+        group.add(object(), None)
+
+    results = [group.mark_done() for _ in range(3)]
+    passed = results == [False, False, True]
+    print(f"{'✅' if passed else '❌'} mark_done 结果: {results}")
+    assert passed
+
+
+def test_stop_token():
+    """测试停止令牌只有第一个取消者负责写入最终状态"""
+    print("\n🔍 测试停止令牌...")
+
+    token = StopToken(2)
+    first = token.cancel("success")
+    second = token.cancel("stopped")
+
+    exhausted = StopToken(2)
+    exhausted_results = [exhausted.runner_exhausted(), exhausted.runner_exhausted()]
+
+    passed = (
+        first and not second and token.reason == "success" and token.is_set()
+        and exhausted_results == [False, True]
+    )
+    print(f"{'✅' if passed else '❌'} cancel: {first}/{second}, reason={token.reason}, "
+          f"runner_exhausted: {exhausted_results}")
+    assert passed
+
+
+def main():
+    """主函数"""
+    print("🚀 任务执行组测试")
+    print("=" * 50)
+
+    tests = {
+        "协作式停止": test_stop_cooperative,
+        "卡住的执行器": test_stop_stuck_runner,
+        "最后一个Future清理": test_mark_done_last_only,
+        "停止令牌": test_stop_token,
+    }
+
+    results = {}
+    for name, test in tests.items():
+        try:
+            test()
+            results[name] = True
+        except AssertionError:
+            results[name] = False
+
+    print("\n" + "=" * 50)
+    print("📊 测试总结:")
+    for name, passed in results.items():
+        print(f"   {name}: {'✅ 成功' if passed else '❌ 失败'}")
+
+
+if __name__ == "__main__":
+    main()
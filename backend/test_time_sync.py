@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+测试时间源与网络时间同步
+全部使用本地模拟时间服务器，不访问外网
+"""
+
+import statistics
+import time
+
+from backend.app.services.local_time_server import LocalTimeServer
+from backend.app.services.network_time_service import NetworkTimeService
+from backend.app.services.time_sources import (
+    FixtureTimeSource, HttpDateTimeSource, HttpJsonTimeSource, NtpTimeSource, TimeSourceError,
+    TimeSourceRegistry, combine_samples
+)
+
+
+OFFSET_MS = 1234.5   # 模拟时钟相对本机的偏移
+ONE_WAY_MS = 2.0     # 模拟的单程延迟
+
+
+def _check_source(label, source, samples=8):
+    """采样一个时间源，检查真实时间差落在估计区间内"""
+    started = time.perf_counter()
+    collected = source.collect(samples, timeout=2.0, interval_ms=5)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if not collected:
+        print(f"❌ {label}: 没有取得样本")
+        return False
+
+    lower_ns, upper_ns, _ = combine_samples(collected, 3)
+    offset_ms = (lower_ns + upper_ns) / 2 / 1e6
+    uncertainty_ms = (upper_ns - lower_ns) / 2 / 1e6
+    error_ms = offset_ms - OFFSET_MS
+    passed = abs(error_ms) <= uncertainty_ms
+    print(
+        f"{'✅' if passed else '❌'} {label}: 时间差 {offset_ms:.3f}ms（误差 {error_ms:+.3f}ms，区间 ±{uncertainty_ms:.3f}ms），"
+        f"样本 {len(collected)}，耗时 {elapsed_ms:.0f}ms"
+    )
+    return passed
+
+
+def check_sources(server):
+    """测试各类时间源的估计结果"""
+    print("🔍 测试时间源...")
+
+    host, port = server.ntp_address
+    results = [
+        _check_source("JSON 时间戳", HttpJsonTimeSource(server.json_url)),
+        _check_source("JSON 字段路径", HttpJsonTimeSource(f"{server.base_url}/taobao", path="data.t")),
+        _check_source("Date 头", HttpDateTimeSource(f"{server.base_url}/"), samples=12),
+        _check_source("NTP", NtpTimeSource(host, port)),
+    ]
+
+    fixture = FixtureTimeSource(offset_ms=OFFSET_MS, one_way_ms=ONE_WAY_MS)
+    try:
+        results.append(_check_source("本地模拟时间源", fixture))
+    finally:
+        fixture.server.stop()
+    assert all(results)
+
+
+def check_registry_selection(server):
+    """测试同步时选用误差最小的时间源，失败的时间源进入退避"""
+    print("\n🔍 测试时间源选择...")
+
+    with LocalTimeServer() as dead:
+        dead_url = dead.json_url  # 停止后该端口拒绝连接
+
+    service = NetworkTimeService()
+    service.sources = TimeSourceRegistry([
+        {"type": "date", "name": "date", "url": f"{server.base_url}/"},
+        {"type": "json", "name": "dead", "url": dead_url},
+        {"type": "json", "name": "json", "url": server.json_url},
+    ])
+    estimate = service.sync_clock()
+
+    stats = {item["name"]: item for item in service.get_source_stats()}
+    candidates = [source.name for source in service.sources.candidates()]
+    passed = True
+    if estimate is None or estimate.source != "json":
+        print(f"❌ 应选用毫秒级的 JSON 时间源，实际: {estimate and estimate.source}")
+        passed = False
+    elif abs(estimate.offset_s * 1000 - OFFSET_MS) > estimate.uncertainty_ms:
+        print(f"❌ 时间差 {estimate.offset_s * 1000:.3f}ms 超出误差 ±{estimate.uncertainty_ms:.3f}ms")
+        passed = False
+    if stats["dead"]["failures"] != 1 or "dead" in candidates:
+        print(f"❌ 失败的时间源应计入失败并暂停使用: {stats['dead']}，候选 {candidates}")
+        passed = False
+    if candidates[0] != "json":
+        print(f"❌ 候选顺序应以 JSON 时间源开头: {candidates}")
+        passed = False
+
+    try:
+        TimeSourceRegistry([{"type": "unknown"}])
+        print("❌ 未知类型的时间源应被拒绝")
+        passed = False
+    except TimeSourceError:
+        pass
+
+    if passed:
+        print(f"✅ 选用 {estimate.source}，误差 ±{estimate.uncertainty_ms:.3f}ms，候选顺序 {candidates}")
+    assert passed
+
+
+def test_sources():
+    """各类时间源（pytest 入口）"""
+    with LocalTimeServer(offset_ms=OFFSET_MS, one_way_ms=ONE_WAY_MS) as server:
+        check_sources(server)
+
+
+def test_registry_selection():
+    """时间源选择（pytest 入口）"""
+    with LocalTimeServer(offset_ms=OFFSET_MS, one_way_ms=ONE_WAY_MS) as server:
+        check_registry_selection(server)
+
+
+def benchmark(server, rounds=5):
+    """各时间源多次同步的误差和耗时"""
+    print("\n📈 时间源基准（本地模拟服务器，单程延迟 {:.1f}ms）".format(ONE_WAY_MS))
+
+    host, port = server.ntp_address
+    sources = {
+        "json": HttpJsonTimeSource(server.json_url),
+        "date": HttpDateTimeSource(f"{server.base_url}/"),
+        "ntp": NtpTimeSource(host, port),
+    }
+    for name, source in sources.items():
+        uncertainties, errors, durations = [], [], []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            lower_ns, upper_ns, _ = combine_samples(source.collect(8, timeout=2.0, interval_ms=5), 3)
+            durations.append((time.perf_counter() - started) * 1000)
+            uncertainties.append((upper_ns - lower_ns) / 2 / 1e6)
+            errors.append(abs((lower_ns + upper_ns) / 2 / 1e6 - OFFSET_MS))
+        print(
+            f"   {name:<5} 误差区间中位数 ±{statistics.median(uncertainties):.3f}ms，"
+            f"实际误差最大 {max(errors):.3f}ms，单次同步耗时中位数 {statistics.median(durations):.0f}ms"
+        )
+
+
+def main():
+    """主函数"""
+    print("🚀 时间同步测试")
+    print("=" * 50)
+
+    checks = {
+        "时间源": check_sources,
+        "时间源选择": check_registry_selection,
+    }
+
+    results = {}
+    with LocalTimeServer(offset_ms=OFFSET_MS, one_way_ms=ONE_WAY_MS) as server:
+        for name, check in checks.items():
+            try:
+                check(server)
+                results[name] = True
+            except AssertionError:
+                results[name] = False
+        benchmark(server)
+
+    print("\n" + "=" * 50)
+    print("📊 测试总结:")
+    for name, passed in results.items():
+        print(f"   {name}: {'✅ 成功' if passed else '❌ 失败'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+测试任务定时队列
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+from backend.app.services.timer_queue import TaskTimerQueue
+
+
+def after(seconds: float) -> datetime:
+    """距今 seconds 秒的本地时间"""
+    return datetime.now() + timedelta(seconds=seconds)
+
+
+def wait_in_thread(queue: TaskTimerQueue):
+    """在后台线程中调用 wait_for_due，返回线程与结果列表（[到期任务ID列表, 返回时刻]）"""
+    result = []
+
+    def target():
+        due = queue.wait_for_due()
+        result.extend([due, time.monotonic()])
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    return thread, result
+
+
+def test_heap_order():
+    """测试按到期时间顺序出队，与加入顺序无关"""
+    print("🔍 测试到期顺序...")
+
+    queue = TaskTimerQueue()
+    queue.schedule(1, after(0.15))
+    queue.schedule(2, after(0.05))
+    queue.schedule(3, after(0.10))
+    queue.schedule(4)
+
+    order = []
+    while len(order) < 4:
+        order.extend(queue.wait_for_due())
+
+    passed = order == [4, 2, 3, 1] and len(queue) == 0
+    print(f"{'✅' if passed else '❌'} 出队顺序: {order}")
+    assert passed
+
+
+def test_cancel_and_rearm():
+    """测试取消与同一任务重新调度：旧的堆元素失效，只按最后一次调度出队一次"""
+    print("\n🔍 测试取消与重新调度...")
+
+    queue = TaskTimerQueue()
+    queue.schedule(1, after(0.05))
+    cancelled = queue.cancel(1)
+    cancelled_again = queue.cancel(1)
+    empty_after_cancel = len(queue) == 0 and 1 not in queue
+
+    # 先推迟再提前：只应在提前后的时间出队一次
+    queue.schedule(2, after(0.30))
+    queue.schedule(2, after(0.05))
+    queue.schedule(3, after(0.40))
+
+    started = time.monotonic()
+    first = queue.wait_for_due()
+    first_elapsed = time.monotonic() - started
+    second = queue.wait_for_due()
+
+    passed = (
+        cancelled and not cancelled_again and empty_after_cancel
+        and first == [2] and first_elapsed < 0.25
+        and second == [3] and len(queue) == 0
+    )
+    print(f"{'✅' if passed else '❌'} 取消: {cancelled}/{cancelled_again}, "
+          f"重新调度后出队: {first}（{first_elapsed:.3f}s）, 随后: {second}")
+    assert passed
+
+
+def test_wakeup_on_earlier_insert():
+    """测试调度线程休眠时加入更早的任务会立即唤醒并重新计算休眠时长"""
+    print("\n🔍 测试插入更早任务时唤醒...")
+
+    queue = TaskTimerQueue()
+    queue.schedule(1, after(5))
+
+    thread, result = wait_in_thread(queue)
+    time.sleep(0.05)
+    inserted_at = time.monotonic()
+    queue.schedule(2)
+    thread.join(1)
+
+    latency = result[1] - inserted_at if result else None
+    passed = bool(result) and result[0] == [2] and latency < 0.1 and 1 in queue
+    latency_text = f"{latency * 1000:.1f}ms" if latency is not None else "未返回"
+    print(f"{'✅' if passed else '❌'} 出队: {result[0] if result else None}, 唤醒延迟 {latency_text}")
+    queue.close()
+    assert passed
+
+
+def test_close():
+    """测试关闭队列时唤醒等待中的调度线程并返回空列表"""
+    print("\n🔍 测试关闭队列...")
+
+    queue = TaskTimerQueue()
+    thread, result = wait_in_thread(queue)
+    time.sleep(0.05)
+    queue.close()
+    thread.join(1)
+
+    queue.reopen()
+    queue.schedule(1)
+    reopened = queue.wait_for_due()
+
+    passed = bool(result) and result[0] == [] and reopened == [1]
+    print(f"{'✅' if passed else '❌'} 关闭后返回: {result[0] if result else None}, 重新打开后出队: {reopened}")
+    assert passed
+
+
+def main():
+    """主函数"""
+    print("🚀 任务定时队列测试")
+    print("=" * 50)
+
+    tests = {
+        "到期顺序": test_heap_order,
+        "取消与重新调度": test_cancel_and_rearm,
+        "插入更早任务时唤醒": test_wakeup_on_earlier_insert,
+        "关闭队列": test_close,
+    }
+
+    results = {}
+    for name, test in tests.items():
+        try:
+            test()
+            results[name] = True
+        except AssertionError:
+            results[name] = False
+
+    print("\n" + "=" * 50)
+    print("📊 测试总结:")
+    for name, passed in results.items():
+        print(f"   {name}: {'✅ 成功' if passed else '❌ 失败'}")
+
+
+if __name__ == "__main__":
+    main()
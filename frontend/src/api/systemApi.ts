@@ -3,17 +3,36 @@
  */
 import { client } from './client';
 
+export interface ClockStatus {
+    synced: boolean;
+    offset_ms?: number;          // 当前时间差（毫秒）
+    uncertainty_ms?: number;     // 当前误差上限（毫秒）
+    sync_uncertainty_ms?: number;
+    rtt_ms?: number;             // 最小往返时间（毫秒）
+    drift_ppm?: number;          // 本地时钟漂移
+    drift_error_ppm?: number;
+    samples?: number;
+    total_samples?: number;
+    source?: string;
+    synced_at?: string;
+    age_seconds?: number;
+}
+
 export interface NetworkTimeInfo {
     network_time: string;
     timestamp: number;
     time_diff: number;
     formatted_time: string;
+    uncertainty_ms: number | null;
+    clock: ClockStatus;
 }
 
 export interface TimeSyncResult {
     time_diff: number;
     network_time: string;
     sync_success: boolean;
+    uncertainty_ms: number | null;
+    clock: ClockStatus;
 }
 
 export const systemApi = {
@@ -16,6 +16,55 @@ export interface TaskStats {
     scheduler_running_count?: number;
 }
 
+// 数值分布（微秒或毫秒）
+export interface Distribution {
+    count: number;
+    min: number;
+    p50: number;
+    p90: number;
+    p99: number;
+    max: number;
+    mean: number;
+    stdev: number;
+}
+
+// 一个线程开始后首次请求的发出时刻
+export interface TimingRecord {
+    record_id: number;
+    thread_id?: string;
+    status?: string;
+    response_code?: number;
+    planned_send_at: number;      // 计划发出时刻（本地时钟 Unix 微秒）
+    sent_at?: number;             // 实际发出时刻（本地时钟 Unix 微秒）
+    send_error_us?: number;
+    release_error_us?: number;
+    arrival_error_us?: number;
+    first_byte_ms?: number;
+    clock_offset_ms?: number;
+    clock_source?: 'network' | 'target';
+}
+
+// 一次开始时间的发出时刻统计
+export interface TimingRun {
+    planned_start: string;
+    threads: number;
+    clock_source?: 'network' | 'target';
+    clock_offset_ms?: number;
+    send_error_us: Distribution | null;
+    arrival_error_us: Distribution | null;
+}
+
+// 任务发出时刻报告
+export interface TaskTimingReport {
+    task_id: number;
+    runs: TimingRun[];
+    send_error_us: Distribution | null;
+    arrival_error_us: Distribution | null;
+    release_error_us: Distribution | null;
+    first_byte_ms: Distribution | null;
+    records: TimingRecord[];
+}
+
 export interface TaskListParams {
     skip?: number;
     limit?: number;
@@ -71,6 +120,11 @@ export const taskApi = {
         return api.post<Task>(`/tasks/${taskId}/status`, { status });
     },
 
+    // 获取发出时刻报告（最近 runs 次开始时间）
+    getTaskTiming: (taskId: number, runs: number = 1): Promise<TaskTimingReport> => {
+        return api.get<TaskTimingReport>(`/tasks/${taskId}/timing`, { runs });
+    },
+
     // 获取任务统计
     getTaskStats: (): Promise<TaskStats> => {
         return api.get<TaskStats>('/tasks/stats/summary');
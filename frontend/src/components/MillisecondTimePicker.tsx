@@ -208,6 +208,7 @@ const MillisecondTimePicker: React.FC<MillisecondTimePickerProps> = ({
                                     </Text>
                                     <Text type="secondary">
                                         时间差: {networkTime.time_diff > 0 ? '+' : ''}{networkTime.time_diff.toFixed(3)}秒
+                                        {networkTime.uncertainty_ms != null && ` (误差 ±${networkTime.uncertainty_ms.toFixed(2)}ms)`}
                                     </Text>
                                     <Button
                                         type="dashed"
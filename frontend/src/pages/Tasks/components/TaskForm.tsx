@@ -68,6 +68,13 @@ const TaskForm: React.FC<TaskFormProps> = ({
                 // 调度配置 - 支持毫秒级时间
                 schedule_start_time: scheduleConfig.start_time || undefined,
                 cron_expression: scheduleConfig.cron_expression,
+                clock_source: scheduleConfig.clock_source ?? 'network',
+                // 已废弃的 request 探测方式按 head 处理
+                calibration_probe: scheduleConfig.calibration_probe && scheduleConfig.calibration_probe !== 'request' ? scheduleConfig.calibration_probe : 'head',
+                calibration_url: scheduleConfig.calibration_url,
+                calibration_timestamp_field: scheduleConfig.calibration_timestamp_field,
+                compensate_latency: scheduleConfig.compensate_latency !== false,
+                max_clock_uncertainty_ms: scheduleConfig.max_clock_uncertainty_ms ?? 0,
 
                 // 重试配置
                 max_attempts: retryConfig.max_attempts ?? 10,
@@ -75,11 +82,19 @@ const TaskForm: React.FC<TaskFormProps> = ({
                 success_condition: retryConfig.success_condition,
                 stop_condition: retryConfig.stop_condition,
                 key_message: retryConfig.key_message,
+                success_keywords: retryConfig.success_keywords ?? [],
+                stop_keywords: retryConfig.stop_keywords ?? [],
+                max_body_bytes: retryConfig.max_body_bytes ?? 0,
 
                 // 代理配置
                 proxy_enabled: proxyConfig.enabled ?? false,
                 proxy_url: proxyConfig.proxy_url,
                 proxy_rotation: proxyConfig.rotation !== false,
+                proxy_rotation_policy: proxyConfig.rotation_policy,
+                proxy_rotate_every: proxyConfig.rotate_every ?? 10,
+                proxy_fallback_urls: proxyConfig.fallback_urls ?? [],
+                proxy_unavailable_policy: proxyConfig.unavailable_policy ?? 'direct',
+                proxy_unavailable_wait_seconds: proxyConfig.unavailable_wait_seconds ?? 30,
                 proxy_timeout: proxyConfig.timeout ?? 30,
             };
 
@@ -121,6 +136,12 @@ const TaskForm: React.FC<TaskFormProps> = ({
                     start_time: values.schedule_start_time || undefined,  // 直接使用字符串，支持毫秒级
                     cron_expression: values.cron_expression,
                     timezone: 'Asia/Shanghai',
+                    clock_source: values.clock_source ?? 'network',
+                    calibration_probe: values.calibration_probe ?? 'head',
+                    calibration_url: values.calibration_url || undefined,
+                    calibration_timestamp_field: values.calibration_timestamp_field || undefined,
+                    compensate_latency: values.compensate_latency ?? true,
+                    max_clock_uncertainty_ms: values.max_clock_uncertainty_ms ?? 0,
                 },
                 retry_config: {
                     max_attempts: values.max_attempts ?? 10,
@@ -128,11 +149,19 @@ const TaskForm: React.FC<TaskFormProps> = ({
                     success_condition: values.success_condition,
                     stop_condition: values.stop_condition,
                     key_message: values.key_message,
+                    success_keywords: values.success_keywords ?? [],
+                    stop_keywords: values.stop_keywords ?? [],
+                    max_body_bytes: values.max_body_bytes ?? 0,
                 },
                 proxy_config: {
                     enabled: values.proxy_enabled ?? false,
                     proxy_url: values.proxy_url,
                     rotation: values.proxy_rotation ?? true,
+                    rotation_policy: values.proxy_rotation_policy,
+                    rotate_every: values.proxy_rotate_every ?? 10,
+                    fallback_urls: values.proxy_fallback_urls ?? [],
+                    unavailable_policy: values.proxy_unavailable_policy ?? 'direct',
+                    unavailable_wait_seconds: values.proxy_unavailable_wait_seconds ?? 30,
                     timeout: values.proxy_timeout ?? 30,
                 },
             };
@@ -172,10 +201,17 @@ const TaskForm: React.FC<TaskFormProps> = ({
                     task_type: 'single',
                     thread_count: 1,
                     time_diff: 0,
+                    clock_source: 'network',
+                    calibration_probe: 'head',
+                    compensate_latency: true,
+                    max_clock_uncertainty_ms: 0,
                     max_attempts: 10,
                     interval_seconds: 5,
                     proxy_enabled: false,
                     proxy_rotation: true,
+                    proxy_rotate_every: 10,
+                    proxy_unavailable_policy: 'direct',
+                    proxy_unavailable_wait_seconds: 30,
                     proxy_timeout: 30,
                 }}
             >
@@ -255,6 +291,75 @@ const TaskForm: React.FC<TaskFormProps> = ({
                             </Form.Item>
                         )}
 
+                        {scheduleType === 'datetime' && (
+                            <>
+                                <Space>
+                                    <Form.Item
+                                        name="clock_source"
+                                        label="对时方式"
+                                        tooltip="目标主机：开始前探测目标主机，按其 Date 头或JSON时间戳对时，并按单程延迟提前发出（忽略时间差）"
+                                    >
+                                        <Select style={{ width: 160 }}>
+                                            <Option value="network">网络时间</Option>
+                                            <Option value="target">目标主机</Option>
+                                        </Select>
+                                    </Form.Item>
+                                    <Form.Item
+                                        name="max_clock_uncertainty_ms"
+                                        label="时钟误差上限(毫秒)"
+                                        tooltip="开始前时钟误差超过该值时任务失败，0表示不检查"
+                                    >
+                                        <InputNumber min={0} max={60000} />
+                                    </Form.Item>
+                                </Space>
+                                <Form.Item noStyle shouldUpdate={(prevValues, currentValues) => prevValues.clock_source !== currentValues.clock_source}>
+                                    {({ getFieldValue }) =>
+                                        getFieldValue('clock_source') === 'target' && (
+                                            <Space>
+                                                <Form.Item
+                                                    name="calibration_probe"
+                                                    label="探测方式"
+                                                    tooltip="探测经首次请求使用的代理发送，不会重放任务请求"
+                                                >
+                                                    <Select style={{ width: 160 }}>
+                                                        <Option value="head">HEAD</Option>
+                                                        <Option value="options">OPTIONS</Option>
+                                                        <Option value="url">空跑地址</Option>
+                                                    </Select>
+                                                </Form.Item>
+                                                <Form.Item noStyle shouldUpdate={(prevValues, currentValues) => prevValues.calibration_probe !== currentValues.calibration_probe}>
+                                                    {({ getFieldValue: getProbeValue }) =>
+                                                        getProbeValue('calibration_probe') === 'url' && (
+                                                            <>
+                                                                <Form.Item
+                                                                    name="calibration_url"
+                                                                    label="空跑地址"
+                                                                    tooltip="与任务请求同一主机、没有副作用的接口（如服务器时间接口），以 GET 请求"
+                                                                    rules={[{ required: true, message: '请输入空跑地址' }]}
+                                                                >
+                                                                    <Input placeholder="https://" style={{ width: 260 }} />
+                                                                </Form.Item>
+                                                                <Form.Item
+                                                                    name="calibration_timestamp_field"
+                                                                    label="时间戳字段"
+                                                                    tooltip="JSON响应中服务器时间戳的字段路径（秒或毫秒），为空时使用 Date 响应头"
+                                                                >
+                                                                    <Input placeholder="如 data.serverTime" style={{ width: 200 }} />
+                                                                </Form.Item>
+                                                            </>
+                                                        )
+                                                    }
+                                                </Form.Item>
+                                                <Form.Item name="compensate_latency" label="补偿单程延迟" valuePropName="checked">
+                                                    <Switch />
+                                                </Form.Item>
+                                            </Space>
+                                        )
+                                    }
+                                </Form.Item>
+                            </>
+                        )}
+
                         {scheduleType === 'cron' && (
                             <Form.Item
                                 name="cron_expression"
@@ -301,13 +406,37 @@ const TaskForm: React.FC<TaskFormProps> = ({
                         <Form.Item
                             name="key_message"
                             label="关键消息"
-                            tooltip="响应中包含此关键字时认为成功（优先级高于成功条件）"
+                            tooltip="响应中包含此关键字时认为成功（优先级高于成功条件）；以 $ 开头时按 JSON 路径判断，如 $.data.msg.contains('成功')"
                         >
                             <Input
                                 placeholder="例：success, ok, 抢购成功"
                                 allowClear
                             />
                         </Form.Item>
+
+                        <Form.Item
+                            name="stop_keywords"
+                            label="停止关键字"
+                            tooltip="响应中包含任一关键字时立即停止并标记为失败（优先级最高）"
+                        >
+                            <Select mode="tags" placeholder="例：售罄、限流、验证码" tokenSeparators={[',', '，']} />
+                        </Form.Item>
+
+                        <Form.Item
+                            name="success_keywords"
+                            label="成功关键字"
+                            tooltip="响应中包含任一关键字时认为成功（优先级低于关键消息，设置后未命中不再按HTTP状态码判断成功）"
+                        >
+                            <Select mode="tags" placeholder="例：抢购成功、下单成功" tokenSeparators={[',', '，']} />
+                        </Form.Item>
+
+                        <Form.Item
+                            name="max_body_bytes"
+                            label="响应体读取上限(字节)"
+                            tooltip="大于0时流式读取响应体，命中关键字等已能判定结果时提前停止，只保存已读取的前缀；0表示完整读取"
+                        >
+                            <InputNumber min={0} max={104857600} step={1024} />
+                        </Form.Item>
                     </TabPane>
 
                     <TabPane tab="代理配置" key="proxy">
@@ -328,6 +457,31 @@ const TaskForm: React.FC<TaskFormProps> = ({
                                             <Input placeholder="代理API地址" />
                                         </Form.Item>
 
+                                        <Form.Item
+                                            name="proxy_fallback_urls"
+                                            label="备用代理获取URL"
+                                            tooltip="主地址获取失败或熔断时依次使用"
+                                        >
+                                            <Select mode="tags" placeholder="可填写多个备用代理API地址" tokenSeparators={[' ', ',']} />
+                                        </Form.Item>
+
+                                        <Space>
+                                            <Form.Item
+                                                name="proxy_unavailable_policy"
+                                                label="无可用代理时"
+                                                tooltip="代理API持续失败、代理池为空时的处理方式"
+                                            >
+                                                <Select style={{ width: 200 }}>
+                                                    <Option value="direct">使用本地IP直连</Option>
+                                                    <Option value="fail">本次尝试失败</Option>
+                                                    <Option value="wait">等待代理</Option>
+                                                </Select>
+                                            </Form.Item>
+                                            <Form.Item name="proxy_unavailable_wait_seconds" label="最长等待(秒)">
+                                                <InputNumber min={1} max={3600} />
+                                            </Form.Item>
+                                        </Space>
+
                                         <Space>
                                             <Form.Item name="proxy_rotation" label="轮换代理" valuePropName="checked">
                                                 <Switch />
@@ -336,6 +490,24 @@ const TaskForm: React.FC<TaskFormProps> = ({
                                                 <InputNumber min={1} max={300} />
                                             </Form.Item>
                                         </Space>
+
+                                        <Space>
+                                            <Form.Item
+                                                name="proxy_rotation_policy"
+                                                label="轮换策略"
+                                                tooltip="固定/每N次/失败时更换的策略下，同一执行器沿用同一代理并复用已建立的连接"
+                                            >
+                                                <Select allowClear placeholder="按“轮换代理”开关" style={{ width: 200 }}>
+                                                    <Option value="per_attempt">每次尝试更换</Option>
+                                                    <Option value="sticky">每个线程固定</Option>
+                                                    <Option value="every_n">每N次请求更换</Option>
+                                                    <Option value="on_failure">失败时更换</Option>
+                                                </Select>
+                                            </Form.Item>
+                                            <Form.Item name="proxy_rotate_every" label="N(次)">
+                                                <InputNumber min={1} max={100000} />
+                                            </Form.Item>
+                                        </Space>
                                     </>
                                 )
                             }
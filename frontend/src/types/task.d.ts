@@ -19,6 +19,16 @@ export interface ScheduleConfig {
     start_time?: string;
     cron_expression?: string;
     timezone?: string;
+    engine?: 'thread' | 'async';
+    prewarm_seconds?: number;
+    stagger_start_ms?: number;
+    stagger_end_ms?: number;
+    max_clock_uncertainty_ms?: number;  // 开始前网络时间误差上限（毫秒），0表示不检查
+    clock_source?: 'network' | 'target';  // 对时方式：网络时间 / 目标主机时钟
+    calibration_probe?: 'head' | 'options' | 'url' | 'request';  // 目标主机时钟校准的探测方式（request 已废弃，按 head 处理）
+    calibration_url?: string;  // url 探测时请求的空跑地址（同一主机上没有副作用的接口）
+    calibration_timestamp_field?: string;  // url 探测时JSON响应中的时间戳字段路径，为空时使用 Date 头
+    compensate_latency?: boolean;  // 按单程延迟提前发出
 }
 
 // 重试配置
@@ -28,6 +38,9 @@ export interface RetryConfig {
     success_condition?: string;  // 成功条件表达式
     stop_condition?: string;     // 停止条件表达式
     key_message?: string;        // 关键消息
+    success_keywords?: string[]; // 成功关键字
+    stop_keywords?: string[];    // 停止关键字
+    max_body_bytes?: number;     // 响应体最多读取字节数，0表示完整读取
 }
 
 // 代理配置
@@ -35,6 +48,11 @@ export interface ProxyConfig {
     enabled: boolean;
     proxy_url?: string;
     rotation: boolean;
+    rotation_policy?: 'per_attempt' | 'sticky' | 'every_n' | 'on_failure';  // 轮换策略
+    rotate_every?: number;       // every_n 策略下更换代理前的请求数
+    fallback_urls?: string[];    // 备用代理获取URL
+    unavailable_policy?: 'direct' | 'fail' | 'wait';  // 没有可用代理时的处理策略
+    unavailable_wait_seconds?: number;
     timeout: number;
 }
 
@@ -76,6 +94,12 @@ export interface TaskFormData {
     // 调度相关字段
     schedule_start_time?: string;
     cron_expression?: string;
+    clock_source?: 'network' | 'target';
+    calibration_probe?: 'head' | 'options' | 'url';
+    calibration_url?: string;
+    calibration_timestamp_field?: string;
+    compensate_latency?: boolean;
+    max_clock_uncertainty_ms?: number;
 
     // 重试配置字段
     max_attempts?: number;
@@ -83,11 +107,19 @@ export interface TaskFormData {
     success_condition?: string;
     stop_condition?: string;
     key_message?: string;
+    success_keywords?: string[];
+    stop_keywords?: string[];
+    max_body_bytes?: number;
 
     // 代理配置字段
     proxy_enabled?: boolean;
     proxy_url?: string;
     proxy_rotation?: boolean;
+    proxy_rotation_policy?: 'per_attempt' | 'sticky' | 'every_n' | 'on_failure';
+    proxy_rotate_every?: number;
+    proxy_fallback_urls?: string[];
+    proxy_unavailable_policy?: 'direct' | 'fail' | 'wait';
+    proxy_unavailable_wait_seconds?: number;
     proxy_timeout?: number;
 }
 
@@ -99,7 +131,16 @@ export interface ExecutionRecord {
     status: 'success' | 'failed' | 'timeout';
     response_code?: number;
     response_body?: string;
+    body_truncated?: boolean;
     response_time?: number;
+    warmup_time?: number;
+    release_error?: number;
+    sent_at?: number;          // 实际发出时刻（本地时钟 Unix 微秒）
+    first_byte_time?: number;  // 首字节时间（毫秒）
+    planned_send_at?: number;  // 计划发出时刻（本地时钟 Unix 微秒）
+    clock_offset?: number;     // 对时使用的时钟偏移（毫秒）
+    clock_source?: 'network' | 'target';
+    arrival_error?: number;    // 估计的到达误差（微秒）
     error_message?: string;
     executed_at: string;
 } 
\ No newline at end of file